@@ -0,0 +1,180 @@
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from thresholds import DEFAULTS
+
+# --- Fill-level alerts ---
+# Only newly ingested readings are evaluated; rows at or before the last
+# reading already seen for a bin are skipped, so replaying a source is safe.
+# Hysteresis: an alert opens when a bin reaches its full_at threshold and
+# only closes once it drops below close_at (see thresholds.py), so a sensor
+# hovering around the threshold does not open and close an alert on every
+# reading.
+#
+# Alert lifecycle (opened/closed) is kept in a local SQLite file, indexed by
+# bin and by time; open alerts and today's counts are also kept in memory so
+# the KPI boxes never query the database.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id         INTEGER PRIMARY KEY,
+    bin_id     TEXT NOT NULL,
+    opened_at  INTEGER NOT NULL,   -- ns since epoch
+    open_fill  REAL,
+    closed_at  INTEGER,            -- NULL while open
+    close_fill REAL
+);
+CREATE INDEX IF NOT EXISTS alerts_bin ON alerts (bin_id, opened_at);
+CREATE INDEX IF NOT EXISTS alerts_opened ON alerts (opened_at);
+CREATE INDEX IF NOT EXISTS alerts_closed ON alerts (closed_at);
+CREATE INDEX IF NOT EXISTS alerts_open ON alerts (bin_id) WHERE closed_at IS NULL;
+CREATE TABLE IF NOT EXISTS bin_state (
+    bin_id  TEXT PRIMARY KEY,
+    last_ts INTEGER NOT NULL
+);
+"""
+
+DAY_NS = 86_400 * 10**9
+
+
+class AlertEngine:
+    def __init__(self, path, thresholds=None):
+        self.path = path
+        self.thresholds = thresholds   # ThresholdConfig; None = thresholds.DEFAULTS
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+        # bin -> (alert id, opened_at ns, open fill)
+        self.open = {
+            bin_id: (alert_id, opened_at, fill)
+            for alert_id, bin_id, opened_at, fill in self.db.execute(
+                "SELECT id, bin_id, opened_at, open_fill FROM alerts WHERE closed_at IS NULL")
+        }
+        self.last_ts = dict(self.db.execute("SELECT bin_id, last_ts FROM bin_state"))
+        self.day = None
+        self.opened_today = self.resolved_today = 0
+        newest = max(self.last_ts.values(), default=None)
+        if newest is not None:
+            self._start_day(newest // DAY_NS * DAY_NS)
+
+    def _start_day(self, day):
+        # Today's counters from the time indexes (once per day, not per render)
+        self.day = day
+        self.opened_today = self.db.execute(
+            "SELECT COUNT(*) FROM alerts WHERE opened_at >= ?", (day,)).fetchone()[0]
+        self.resolved_today = self.db.execute(
+            "SELECT COUNT(*) FROM alerts WHERE closed_at >= ?", (day,)).fetchone()[0]
+
+    # --- Ingest ---
+    def evaluate(self, batch):
+        if batch.empty:
+            return
+        b = pd.DataFrame({
+            "bin": batch["Bin_ID"].astype(str).to_numpy(),
+            "ts": batch["Timestamp"].astype("datetime64[ns]").to_numpy().view("int64"),
+            "fill": pd.to_numeric(batch["Fill_Level(%)"], errors="coerce").to_numpy(dtype="float64"),
+        }).dropna(subset=["fill"])
+
+        with self.lock:
+            seen = b["bin"].map(self.last_ts)
+            b = b[seen.isna() | (b["ts"] > seen)]
+            if b.empty:
+                return
+            b = b.sort_values(["bin", "ts"], kind="stable")
+            if self.thresholds is None:
+                b["open_at"], b["close_at"] = DEFAULTS["full_at"], DEFAULTS["close_at"]
+            else:
+                t = self.thresholds.resolve(b["bin"])
+                b["open_at"], b["close_at"] = t["full_at"].to_numpy(), t["close_at"].to_numpy()
+
+            # 1 = alerting, 0 = clear, NaN = inside the hysteresis band (keep state)
+            signal = pd.Series(np.select([b["fill"] >= b["open_at"], b["fill"] < b["close_at"]], [1.0, 0.0], np.nan),
+                               index=b.index)
+            before = pd.Series(b["bin"].isin(list(self.open)).astype("float64"), index=b.index)
+            grouped = signal.groupby(b["bin"], sort=False)
+            state = grouped.ffill().fillna(before)
+            prev = state.groupby(b["bin"], sort=False).shift().fillna(before)
+            opened = b[(state == 1) & (prev == 0)]
+            closed = b[(state == 0) & (prev == 1)]
+
+            # Rows of one bin are in time order, so walking the transitions
+            # in that order keeps open/close pairs consistent
+            events = pd.concat([opened.assign(kind=1), closed.assign(kind=0)]).sort_values(["bin", "ts"], kind="stable")
+            with self.db:
+                for bin_id, ts, fill, kind in zip(events["bin"], events["ts"], events["fill"], events["kind"]):
+                    if kind == 1:
+                        cur = self.db.execute("INSERT INTO alerts (bin_id, opened_at, open_fill) VALUES (?, ?, ?)",
+                                              (bin_id, int(ts), round(float(fill), 2)))
+                        self.open[bin_id] = (cur.lastrowid, int(ts), round(float(fill), 2))
+                    else:
+                        alert_id = self.open.pop(bin_id)[0]
+                        self.db.execute("UPDATE alerts SET closed_at = ?, close_fill = ? WHERE id = ?",
+                                        (int(ts), round(float(fill), 2), alert_id))
+
+                newest = b.groupby("bin", sort=False)["ts"].max()
+                self.last_ts.update(zip(newest.index, newest.to_numpy().tolist()))
+                self.db.executemany(
+                    "INSERT INTO bin_state (bin_id, last_ts) VALUES (?, ?) "
+                    "ON CONFLICT(bin_id) DO UPDATE SET last_ts = excluded.last_ts",
+                    zip(newest.index, newest.to_numpy().tolist()))
+
+            day = int(b["ts"].max()) // DAY_NS * DAY_NS
+            if self.day is None or day > self.day:
+                self._start_day(day)
+            else:
+                self.opened_today += int((opened["ts"] >= self.day).sum())
+                self.resolved_today += int((closed["ts"] >= self.day).sum())
+
+    def resolve(self, collections):
+        # Closes the open alert of every bin that was emptied after it opened
+        # (collections: Bin_ID, Collected, Fill_After; see collection_events.py)
+        if collections.empty:
+            return
+        with self.lock:
+            with self.db:
+                collected = collections["Collected"].astype("datetime64[ns]").to_numpy().view("int64")
+                for bin_id, ts, fill in zip(collections["Bin_ID"], collected, collections["Fill_After"]):
+                    alert = self.open.get(bin_id)
+                    if alert is None or alert[1] > ts:
+                        continue
+                    del self.open[bin_id]
+                    self.db.execute("UPDATE alerts SET closed_at = ?, close_fill = ? WHERE id = ?",
+                                    (int(ts), float(fill), alert[0]))
+                    if self.day is not None and ts >= self.day:
+                        self.resolved_today += 1
+
+    # --- Reads ---
+    def kpis(self):
+        # O(1): open alerts, alerts opened / resolved on the latest day
+        with self.lock:
+            return {"open": len(self.open), "opened_today": self.opened_today,
+                    "resolved_today": self.resolved_today}
+
+    def open_alerts(self):
+        with self.lock:
+            rows = [(bin_id, opened_at, fill) for bin_id, (_, opened_at, fill) in self.open.items()]
+        df = pd.DataFrame(rows, columns=["Bin_ID", "Opened", "Open_Fill"])
+        df["Opened"] = pd.to_datetime(df["Opened"].astype("int64"), unit="ns")
+        return df.sort_values("Opened", ascending=False, kind="stable").reset_index(drop=True)
+
+    def history(self, since=None, bin_id=None, limit=50):
+        # Closed alerts, newest first (uses the closed_at / bin indexes)
+        query = "SELECT bin_id, opened_at, open_fill, closed_at, close_fill FROM alerts WHERE closed_at IS NOT NULL"
+        params = []
+        if since is not None:
+            query += " AND closed_at >= ?"
+            params.append(pd.Timestamp(since).as_unit("ns").value)
+        if bin_id is not None:
+            query += " AND bin_id = ?"
+            params.append(str(bin_id))
+        query += " ORDER BY closed_at DESC LIMIT ?"
+        params.append(limit)
+        with self.lock:
+            rows = self.db.execute(query, params).fetchall()
+        df = pd.DataFrame(rows, columns=["Bin_ID", "Opened", "Open_Fill", "Closed", "Close_Fill"])
+        for col in ("Opened", "Closed"):
+            df[col] = pd.to_datetime(df[col].astype("int64"), unit="ns")
+        return df
@@ -0,0 +1,242 @@
+import argparse
+import csv
+import time
+import tracemalloc
+
+import pandas as pd
+
+import schema
+from bin_map import bins_layer
+from cards import status_cards
+from downsample import bucketed_pivot
+from fleet_generator import generate_frame
+from fleet_state import FleetState
+from forecast import FillForecast
+from heartbeat import HeartbeatTracker
+from quality import QualityFilter
+from rollups import Rollups
+from thresholds import DEFAULTS, ThresholdConfig, classify
+
+# --- Load-test benchmark for the dashboard's data preparation ---
+# Generates fleets of growing size and times what each page does with the
+# data (no Streamlit involved), plus the peak memory of every stage.
+#
+#   python benchmark.py --bins 10 100 1000 --days 7
+#   python benchmark.py --bins 10000 --days 1 --out results.csv
+
+
+# Each stage takes the shared context dict and returns something (ignored).
+# Stages may read what earlier stages stored in ctx.
+def stage_parse(ctx):
+    ctx["df"] = schema.apply(schema.detect(ctx["raw"]), ctx["raw"])
+
+
+def _next_batch(ctx, stage):
+    # Stages that keep state get a new batch on every call (one cadence
+    # later each time), so repeats are not timed on readings already seen
+    calls = ctx["calls"][stage] = ctx["calls"].get(stage, 0) + 1
+    return ctx["batches"][calls - 1]
+
+
+def stage_quality(ctx):
+    # Cost of one ingest batch through the quality stage on warm state
+    ctx["quality"].filter(_next_batch(ctx, "quality"))
+
+
+def stage_latest_sort(ctx):
+    # What the pages used to do on every rerun
+    return ctx["df"].sort_values("Timestamp").groupby("Bin_ID", observed=True).tail(1)
+
+
+def stage_latest_index(ctx):
+    # Cost of one ingest batch (one new reading per bin) on a warm index
+    index = ctx["index"]
+    index.update(_next_batch(ctx, "latest"))
+    ctx["latest"] = index.snapshot()
+
+
+def stage_pivot(ctx):
+    df = ctx["df"]
+    pivot_df = df.pivot_table(index="Timestamp", columns="Bin_ID", values="Fill_Level(%)",
+                              aggfunc="mean", observed=True).sort_index()
+    pivot_df["Overall Avg"] = pivot_df.mean(axis=1)
+    return pivot_df
+
+
+def stage_bucketed_pivot(ctx):
+    pivot_df, _ = bucketed_pivot(ctx["df"], "Timestamp", "Bin_ID", "Fill_Level(%)")
+    pivot_df["Overall Avg"] = pivot_df.mean(axis=1)
+    return pivot_df
+
+
+def stage_rollup_update(ctx):
+    # Cost of folding one ingest batch into warm rollups
+    ctx["rollups"].update(_next_batch(ctx, "rollups"))
+
+
+def stage_rollup_pivot(ctx):
+    pivot_df = ctx["rollups"].pivot("1h")
+    pivot_df["Overall Avg"] = pivot_df.mean(axis=1)
+    return pivot_df
+
+
+def stage_forecast_update(ctx):
+    # Cost of folding one ingest batch into warm fill-rate estimates
+    ctx["forecast"].update(_next_batch(ctx, "forecast"))
+
+
+def stage_forecast_predict(ctx):
+    latest = ctx["classified"]
+    return ctx["forecast"].predict(latest["Bin_ID"], latest["Full_At"])
+
+
+def stage_heartbeat_update(ctx):
+    # Cost of one ingest batch through the heartbeat tracker (deadline heap)
+    ctx["heartbeat"].update(_next_batch(ctx, "heartbeat"))
+
+
+def stage_heartbeat_status(ctx):
+    # Device statuses for the whole fleet (once per update)
+    return ctx["heartbeat"].status(ctx["latest"]["Bin_ID"])
+
+
+def stage_classify(ctx):
+    # Per-bin thresholds and statuses (once per update / threshold change)
+    ctx["classified"] = classify(ctx["latest"], ctx["thresholds"])
+
+
+def stage_kpis(ctx):
+    classified = ctx["classified"]
+    return len(classified), int((classified["Fill_Rank"] == 2).sum())
+
+
+def stage_cards(ctx):
+    return status_cards(ctx["classified"])
+
+
+def stage_markers(ctx):
+    import folium
+
+    m = folium.Map(location=[3.142844, 101.718299], zoom_start=17)
+    for _, row in ctx["latest"].iterrows():
+        fill = row["Fill_Level(%)"]
+        color = "red" if fill >= DEFAULTS["full_at"] else "orange" if fill >= DEFAULTS["medium_at"] else "green"
+        folium.CircleMarker(location=[row["Lat"], row["Lon"]], radius=10, color=color,
+                            fill=True, fill_color=color, popup=f"{row['Bin_ID']} – {fill}% full").add_to(m)
+    return m.get_root().render()
+
+
+def stage_map_layer(ctx):
+    latest = ctx["classified"]
+    import folium
+
+    # Bypass the layer cache so the build itself is timed
+    m = folium.Map(location=[3.142844, 101.718299], zoom_start=15)
+    bins_layer(latest["Bin_ID"], latest["Lat"], latest["Lon"], latest["Fill_Level(%)"] + time.time() % 1e-3,
+               latest["Fill_Rank"], zoom=15).add_to(m)
+    return m.get_root().render()
+
+
+STAGES = [
+    ("parse", stage_parse),
+    ("quality: filter", stage_quality),
+    ("latest: sort+groupby", stage_latest_sort),
+    ("latest: index update", stage_latest_index),
+    ("pivot (Report)", stage_pivot),
+    ("pivot (bucketed)", stage_bucketed_pivot),
+    ("rollups: update", stage_rollup_update),
+    ("pivot (rollups)", stage_rollup_pivot),
+    ("classify", stage_classify),
+    ("forecast: update", stage_forecast_update),
+    ("forecast: predict", stage_forecast_predict),
+    ("heartbeat: update", stage_heartbeat_update),
+    ("heartbeat: status", stage_heartbeat_status),
+    ("KPIs", stage_kpis),
+    ("status cards", stage_cards),
+    ("map markers", stage_markers),
+    ("map layer", stage_map_layer),
+]
+
+
+def _measure(fn, ctx, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(ctx)
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn(ctx)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def run(bins, days, cadence, repeat=3, stages=None):
+    raw = generate_frame(bins, days, cadence)
+    df = schema.apply(schema.detect(raw), raw)
+
+    # Warm index and rollups holding everything but the last reading of each bin
+    last_time = df["Timestamp"].max()
+    index = FleetState()
+    index.update(df[df["Timestamp"] < last_time])
+    thresholds = ThresholdConfig(None)
+    rollups = Rollups(thresholds)
+    rollups.update(df[df["Timestamp"] < last_time])
+    forecast = FillForecast()
+    forecast.update(df[df["Timestamp"] < last_time])
+    quality = QualityFilter()
+    quality.filter(df[df["Timestamp"] < last_time], count=False)
+    heartbeat = HeartbeatTracker()
+    heartbeat.update(df[df["Timestamp"] < last_time])
+    ctx = {"raw": raw, "df": df, "index": index, "rollups": rollups, "thresholds": thresholds,
+           "forecast": forecast, "quality": quality, "heartbeat": heartbeat,
+           "batch": df[df["Timestamp"] == last_time], "calls": {}}
+    # The last reading of each bin, then copies of it one cadence apart
+    # (_measure calls a stage repeat + 1 times)
+    step = pd.Timedelta(minutes=cadence)
+    ctx["batches"] = [ctx["batch"].assign(Timestamp=ctx["batch"]["Timestamp"] + k * step) for k in range(repeat + 1)]
+    ctx["latest"] = index.snapshot()
+    ctx["classified"] = classify(ctx["latest"], thresholds)
+
+    results = []
+    for name, fn in STAGES:
+        if stages and name not in stages:
+            continue
+        try:
+            seconds, peak = _measure(fn, ctx, repeat)
+        except ImportError as e:
+            print(f"  skipping {name}: {e}")
+            continue
+        results.append({"bins": bins, "rows": len(raw), "stage": name,
+                        "ms": round(seconds * 1000, 2), "peak_mb": round(peak / 2**20, 2)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard's data preparation as the fleet grows")
+    parser.add_argument("--bins", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--days", type=float, default=7)
+    parser.add_argument("--cadence", type=float, default=5, help="minutes between readings")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--stage", action="append", help="only run these stages (repeatable)")
+    parser.add_argument("--out", help="also write the results to this CSV file")
+    args = parser.parse_args()
+
+    all_results = []
+    for bins in args.bins:
+        print(f"== {bins:,} bins, {args.days:g} days at {args.cadence:g} min ==")
+        results = run(bins, args.days, args.cadence, args.repeat, args.stage)
+        for r in results:
+            print(f"  {r['stage']:<24} {r['ms']:>10.2f} ms {r['peak_mb']:>10.2f} MB peak   ({r['rows']:,} rows)")
+        all_results.extend(results)
+
+    if args.out:
+        with open(args.out, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["bins", "rows", "stage", "ms", "peak_mb"])
+            writer.writeheader()
+            writer.writerows(all_results)
+        print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+from collections import OrderedDict
+import hashlib
+import threading
+
+import folium
+from folium.features import GeoJsonPopup
+import numpy as np
+import pandas as pd
+
+# --- Scalable bin map ---
+# The map skeleton (tiles, center, zoom) is cheap and built fresh on every
+# render. Bins go on a separate layer that st_folium can swap in on its own
+# (feature_group_to_add), so a refresh only sends the bins layer.
+# The layer is one GeoJSON object built from arrays, not one folium object
+# per bin, and its data is cached process-wide until positions or fills
+# change. Above MARKER_LIMIT bins, nearby bins are merged into grid cells
+# sized for the current zoom level.
+TRX_CENTER = (3.142844, 101.718299)
+MARKER_LIMIT = 300
+CELL_PIXELS = 64          # roughly how wide one aggregated cell is on screen
+LAYER_CACHE_SIZE = 16
+
+_layers = OrderedDict()   # (zoom, data hash) -> GeoJSON dict
+_lock = threading.Lock()
+
+
+def base_map(lat=TRX_CENTER[0], lon=TRX_CENTER[1], zoom=17):
+    return folium.Map(location=[lat, lon], zoom_start=zoom)
+
+
+# Marker color per Fill_Rank (0 EMPTY, 1 MEDIUM, 2 FULL; see thresholds.classify)
+RANK_COLORS = np.array(["green", "orange", "red"], dtype=object)
+
+
+def cell_degrees(zoom):
+    # A 256px web-mercator tile spans 360 / 2**zoom degrees of longitude
+    return 360.0 / 2 ** zoom * CELL_PIXELS / 256
+
+
+def grid_aggregate(lat, lon, fill, rank, zoom):
+    # One row per occupied grid cell: mean position, bin count, mean/max fill, worst status
+    size = cell_degrees(zoom)
+    df = pd.DataFrame({
+        "cell_y": np.floor(np.asarray(lat) / size).astype(np.int64),
+        "cell_x": np.floor(np.asarray(lon) / size).astype(np.int64),
+        "lat": lat, "lon": lon, "fill": fill, "rank": rank,
+    })
+    return (
+        df.groupby(["cell_y", "cell_x"], sort=False)
+        .agg(lat=("lat", "mean"), lon=("lon", "mean"), count=("fill", "size"),
+             mean_fill=("fill", "mean"), max_fill=("fill", "max"), rank=("rank", "max"))
+        .reset_index(drop=True)
+    )
+
+
+def _percent(values, decimals=0):
+    # 45.5 -> "45.5%", NaN (no reading) -> "–"
+    values = np.round(np.asarray(values, dtype=float), decimals)
+    missing = np.isnan(values)
+    text = np.where(missing, 0, values).astype(int).astype(str) if decimals == 0 else values.astype(str)
+    return np.where(missing, "–", np.char.add(text, "%"))
+
+
+def _points_geojson(lat, lon, color, radius, label):
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [x, y]},
+                "properties": {"color": c, "radius": r, "label": t},
+            }
+            for y, x, c, r, t in zip(lat.tolist(), lon.tolist(), color.tolist(), radius.tolist(), label.tolist())
+        ],
+    }
+
+
+def _style(feature):
+    props = feature["properties"]
+    return {"color": props["color"], "fillColor": props["color"], "fillOpacity": 0.6, "radius": props["radius"]}
+
+
+def _build_geojson(bin_ids, lat, lon, fill, rank, zoom, aggregate):
+    if aggregate:
+        cells = grid_aggregate(lat, lon, fill, rank, zoom)
+        # Color by the worst status in the cell, size by how many bins it holds
+        color = RANK_COLORS[cells["rank"].to_numpy()]
+        radius = np.clip(8 + 4 * np.log2(cells["count"].to_numpy()), 8, 30)
+        label = (cells["count"].astype(str) + " bins – avg " + _percent(cells["mean_fill"])
+                 + ", max " + _percent(cells["max_fill"])).to_numpy()
+        return _points_geojson(cells["lat"].to_numpy(), cells["lon"].to_numpy(), color, radius, label)
+
+    color = RANK_COLORS[rank]
+    radius = np.full(len(bin_ids), 10)
+    label = np.char.add(np.char.add(bin_ids, ": "), np.char.add(_percent(fill, 1), " full"))
+    return _points_geojson(lat, lon, color, radius, label)
+
+
+def bins_layer(bin_ids, lat, lon, fill, rank, zoom=17, name="Bins"):
+    # Returns a new FeatureGroup with every bin (or grid cell) as one GeoJSON layer.
+    # rank is each bin's Fill_Rank (0 EMPTY, 1 MEDIUM, 2 FULL; see thresholds.classify)
+    bin_ids = np.asarray(bin_ids, dtype=str)
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    fill = np.asarray(fill, dtype=float)
+    rank = np.asarray(rank, dtype=np.int8)
+    aggregate = len(bin_ids) > MARKER_LIMIT
+    zoom = int(zoom) if aggregate else 0   # zoom only matters when aggregating
+
+    digest = hashlib.sha1(b"".join(a.tobytes() for a in (bin_ids, lat, lon, fill, rank))).hexdigest()
+    key = (zoom, digest)
+    with _lock:
+        data = _layers.get(key)
+        if data is not None:
+            _layers.move_to_end(key)
+
+    if data is None:
+        data = _build_geojson(bin_ids, lat, lon, fill, rank, zoom, aggregate)
+        with _lock:
+            _layers[key] = data
+            if len(_layers) > LAYER_CACHE_SIZE:
+                _layers.popitem(last=False)
+
+    group = folium.FeatureGroup(name=name)
+    if not data["features"]:
+        return group
+    folium.GeoJson(
+        data,
+        marker=folium.CircleMarker(radius=10, fill=True),
+        style_function=_style,
+        popup=GeoJsonPopup(fields=["label"], labels=False),
+    ).add_to(group)
+    return group
+
+
+# --- Collection routes (see routing.py) ---
+ROUTE_COLORS = ["#1f77b4", "#9467bd", "#e377c2", "#17becf", "#8c564b", "#bcbd22", "#7f7f7f"]
+
+
+def add_routes(group, plan, depot):
+    # Draws each route of plan (routing.plan_routes) as one depot-to-depot line
+    if plan.empty:
+        return group
+    folium.Marker(location=list(depot), tooltip="Depot", icon=folium.Icon(color="black", icon="home")).add_to(group)
+    for number, route in plan.groupby("Route", sort=True):
+        points = [list(depot)] + route[["Lat", "Lon"]].to_numpy().tolist() + [list(depot)]
+        folium.PolyLine(points, color=ROUTE_COLORS[(number - 1) % len(ROUTE_COLORS)], weight=4, opacity=0.8,
+                        tooltip=f"Route {number}: {len(route)} stops, {route['Km'].sum():.1f} km").add_to(group)
+    return group
@@ -0,0 +1,137 @@
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from search_index import SearchIndex
+
+# --- Bin registry ---
+# Where every bin is and which area it belongs to, in one place:
+#   Bin_ID, Lat, Lon, Zone, Location (display name), Installed (date)
+# Kept in a local SQLite file; bins.csv (BINS_FILE) is the hand-edited list
+# that is imported on start, and bins that report their own Lat/Lon (like
+# the dummy sheet) are registered the first time they are seen.
+#
+# The whole registry is also held in memory as arrays sorted by grid cell
+# (GRID_DEGREES square, ~1 km), so a map viewport or area only looks at the
+# cells it overlaps instead of every bin of every district. Bin_ID,
+# location and zone are kept in a SearchIndex for the Device page search,
+# re-indexed only for the bins an upsert touches.
+COLUMNS = ["Bin_ID", "Lat", "Lon", "Zone", "Location", "Installed"]
+GRID_DEGREES = 0.01
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bins (
+    bin_id    TEXT PRIMARY KEY,
+    lat       REAL,
+    lon       REAL,
+    zone      TEXT,
+    location  TEXT,
+    installed TEXT              -- YYYY-MM-DD
+);
+CREATE INDEX IF NOT EXISTS bins_zone ON bins (zone);
+"""
+
+
+def _cells(lat, lon):
+    return (np.floor(np.asarray(lat, dtype=float) / GRID_DEGREES).astype(np.int64),
+            np.floor(np.asarray(lon, dtype=float) / GRID_DEGREES).astype(np.int64))
+
+
+class BinRegistry:
+    def __init__(self, path, seed_file=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.version = 0
+        self.search = SearchIndex()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self._load()
+        self.search.update(self.bins)
+        if seed_file and os.path.exists(seed_file):
+            self.upsert(pd.read_csv(seed_file, dtype={"Bin_ID": str}))
+
+    def __len__(self):
+        return len(self.bins)
+
+    def _load(self):
+        # Called with the registry fully written; rebuilds the in-memory index
+        bins = pd.DataFrame(self.db.execute(
+            "SELECT bin_id, lat, lon, zone, location, installed FROM bins").fetchall(), columns=COLUMNS)
+        bins[["Lat", "Lon"]] = bins[["Lat", "Lon"]].astype(float)
+        bins["Installed"] = pd.to_datetime(bins["Installed"], errors="coerce")
+
+        # Grid index: bins with coordinates, sorted by (cell row, cell column)
+        placed = bins[bins["Lat"].notna() & bins["Lon"].notna()]
+        cell_y, cell_x = _cells(placed["Lat"], placed["Lon"])
+        order = np.lexsort((cell_x, cell_y))
+        self.bins = bins.set_index("Bin_ID", drop=False)
+        self.cell_y, self.cell_x = cell_y[order], cell_x[order]
+        self.grid_ids = placed["Bin_ID"].to_numpy(dtype=object)[order]
+        self.grid_lat = placed["Lat"].to_numpy()[order]
+        self.grid_lon = placed["Lon"].to_numpy()[order]
+        self.version += 1
+
+    # --- Writing ---
+    def upsert(self, df):
+        # df: Bin_ID plus any of Lat, Lon, Zone, Location, Installed.
+        # Only the columns present overwrite what is stored.
+        df = df.dropna(subset=["Bin_ID"])
+        given = [c for c in COLUMNS[1:] if c in df.columns]
+        rows = df.reindex(columns=COLUMNS)
+        rows["Installed"] = pd.to_datetime(rows["Installed"], errors="coerce").dt.strftime("%Y-%m-%d")
+        rows = rows.astype(object).where(rows.notna(), None)
+        updates = ", ".join(f"{c.lower()} = excluded.{c.lower()}" for c in given) or "bin_id = bin_id"
+        with self.lock:
+            with self.db:
+                self.db.executemany(
+                    "INSERT INTO bins (bin_id, lat, lon, zone, location, installed) VALUES (?, ?, ?, ?, ?, ?) "
+                    f"ON CONFLICT(bin_id) DO UPDATE SET {updates}",
+                    (tuple(r) for r in rows.itertuples(index=False)))
+            self._load()
+            self.search.update(self.bins.loc[rows["Bin_ID"].astype(str).unique()])
+
+    def register_missing(self, latest):
+        # Adds bins that are not registered yet, with the Lat/Lon they report
+        if latest.empty:
+            return
+        new = latest[~latest["Bin_ID"].astype(str).isin(self.bins.index)]
+        if new.empty:
+            return
+        self.upsert(new.reindex(columns=["Bin_ID", "Lat", "Lon"]).assign(Bin_ID=new["Bin_ID"].astype(str)))
+
+    # --- Reading ---
+    def lookup(self, bin_ids):
+        # One row per entry of bin_ids (NaN for unregistered bins)
+        with self.lock:
+            out = self.bins.reindex(pd.Index(pd.Series(bin_ids).astype(str)))
+        return out.drop(columns="Bin_ID").reset_index(drop=True)
+
+    def zones(self):
+        with self.lock:
+            return sorted(self.bins["Zone"].dropna().unique())
+
+    def in_zone(self, zone):
+        with self.lock:
+            return self.bins.index[(self.bins["Zone"] == zone).to_numpy()].to_numpy(dtype=object)
+
+    def in_bounds(self, south, west, north, east):
+        # Bin_IDs inside the box: one binary search per grid row it spans
+        (y0, y1), (x0, x1) = _cells([south, north], [west, east])
+        with self.lock:
+            lo = np.searchsorted(self.cell_y, y0, side="left")
+            hi = np.searchsorted(self.cell_y, y1, side="right")
+            picks = []
+            for y in np.unique(self.cell_y[lo:hi]):
+                row_lo = lo + np.searchsorted(self.cell_y[lo:hi], y, side="left")
+                row_hi = lo + np.searchsorted(self.cell_y[lo:hi], y, side="right")
+                a = row_lo + np.searchsorted(self.cell_x[row_lo:row_hi], x0, side="left")
+                b = row_lo + np.searchsorted(self.cell_x[row_lo:row_hi], x1, side="right")
+                picks.append(np.arange(a, b))
+            rows = np.concatenate(picks) if picks else np.empty(0, dtype=np.int64)
+            # Cells on the edge of the box are only partly inside
+            lat, lon = self.grid_lat[rows], self.grid_lon[rows]
+            inside = (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+            return self.grid_ids[rows[inside]]
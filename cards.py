@@ -0,0 +1,116 @@
+import html
+
+import numpy as np
+import pandas as pd
+
+from forecast import eta_text
+
+# --- Batched card rendering ---
+# Status and device cards are built for the whole (paged) table at once:
+# classification with np.select, HTML with column-wise string concatenation,
+# and the result goes to the page as one st.markdown grid instead of one
+# element per bin. status_cards()/device_cards() return one HTML string per
+# bin, so the whole fleet can be built once per data update and each
+# session only joins the page it shows (cards_grid).
+CARDS_PER_PAGE = 60
+
+GRID_CSS = (
+    "<style>.card-grid { display: grid; grid-template-columns: repeat(3, minmax(0, 1fr)); "
+    "column-gap: 3rem; }</style>"
+)
+
+
+def _text(values):
+    return values.astype(str).map(html.escape)
+
+
+def _fill_text(values):
+    # 45.0 -> "45", 45.5 -> "45.5"
+    values = pd.to_numeric(values, errors="coerce").round(2)
+    text = values.astype(str).str.replace(r"\.0$", "", regex=True)
+    return text.where(values.notna(), "N/A")
+
+
+def _time_text(values):
+    return values.dt.strftime("%Y-%m-%d %H:%M:%S").fillna("N/A")
+
+
+# Card color per Fill_Rank (0 EMPTY, 1 MEDIUM, 2 FULL; see thresholds.classify)
+RANK_COLORS = np.array(["#33cc33", "#ffcc00", "#ff4d4d"], dtype=object)
+
+
+def cards_grid(cards):
+    if len(cards) == 0:
+        return ""
+    return GRID_CSS + '<div class="card-grid">' + "".join(cards) + "</div>"
+
+
+def status_cards(classified):
+    # classified: latest table with Fill_Status / Fill_Rank (thresholds.classify)
+    # and optionally Hours_To_Full (forecast.py), shown on bins not yet full
+    if classified.empty:
+        return pd.Series(dtype=object)
+    latest = classified
+    fill = latest["Fill_Level(%)"]
+    rank = latest["Fill_Rank"].to_numpy()
+    color = RANK_COLORS[rank]
+    # Medium bins show their level instead of a word
+    status_text = pd.Series(np.where(rank == 1, _fill_text(fill) + "%", latest["Fill_Status"]), index=latest.index)
+    eta = pd.Series("", index=latest.index)
+    if "Hours_To_Full" in latest.columns:
+        text = eta_text(latest["Hours_To_Full"]).set_axis(latest.index)
+        eta = ("<p>⏳ " + text + "</p>").where((text != "") & (rank < 2), "")
+
+    cards = (
+        '<div style="background-color:' + pd.Series(color, index=latest.index) + '; color:white; '
+        'border-radius:10px; padding:20px; text-align:center; margin-bottom:20px;">'
+        "<h3>" + _text(latest["Bin_ID"]) + "</h3>"
+        "<h2>" + status_text + "</h2>"
+        + eta +
+        "<p>" + _time_text(latest["Timestamp"]) + "</p>"
+        "</div>"
+    )
+    return cards
+
+
+def device_cards(devices):
+    # devices: latest table with Device_Status and optionally Silent_Hours
+    # (heartbeat.py), shown on bins that stopped reporting
+    if devices.empty:
+        return pd.Series(dtype=object)
+    status = devices["Device_Status"].astype(str)
+    status_class = status.str.lower().where(status.isin(["Online", "Maintenance"]), "offline")
+    battery = devices["Battery_Level(%)"] if "Battery_Level(%)" in devices.columns else pd.Series(np.nan, index=devices.index)
+    silent = pd.Series(np.nan, index=devices.index) if "Silent_Hours" not in devices.columns else devices["Silent_Hours"]
+    silent_text = ("📡 No reading for " + silent.round(1).astype(str) + "h").where(silent.notna(), "")
+
+    cards = (
+        '<div class="device-card">'
+        '<div style="display:flex; justify-content:space-between; align-items:center;">'
+        '<div class="device-header">' + _text(devices["Bin_ID"]) + "</div>"
+        '<span class="status ' + status_class + '">' + _text(status) + "</span>"
+        "</div>"
+        '<div class="device-sub">📍 ' + _text(devices["Location"]) + "</div>"
+        '<div style="margin-top:8px; color:black; font-size:18px;">'
+        "🔋 Battery: <b>" + _fill_text(battery) + "%</b>"
+        "</div>"
+        '<div style="margin-top:4px; color:black; font-size:14px;">'
+        "🕒 Last Updated: " + _time_text(devices["Timestamp"]) +
+        "</div>"
+        '<div style="margin-top:4px; color:#a80000; font-size:14px;">' + silent_text + "</div>"
+        "</div>"
+    )
+    return cards
+
+
+def alert_cards(alerts):
+    # alerts: Bin_ID, Fill (current level), Full_At (its threshold) and Opened columns
+    if alerts.empty:
+        return pd.Series(dtype=object)
+    return (
+        '<div class="alert-box">'
+        '<div class="alert-header">⚠️ ' + _text(alerts["Bin_ID"]) + " Alert!</div>"
+        "<div>Fill Level: <b>" + _fill_text(alerts["Fill"]) + "%</b> (exceeded " + _fill_text(alerts["Full_At"]) + "%)</div>"
+        '<div class="alert-time">⏰ since ' + _time_text(alerts["Opened"]) + "</div>"
+        "</div>"
+    )
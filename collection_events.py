@@ -0,0 +1,143 @@
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from column_store import NAT
+from forecast import EMPTY_DROP
+
+# --- Collection (emptying) events ---
+# A bin was emptied when its fill level drops by EMPTY_DROP points or more
+# between two consecutive readings. Detection runs on every ingest batch
+# and only needs each bin's previous reading (time and fill), kept in
+# memory and in the bin_state table so a restart does not rescan history.
+# Rows at or before a bin's previous reading are skipped, so replaying a
+# source is safe.
+#
+# Events go to a local SQLite table indexed by bin and by time; the count
+# of today's collections is kept in memory for the KPI boxes.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS collections (
+    id           INTEGER PRIMARY KEY,
+    bin_id       TEXT NOT NULL,
+    collected_at INTEGER NOT NULL,   -- ns since epoch (first reading after emptying)
+    fill_before  REAL,
+    fill_after   REAL
+);
+CREATE INDEX IF NOT EXISTS collections_bin ON collections (bin_id, collected_at);
+CREATE INDEX IF NOT EXISTS collections_time ON collections (collected_at);
+CREATE TABLE IF NOT EXISTS bin_state (
+    bin_id    TEXT PRIMARY KEY,
+    last_ts   INTEGER NOT NULL,
+    last_fill REAL
+);
+"""
+
+DAY_NS = 86_400 * 10**9
+
+
+class CollectionLog:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+        # Previous reading per bin: bin -> ts ns, bin -> fill
+        self.last_ts, self.last_fill = {}, {}
+        for bin_id, ts, fill in self.db.execute("SELECT bin_id, last_ts, last_fill FROM bin_state"):
+            self.last_ts[bin_id], self.last_fill[bin_id] = ts, fill
+        self.day = None
+        self.collected_today = 0
+        newest = max(self.last_ts.values(), default=None)
+        if newest is not None:
+            self._start_day(newest // DAY_NS * DAY_NS)
+
+    def _start_day(self, day):
+        self.day = day
+        self.collected_today = self.db.execute(
+            "SELECT COUNT(*) FROM collections WHERE collected_at >= ?", (day,)).fetchone()[0]
+
+    # --- Ingest ---
+    def detect(self, batch):
+        # Records the emptying events in batch and returns them
+        # (Bin_ID, Collected, Fill_Before, Fill_After)
+        empty = pd.DataFrame(columns=["Bin_ID", "Collected", "Fill_Before", "Fill_After"])
+        if batch.empty:
+            return empty
+        b = pd.DataFrame({
+            "bin": batch["Bin_ID"].astype(str).to_numpy(),
+            "ts": batch["Timestamp"].astype("datetime64[ns]").to_numpy().view("int64"),
+            "fill": pd.to_numeric(batch["Fill_Level(%)"], errors="coerce").to_numpy(dtype="float64"),
+        })
+        b = b[(b["ts"] != NAT) & b["fill"].notna()]
+
+        with self.lock:
+            seen = b["bin"].map(self.last_ts)
+            b = b[seen.isna() | (b["ts"] > seen)]
+            if b.empty:
+                return empty
+            b = b.sort_values(["bin", "ts"], kind="stable")
+            # Previous reading: the one before in this batch, else the stored one
+            prev = b.groupby("bin", sort=False)["fill"].shift()
+            first = b.groupby("bin", sort=False).cumcount().eq(0)
+            prev[first] = b.loc[first, "bin"].map(self.last_fill).astype("float64")
+            events = b.assign(before=prev)[(b["fill"] - prev) <= -EMPTY_DROP]
+
+            newest = b.groupby("bin", sort=False).tail(1)
+            with self.db:
+                self.db.executemany(
+                    "INSERT INTO collections (bin_id, collected_at, fill_before, fill_after) VALUES (?, ?, ?, ?)",
+                    zip(events["bin"], events["ts"].tolist(), events["before"].round(2).tolist(),
+                        events["fill"].round(2).tolist()))
+                self.db.executemany(
+                    "INSERT INTO bin_state (bin_id, last_ts, last_fill) VALUES (?, ?, ?) "
+                    "ON CONFLICT(bin_id) DO UPDATE SET last_ts = excluded.last_ts, last_fill = excluded.last_fill",
+                    zip(newest["bin"], newest["ts"].tolist(), newest["fill"].tolist()))
+            self.last_ts.update(zip(newest["bin"], newest["ts"].tolist()))
+            self.last_fill.update(zip(newest["bin"], newest["fill"].tolist()))
+
+            day = int(b["ts"].max()) // DAY_NS * DAY_NS
+            if self.day is None or day > self.day:
+                self._start_day(day)
+            else:
+                self.collected_today += int((events["ts"] >= self.day).sum())
+
+        return pd.DataFrame({
+            "Bin_ID": events["bin"].to_numpy(),
+            "Collected": events["ts"].to_numpy().view("datetime64[ns]"),
+            "Fill_Before": events["before"].round(2).to_numpy(),
+            "Fill_After": events["fill"].round(2).to_numpy(),
+        })
+
+    # --- Reads ---
+    def kpis(self):
+        # O(1): bins emptied on the latest day
+        with self.lock:
+            return {"collected_today": self.collected_today}
+
+    def stats(self, start=None, end=None, bins=None):
+        # Per bin within start <= time < end: number of collections, average
+        # fill when collected and average hours between collections
+        query = ("SELECT bin_id, COUNT(*), AVG(fill_before), MIN(collected_at), MAX(collected_at) "
+                 "FROM collections WHERE 1 = 1")
+        params = []
+        if start is not None:
+            query += " AND collected_at >= ?"
+            params.append(pd.Timestamp(start).as_unit("ns").value)
+        if end is not None:
+            query += " AND collected_at < ?"
+            params.append(pd.Timestamp(end).as_unit("ns").value)
+        if bins is not None:
+            bins = [str(b) for b in bins]
+            query += f" AND bin_id IN ({', '.join('?' * len(bins))})"
+            params.extend(bins)
+        query += " GROUP BY bin_id"
+        with self.lock:
+            rows = self.db.execute(query, params).fetchall()
+        df = pd.DataFrame(rows, columns=["Bin_ID", "collections", "fill_at_collection", "first", "last"])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            interval = (df["last"] - df["first"]) / (df["collections"] - 1) / 3.6e12
+        df["hours_between"] = interval.where(df["collections"] > 1)
+        return df.drop(columns=["first", "last"]).set_index("Bin_ID")
@@ -0,0 +1,262 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# --- Columnar on-disk store of normalized readings ---
+# Each column is one flat binary file that only ever grows. New batches are
+# appended with tofile(), and later runs memory-map the files instead of
+# parsing the CSV again:
+#   time columns     -> int64 (nanoseconds since epoch, NaT = int64 min)
+#   text columns     -> int32 codes into a dictionary kept in meta.json
+#   Lat / Lon        -> float64 (float32 would lose ~1 m of precision)
+#   other numbers    -> float32
+# A column's kind is fixed by the first batch that has it; a column that
+# first shows up in a later batch is added then, with its earlier rows
+# empty (NaT / NaN / no category). A column without a single value in
+# that batch (e.g. Status missing from every reading, read as all-NaN
+# floats) is text unless it is a known number column, so later strings
+# are not turned into NaN for good.
+#
+# Reads can be narrowed to a time range and a set of bins. meta.json keeps
+# the min/max of the index (time) column for every BLOCK_ROWS rows, so only
+# blocks overlapping the range are touched; while rows arrive in time order
+# the range is found by binary search instead. Bins are matched on their
+# int32 codes, and only the matching rows of the other columns are read.
+#
+# meta.json is saved after the column files are appended, so its row count
+# is what was fully written: on open, bytes past it (a crash in between)
+# are cut off before anything is appended after them.
+FLOAT64_COLUMNS = ("Lat", "Lon")
+FLOAT32_COLUMNS = ("Fill_Level(%)", "Battery_Level(%)")
+NAT = np.iinfo(np.int64).min
+BLOCK_ROWS = 65536
+
+
+def _kind_of(name, series):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "time", "int64"
+    if name in FLOAT64_COLUMNS:
+        return "float", "float64"
+    if name in FLOAT32_COLUMNS or pd.api.types.is_numeric_dtype(series) and series.notna().any():
+        return "float", "float32"
+    return "category", "int32"
+
+
+def _missing(kind, dtype, n):
+    # n empty values of a column (NaT / NaN / code -1)
+    if kind == "time":
+        return np.full(n, NAT, dtype="int64")
+    if kind == "float":
+        return np.full(n, np.nan, dtype=dtype)
+    return np.full(n, -1, dtype="int32")
+
+
+def _ns(value):
+    return None if value is None else pd.Timestamp(value).as_unit("ns").value
+
+
+class ColumnStore:
+    def __init__(self, path, index="Timestamp"):
+        self.path = path
+        self.index = index
+        self.meta_path = os.path.join(path, "meta.json")
+        os.makedirs(path, exist_ok=True)
+
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path) as f:
+                self.meta = json.load(f)
+        else:
+            # columns: [name, kind, dtype, file name]
+            self.meta = {"rows": 0, "columns": [], "categories": {}}
+        self._truncate_to_rows()
+        if "blocks" not in self.meta:
+            self._build_blocks()
+        self._codes = {
+            name: {value: code for code, value in enumerate(values)}
+            for name, values in self.meta["categories"].items()
+        }
+
+    @property
+    def rows(self):
+        return self.meta["rows"]
+
+    @property
+    def columns(self):
+        return [c[0] for c in self.meta["columns"]]
+
+    def _truncate_to_rows(self):
+        for name, kind, dtype, fname in self.meta["columns"]:
+            path = os.path.join(self.path, fname)
+            size = self.rows * np.dtype(dtype).itemsize
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+    def _save_meta(self):
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, self.meta_path)
+
+    # --- Block index (min/max of the index column per BLOCK_ROWS rows) ---
+    def _build_blocks(self):
+        self.meta["blocks"] = []
+        self.meta["sorted"] = True
+        if self.rows and self.index in self.columns:
+            self._index_rows(self.array(self.index), 0)
+
+    def _index_rows(self, times, first_row):
+        # times: int64 index values of rows first_row.. just written
+        blocks = self.meta["blocks"]
+        valid = times[times != NAT]
+        if len(valid) < len(times):
+            self.meta["sorted"] = False  # NaT rows would break the binary search
+        elif len(valid):
+            last_max = max((b[1] for b in blocks), default=NAT)
+            if valid[0] < last_max or (np.diff(valid) < 0).any():
+                self.meta["sorted"] = False
+        pos = 0
+        while pos < len(times):
+            block = (first_row + pos) // BLOCK_ROWS
+            take = min(len(times) - pos, (block + 1) * BLOCK_ROWS - first_row - pos)
+            chunk = times[pos:pos + take]
+            chunk = chunk[chunk != NAT]
+            if block == len(blocks):
+                blocks.append([NAT, NAT])
+            if len(chunk):
+                lo, hi = int(chunk.min()), int(chunk.max())
+                b = blocks[block]
+                b[0] = lo if b[0] == NAT else min(b[0], lo)
+                b[1] = hi if b[1] == NAT else max(b[1], hi)
+            pos += take
+
+    def _row_ranges(self, start, end):
+        # Row ranges that may hold index values in [start, end)
+        if start is None and end is None or self.index not in self.columns:
+            return [(0, self.rows)]
+        if self.meta["sorted"]:
+            times = self.array(self.index)
+            lo = 0 if start is None else int(np.searchsorted(times, start))
+            hi = self.rows if end is None else int(np.searchsorted(times, end))
+            return [(lo, hi)] if lo < hi else []
+        ranges = []
+        for i, (bmin, bmax) in enumerate(self.meta["blocks"]):
+            if bmin == NAT or (start is not None and bmax < start) or (end is not None and bmin >= end):
+                continue
+            lo, hi = i * BLOCK_ROWS, min((i + 1) * BLOCK_ROWS, self.rows)
+            if ranges and ranges[-1][1] == lo:
+                ranges[-1] = (ranges[-1][0], hi)  # merge neighbouring blocks
+            else:
+                ranges.append((lo, hi))
+        return ranges
+
+    # --- Writing ---
+    def _encode(self, name, kind, dtype, values):
+        if kind == "time":
+            ts = pd.to_datetime(values, errors="coerce").astype("datetime64[ns]")
+            return ts.to_numpy().view("int64")
+        if kind == "float":
+            return pd.to_numeric(values, errors="coerce").to_numpy(dtype=dtype, na_value=np.nan)
+
+        # Text: look codes up in the dictionary, adding unseen values
+        codes = self._codes.setdefault(name, {})
+        categories = self.meta["categories"].setdefault(name, [])
+        keys = values.dropna().astype(str)
+        for value in keys.unique():
+            if value not in codes:
+                codes[value] = len(categories)
+                categories.append(value)
+        out = np.full(len(values), -1, dtype="int32")
+        out[values.notna().to_numpy()] = keys.map(codes).to_numpy(dtype="int32")
+        return out
+
+    def _add_column(self, name, series):
+        # New column: its rows so far are written as empty values
+        kind, dtype = _kind_of(name, series)
+        fname = f"c{len(self.meta['columns'])}.bin"
+        self.meta["columns"].append([name, kind, dtype, fname])
+        with open(os.path.join(self.path, fname), "wb") as f:
+            _missing(kind, dtype, self.rows).tofile(f)
+
+    def append(self, df):
+        if df.empty:
+            return
+        known = set(self.columns)
+        for name in df.columns:
+            if name not in known:
+                self._add_column(name, df[name])
+
+        n = len(df)
+        first_row = self.rows
+        for name, kind, dtype, fname in self.meta["columns"]:
+            if name in df.columns:
+                arr = self._encode(name, kind, dtype, df[name])
+            else:
+                arr = _missing(kind, dtype, n)
+            with open(os.path.join(self.path, fname), "ab") as f:
+                arr.tofile(f)
+            if name == self.index:
+                self._index_rows(arr, first_row)
+
+        self.meta["rows"] += n
+        self._save_meta()
+
+    # --- Reading (memory-mapped, nothing is parsed) ---
+    def array(self, name):
+        for col, kind, dtype, fname in self.meta["columns"]:
+            if col == name:
+                if self.rows == 0:
+                    return np.empty(0, dtype=dtype)
+                return np.memmap(os.path.join(self.path, fname), dtype=dtype, mode="r", shape=(self.rows,))
+        raise KeyError(name)
+
+    def _decode(self, name, kind, arr):
+        if kind == "time":
+            return pd.Series(arr.view("datetime64[ns]"), name=name)
+        if kind == "category":
+            return pd.Series(pd.Categorical.from_codes(arr, categories=self.meta["categories"].get(name, [])), name=name)
+        return pd.Series(arr, name=name, copy=False)
+
+    def to_frame(self, columns=None):
+        data = {}
+        for name, kind, dtype, fname in self.meta["columns"]:
+            if columns is None or name in columns:
+                data[name] = self._decode(name, kind, self.array(name))
+        return pd.DataFrame(data, copy=False)
+
+    def query(self, start=None, end=None, bins=None, columns=None, bin_column="Bin_ID"):
+        # Rows with start <= index < end whose bin_column is in bins (None = no limit).
+        # Only the blocks overlapping the range are read.
+        start, end = _ns(start), _ns(end)
+        wanted = [c for c in self.meta["columns"] if columns is None or c[0] in columns]
+        if bins is not None:
+            codes = self._codes.get(bin_column, {})
+            bin_codes = np.array([codes[b] for b in map(str, bins) if b in codes], dtype="int32")
+
+        parts = {name: [] for name, *_ in wanted}
+        for lo, hi in self._row_ranges(start, end):
+            mask = None
+            if start is not None or end is not None:
+                times = self.array(self.index)[lo:hi]
+                mask = times != NAT
+                if start is not None:
+                    mask &= times >= start
+                if end is not None:
+                    mask &= times < end
+            if bins is not None:
+                in_bins = np.isin(self.array(bin_column)[lo:hi], bin_codes)
+                mask = in_bins if mask is None else mask & in_bins
+            rows = np.arange(lo, hi) if mask is None else lo + np.flatnonzero(mask)
+            if not len(rows):
+                continue
+            for name, kind, dtype, fname in wanted:
+                arr = self.array(name)
+                parts[name].append(np.array(arr[lo:hi]) if mask is None else arr[rows])
+
+        data = {}
+        for name, kind, dtype, fname in wanted:
+            arr = np.concatenate(parts[name]) if parts[name] else np.empty(0, dtype=dtype)
+            data[name] = self._decode(name, kind, arr)
+        return pd.DataFrame(data, copy=False)
@@ -0,0 +1,634 @@
+import hashlib
+import io
+import itertools
+import json
+import os
+import shutil
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import schema
+from alerts import AlertEngine
+from bin_registry import BinRegistry
+from collection_events import CollectionLog
+from fleet_state import FleetState
+from forecast import FillForecast
+from heartbeat import HeartbeatTracker
+from ingest_server import LOCAL_LOG  # append-only log the bins post readings to
+from partitioned_store import PartitionedStore
+from quality import QualityFilter
+from rollups import Rollups
+from thresholds import ThresholdConfig, classify
+
+# --- Google Sheet sources (published to web as CSV) ---
+DUMMY_URL = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQimwz3tpdodtv2xLKVIx5fVDx1SXaUGzfK6grHmYQSK-ug7Xe0qJsXQct6vyee50l5_AqBxug44E1-/pub?gid=628102932&single=true&output=csv"
+REALTIME_URL = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQAiujqFGFtpOsWWhbfZ5mKoY2EpbNTTfjYIDOZaHA8SIGxBecHXmC6FXvQ-swgz3iG9FXNSBdC-WOY/pub?output=csv"
+
+# --- Local data ---
+# In "tail" mode a source is only read from where the last poll stopped
+# (see TailReader below); "full" re-reads the whole source every time.
+INGEST_MODE = os.environ.get("INGEST_MODE", "tail")   # "tail" or "full"
+STORE_DIR = os.environ.get("STORE_DIR", ".swd_store")
+
+# Values derived from one snapshot (cards, pivots, ...) kept per snapshot;
+# the least recently used go first (Report ranges would pile up otherwise).
+DERIVED_CACHE_SIZE = 32
+
+# Days of raw readings kept in the local store (0 = keep everything).
+# Older days are dropped as whole partitions; rollups keep their aggregates.
+RETENTION_DAYS = int(os.environ.get("RETENTION_DAYS", 0))
+
+# Per-bin / per-zone fill thresholds (see thresholds.py). Missing file = defaults;
+# kept with the rest of the local state, as the dashboard can edit it.
+THRESHOLDS_FILE = os.environ.get("THRESHOLDS_FILE", os.path.join(STORE_DIR, "thresholds.json"))
+
+# Readings the fill-rate forecast learns from, counted back from the newest
+# of each batch (see forecast.py): on start, and when one poll brings in a
+# long stretch of history, in either ingest mode
+FORECAST_REPLAY = pd.Timedelta(hours=24)
+
+# Hand-edited list of bins (id, position, zone, location name, install date),
+# imported into the bin registry on start (see bin_registry.py).
+BINS_FILE = os.environ.get("BINS_FILE", "bins.csv")
+
+# Where the "Real-time Data" pages read from. Any CSV url or path works:
+# the Google Sheet by default, or LOCAL_LOG to use the local ingestion service.
+REALTIME_SOURCE = os.environ.get("REALTIME_SOURCE", REALTIME_URL)
+
+# How long (seconds) a downloaded sheet is served before it is refreshed.
+# Override with the CACHE_TTL environment variable.
+CACHE_TTL = float(os.environ.get("CACHE_TTL", 60))
+
+# --- Process-wide cache (shared by every page and every browser session) ---
+# Streamlit re-runs fypcoding.py on each interaction, but imported modules
+# stay loaded, so these live for the whole server process. Each url maps to
+# one Snapshot; a refresh that brings new readings builds a new Snapshot
+# and swaps it in under _lock, so every session reads the same objects.
+# A Snapshot pins its version, latest readings and (in "full" mode) its
+# history frame. The engines it hands out are not copies: they are the
+# source's live state, updated in place by later refreshes, and are only
+# read through their own methods, which take the engine's lock.
+_cache = {}          # url -> Snapshot
+_fetched_at = {}     # url -> time of the last download attempt
+_refreshing = set()  # urls with a background refresh in flight
+_url_locks = {}      # url -> lock held while that url is being downloaded
+_versions = itertools.count(1)  # snapshot versions, unique for the process
+_lock = threading.Lock()
+
+
+def sort_bins(df):
+    # Bins in natural order: Bin_2 before Bin_10, bins without a number last
+    number = pd.to_numeric(df["Bin_ID"].astype(str).str.extract(r"(\d+)", expand=False), errors="coerce")
+    order = np.lexsort((df["Bin_ID"].astype(str).to_numpy(), number.fillna(np.inf).to_numpy()))
+    return df.iloc[order].reset_index(drop=True)
+
+
+class Snapshot:
+    # The readings of one url at one version, and the live engines of that
+    # url. Shared by every session, so treat its frames as read-only: use
+    # df.assign(...) instead of df[col] = ... on them. Engines may already
+    # reflect newer readings than `latest` (a refresh updates them before
+    # it swaps in the next snapshot), and the heartbeat also moves on
+    # between snapshots: derive keys that read one include its version.
+    def __init__(self, version, history, latest, rollups, alerts, forecast, collections, quality, heartbeat):
+        self.version = version
+        self.history = history   # DataFrame; in "tail" mode the live PartitionedStore (query() locks)
+        self.latest = latest      # one row per bin, in natural bin order
+        self.rollups = rollups    # Rollups (live; full mode builds one per snapshot)
+        self.alerts = alerts      # AlertEngine of the source (live counters)
+        self.forecast = forecast  # FillForecast of the source (running fill rates)
+        self.collections = collections  # CollectionLog of the source (emptying events)
+        self.quality = quality    # QualityFilter of the source (what ingest dropped / flagged)
+        self.heartbeat = heartbeat  # HeartbeatTracker of the source (silent / offline devices)
+        self._derived = OrderedDict()   # key -> value, least recently used first
+        self._pending = {}              # key -> lock held while it is being computed
+        self._derive_lock = threading.Lock()
+
+    def derive(self, key, fn):
+        # fn(snapshot) computed once per snapshot and shared by all sessions.
+        # fn runs under a lock of its own key only, so it may derive other
+        # keys, and a slow one does not hold up the rest.
+        with self._derive_lock:
+            if key in self._derived:
+                self._derived.move_to_end(key)
+                return self._derived[key]
+            key_lock = self._pending.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._derive_lock:
+                if key in self._derived:   # computed while we waited
+                    self._derived.move_to_end(key)
+                    return self._derived[key]
+            try:
+                value = fn(self)
+            except BaseException:
+                with self._derive_lock:
+                    self._pending.pop(key, None)
+                raise
+            with self._derive_lock:
+                self._derived[key] = value
+                self._pending.pop(key, None)
+                while len(self._derived) > DERIVED_CACHE_SIZE:
+                    self._derived.popitem(last=False)
+        return value
+
+
+def _fetch(url):
+    # Returns (history, latest reading per bin, hourly/daily rollups, alerts,
+    # forecast, collections, quality, heartbeat).
+    # In "tail" mode history is the reader's PartitionedStore, not a frame.
+    if INGEST_MODE == "tail":
+        reader = get_reader(url)
+        reader.poll()
+        return (reader.store, reader.latest.snapshot(), reader.rollups, reader.alerts, reader.forecast,
+                reader.collections, reader.quality, reader.heartbeat)
+    alerts = get_alert_engine(url)
+    collections = get_collection_log(url)
+    raw = pd.read_csv(url)
+    quality, heartbeat, forecast, df = _ingest_new(url, raw)
+    latest = FleetState()
+    latest.update(df)
+    rollups = Rollups(get_thresholds())
+    rollups.update(df)
+    alerts.evaluate(df)  # rows it has already seen are skipped
+    alerts.resolve(collections.detect(df))  # same here
+    return df, latest.snapshot(), rollups, alerts, forecast, collections, quality, heartbeat
+
+
+def _ingest_new(url, raw):
+    # "full" mode: one quality filter, heartbeat tracker and forecast per
+    # url, fed only the rows added since the last download (the sheet is
+    # append-only; if it shrank, start over). Returns the three and every
+    # row accepted so far.
+    quality, heartbeat, forecast, seen, accepted = _full_state.get(url, (None, None, None, 0, None))
+    if quality is None or len(raw) < seen:
+        quality, heartbeat, forecast, seen, accepted = QualityFilter(), HeartbeatTracker(), FillForecast(), 0, None
+    rows = normalize(raw.iloc[seen:], url)
+    heartbeat.update(rows)   # any reading is a heartbeat, even one the quality stage drops
+    new_rows = quality.filter(rows, raw_rows=len(raw) - seen)
+    forecast.update(_forecast_window(new_rows))
+    accepted = _append_rows(accepted, new_rows)
+    _full_state[url] = (quality, heartbeat, forecast, len(raw), accepted)
+    return quality, heartbeat, forecast, accepted
+
+
+def _forecast_window(rows):
+    # The rows within FORECAST_REPLAY of the newest one
+    if rows.empty:
+        return rows
+    return rows[rows["Timestamp"] >= rows["Timestamp"].max() - FORECAST_REPLAY]
+
+
+def _append_rows(history, rows):
+    # history + rows with Bin_ID kept categorical, as in the tail store: new
+    # bins are added to the categories, so the codes already there stay
+    bins = rows["Bin_ID"].astype(str)
+    if history is None:
+        return rows.assign(Bin_ID=bins.astype("category"))
+    categories = history["Bin_ID"].cat.categories
+    extra = pd.Index(bins.unique()).difference(categories)
+    if len(extra):
+        categories = categories.append(extra)
+        history = history.assign(Bin_ID=history["Bin_ID"].cat.set_categories(categories))
+    rows = rows.assign(Bin_ID=pd.Categorical(bins, categories=categories))
+    return pd.concat([history, rows], ignore_index=True)
+
+
+def _url_lock(url):
+    with _lock:
+        return _url_locks.setdefault(url, threading.Lock())
+
+
+def _store(url, data):
+    # Called with _lock held. Only new readings make a new snapshot.
+    history, latest, rollups, alerts, forecast, collections, quality, heartbeat = data
+    latest = sort_bins(latest) if not latest.empty else latest
+    old = _cache.get(url)
+    if (old is None or not isinstance(history, PartitionedStore) and len(old.history) != len(history)
+            or not old.latest.equals(latest)):
+        _cache[url] = Snapshot(next(_versions), history, latest, rollups, alerts, forecast, collections, quality,
+                               heartbeat)
+    _fetched_at[url] = time.time()
+
+
+def _refresh(url):
+    with _url_lock(url):
+        try:
+            data = _fetch(url)
+        except Exception:
+            # Keep serving the old copy and try again after another TTL
+            data = None
+        with _lock:
+            if data is not None:
+                _store(url, data)
+            elif url in _cache:
+                _fetched_at[url] = time.time()
+            _refreshing.discard(url)
+
+
+def snapshot(url, ttl=None):
+    # Current Snapshot of url (downloaded on first use, refreshed after ttl)
+    ttl = CACHE_TTL if ttl is None else ttl
+
+    with _lock:
+        if url in _pollers:
+            ttl = float("inf")  # the background poller keeps this url fresh
+        entry = _cache.get(url)
+        if entry is not None:
+            # Stale: hand back the old data now, refresh in the background
+            if time.time() - _fetched_at[url] >= ttl and url not in _refreshing:
+                _refreshing.add(url)
+                threading.Thread(target=_refresh, args=(url,), daemon=True).start()
+            return entry
+
+    # Nothing cached yet: only one caller downloads, the others wait for it
+    with _url_lock(url):
+        with _lock:
+            entry = _cache.get(url)
+        if entry is None:
+            data = _fetch(url)
+            with _lock:
+                _store(url, data)
+                entry = _cache[url]
+    return entry
+
+
+def load_readings(url, ttl=None, start=None, end=None, bins=None):
+    # Reading history, normalized (see normalize()), limited to
+    # start <= Timestamp < end and to the given bins (None = no limit).
+    # In "tail" mode the limits are pushed down to the local store, so only
+    # the matching partitions and blocks are read. Returns a new frame the
+    # page is free to modify.
+    history = snapshot(url, ttl).history
+    if isinstance(history, PartitionedStore):
+        return history.query(start, end, bins)
+    return filter_readings(history, start, end, bins).copy()
+
+
+def filter_readings(df, start=None, end=None, bins=None):
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= df["Timestamp"] >= pd.Timestamp(start)
+    if end is not None:
+        mask &= df["Timestamp"] < pd.Timestamp(end)
+    if bins is not None:
+        mask &= df["Bin_ID"].astype(str).isin([str(b) for b in bins])
+    return df[mask]
+
+
+def classified_latest(snap):
+    # snap.latest with each bin's registry entry (Lat/Lon, Zone, Location,
+    # Installed), its thresholds, Fill_Status / Fill_Rank and its forecast
+    # (Fill_Rate, Hours_To_Full, Full_By; see forecast.py). Computed once
+    # per snapshot, threshold and registry version, so changing a threshold
+    # costs one reclassification, not a reload.
+    config = get_thresholds()
+    registry = get_bin_registry()
+    snap.derive("registered", lambda s: registry.register_missing(s.latest))  # once per snapshot
+
+    def build(s):
+        if s.latest.empty:
+            return classify(s.latest, config)
+        info = registry.lookup(s.latest["Bin_ID"]).set_index(s.latest.index)
+        for col in ("Lat", "Lon"):
+            if col in s.latest.columns:
+                # Registry position first, the bin's own report otherwise
+                info[col] = info[col].fillna(s.latest[col])
+        latest = s.latest.drop(columns=[c for c in info.columns if c in s.latest.columns]).join(info)
+        latest = classify(latest, config, zones=latest["Zone"])
+        eta = s.forecast.predict(latest["Bin_ID"], latest["Full_At"]).set_index(latest.index)
+        return latest.join(eta)
+
+    return snap.derive(("classified", config.version, registry.version), build)
+
+
+def data_version(url):
+    # Changes whenever new readings for url arrive or one of its bins goes
+    # silent; pages compare it with the version they last rendered to know
+    # when to rerun.
+    with _lock:
+        entry = _cache.get(url)
+        return -1 if entry is None else (entry.version, entry.heartbeat.version)
+
+
+# --- Incremental ("tail") ingestion ---
+# In "tail" mode a source is only read from where the last poll stopped.
+# Rows already seen are kept in a local columnar store partitioned by day
+# and bin (STORE_DIR, see partitioned_store.py), so a restart neither
+# re-downloads nor re-parses history.
+
+_readers = {}  # url -> TailReader
+_alert_engines = {}  # url -> AlertEngine
+_collection_logs = {}  # url -> CollectionLog
+_full_state = {}  # url -> (QualityFilter, HeartbeatTracker, FillForecast, raw rows already read, accepted rows); "full" mode
+_pollers = {}  # url -> Poller
+_schemas = None  # SchemaRegistry, created on first use
+_thresholds = None  # ThresholdConfig, loaded on first use
+_registry = None  # BinRegistry, opened on first use
+
+
+def _store_name(source):
+    return hashlib.sha1(source.encode()).hexdigest()[:16]
+
+
+def get_schema_registry():
+    global _schemas
+    with _lock:
+        if _schemas is None:
+            _schemas = schema.SchemaRegistry(os.path.join(STORE_DIR, "schemas.json"))
+        return _schemas
+
+
+def get_thresholds():
+    global _thresholds
+    registry = get_bin_registry()   # takes _lock itself
+    with _lock:
+        if _thresholds is None:
+            _thresholds = ThresholdConfig(THRESHOLDS_FILE, registry)
+        return _thresholds
+
+
+def get_bin_registry():
+    global _registry
+    with _lock:
+        if _registry is None:
+            os.makedirs(STORE_DIR, exist_ok=True)
+            _registry = BinRegistry(os.path.join(STORE_DIR, "bins.sqlite"), BINS_FILE)
+        return _registry
+
+
+def normalize(df, source):
+    # Canonical column names and types shared by every page:
+    # Timestamp (datetime), Bin_ID, Fill_Level(%) and Battery_Level(%) (float32).
+    # Columns and datetime format come from the source's stored schema.
+    return schema.apply(get_schema_registry().resolve(source, df), df)
+
+
+def _held_to_state(rows):
+    # Held suspects as JSON-able columns (times as ns since epoch)
+    if rows.empty:
+        return None
+    rows = rows.assign(Timestamp=rows["Timestamp"].astype("datetime64[ns]").astype("int64"))
+    return {col: rows[col].astype(object).where(rows[col].notna(), None).tolist() for col in rows.columns}
+
+
+def _held_from_state(columns):
+    if not columns:
+        return pd.DataFrame()
+    rows = pd.DataFrame(columns)
+    rows["Timestamp"] = pd.to_datetime(rows["Timestamp"], unit="ns")
+    for col in ("Fill_Level(%)", "Battery_Level(%)"):
+        if col in rows.columns:
+            rows[col] = pd.to_numeric(rows[col], errors="coerce").astype("float32")
+    return rows
+
+
+class TailReader:
+    def __init__(self, source, store_dir=None, alerts=None, thresholds=None, collections=None):
+        self.source = source
+        store_dir = store_dir or STORE_DIR
+        os.makedirs(store_dir, exist_ok=True)
+        name = _store_name(source)
+        self.store_path = os.path.join(store_dir, name)
+        self.state_path = os.path.join(store_dir, name + ".json")
+        self.lock = threading.Lock()
+        self.thresholds = thresholds
+        self.alerts = alerts or AlertEngine(os.path.join(store_dir, name + ".alerts.sqlite"), thresholds)
+        self.collections = collections or CollectionLog(os.path.join(store_dir, name + ".collections.sqlite"))
+        self.rollups_path = os.path.join(store_dir, name + ".rollups.sqlite")
+        self._load_store()
+
+    # --- Local store ---
+    def _load_store(self):
+        self.offset = 0        # bytes of the source already consumed
+        self.rows = 0          # data rows already consumed
+        self.etag = None
+        self.header = None
+        self.latest = FleetState()
+        self.rollups = Rollups(self.thresholds, self.rollups_path)
+        self.forecast = FillForecast()
+        self.quality = QualityFilter()
+        self.heartbeat = HeartbeatTracker()
+        self.housekeeping_day = None
+        held = pd.DataFrame()
+
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                state = json.load(f)
+            self.offset = state["offset"]
+            self.rows = state["rows"]
+            self.etag = state.get("etag")
+            self.header = state.get("header")
+            held = _held_from_state(state.get("held"))
+        self.store = PartitionedStore(self.store_path)
+        last_rows = self.store.latest_rows()
+        self.latest.update(last_rows)
+        seed_rollups = not self.rollups.last  # store older than its rollups
+        seed_alerts = not self.alerts.last_ts  # ... or its alert history
+        seed_collections = not self.collections.last_ts  # ... or its collection log
+        for day in self.store.iter_days() if seed_rollups or seed_alerts or seed_collections else ():
+            if seed_rollups:
+                self.rollups.update(day)
+            if seed_alerts:
+                self.alerts.evaluate(day)
+            if seed_collections:
+                events = self.collections.detect(day)
+                if seed_alerts:
+                    self.alerts.resolve(events)
+        if not last_rows.empty:
+            # Fill rates, the quality filter's windows and reporting intervals
+            # only need the recent readings
+            newest = last_rows["Timestamp"].max()
+            recent = self.store.query(start=newest - FORECAST_REPLAY)
+            self.forecast.update(recent)
+            self.quality.filter(recent, count=False)
+            self.quality.filter(last_rows, count=False)  # bins quiet for longer than that
+            self.heartbeat.update(recent)
+            self.heartbeat.update(last_rows)
+        # Suspects read before the restart, still waiting for their next reading
+        self.quality.hold(held)
+
+    def _save_state(self):
+        with open(self.state_path, "w") as f:
+            json.dump({"offset": self.offset, "rows": self.rows,
+                       "etag": self.etag, "header": self.header,
+                       "held": _held_to_state(self.quality.held_rows())}, f)
+
+    def _reset(self):
+        shutil.rmtree(self.store_path, ignore_errors=True)
+        get_schema_registry().forget(self.source)
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+        self._load_store()
+
+    # --- Reading only the new part of the source ---
+    def _read_local(self):
+        path = self.source[len("file://"):] if self.source.startswith("file://") else self.source
+        if os.path.getsize(path) < self.offset:
+            return None  # file was truncated / replaced
+        with open(path, "rb") as f:
+            f.seek(self.offset)
+            return f.read(), True
+
+    def _read_http(self):
+        req = urllib.request.Request(self.source)
+        if self.offset:
+            req.add_header("Range", f"bytes={self.offset}-")
+        if self.etag:
+            req.add_header("If-None-Match", self.etag)
+        try:
+            with urllib.request.urlopen(req, timeout=30) as resp:
+                body = resp.read()
+                self.etag = resp.headers.get("ETag", self.etag)
+                # 206 = server honoured the range, 200 = full sheet (Google Sheets)
+                return body, resp.status == 206
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return b"", True
+            if e.code == 416:  # range starts past the end: nothing new
+                return b"", True
+            raise
+
+    def _read(self):
+        if "://" in self.source and not self.source.startswith("file://"):
+            return self._read_http()
+        return self._read_local()
+
+    def poll(self):
+        # Returns the rows that were not seen before (and appends them to history)
+        with self.lock:
+            result = self._read()
+            if result is None:
+                self._reset()
+                result = self._read()
+            return self._consume(*result)
+
+    def _consume(self, body, is_tail):
+        if not is_tail:
+            # Full body: skip the rows we already have (row offset)
+            lines = body.splitlines(keepends=True)
+            if len(lines) - 1 < self.rows:
+                self._reset()  # sheet shrank: rows were deleted, start over
+                lines = body.splitlines(keepends=True)
+            if lines and self.header is None:
+                self.header = lines[0].decode("utf-8-sig").strip()
+            chunk = b"".join(lines[1 + self.rows:])
+            self.offset = len(body)
+        else:
+            # Only complete lines; a partial last line is read again next poll
+            end = body.rfind(b"\n") + 1
+            chunk = body[:end]
+            self.offset += end
+            if self.header is None and chunk:
+                first, _, chunk = chunk.partition(b"\n")
+                self.header = first.decode("utf-8-sig").strip()
+
+        if not chunk.strip():
+            self._save_state()
+            return pd.DataFrame()
+
+        raw = pd.read_csv(io.StringIO(self.header + "\n" + chunk.decode("utf-8")))
+        self.rows += len(raw)
+        rows = normalize(raw, self.source)
+        # Any reading is a heartbeat, even one the quality stage drops
+        self.heartbeat.update(rows)
+        # Drops duplicates, late rows and spikes, flags gaps (see quality.py)
+        new_rows = self.quality.filter(rows, raw_rows=len(raw))
+
+        if not new_rows.empty:
+            self.store.append(new_rows)
+            self.latest.update(new_rows)
+            self.rollups.update(new_rows)
+            self.alerts.evaluate(new_rows)
+            self.alerts.resolve(self.collections.detect(new_rows))
+            self.forecast.update(_forecast_window(new_rows))
+            self._housekeeping(new_rows["Timestamp"].max().floor("D"))
+        self._save_state()
+        return new_rows
+
+    def _housekeeping(self, today):
+        # Once per new day: tidy up the days that closed, apply retention
+        if today == self.housekeeping_day:
+            return
+        self.housekeeping_day = today
+        self.store.compact(before=today)
+        if RETENTION_DAYS:
+            self.store.drop_before(today - pd.Timedelta(days=RETENTION_DAYS))
+
+
+def get_alert_engine(url):
+    thresholds = get_thresholds()
+    with _lock:
+        if url not in _alert_engines:
+            os.makedirs(STORE_DIR, exist_ok=True)
+            _alert_engines[url] = AlertEngine(os.path.join(STORE_DIR, _store_name(url) + ".alerts.sqlite"), thresholds)
+        return _alert_engines[url]
+
+
+def get_collection_log(url):
+    with _lock:
+        if url not in _collection_logs:
+            os.makedirs(STORE_DIR, exist_ok=True)
+            _collection_logs[url] = CollectionLog(os.path.join(STORE_DIR, _store_name(url) + ".collections.sqlite"))
+        return _collection_logs[url]
+
+
+def get_reader(url):
+    # Getters that take _lock themselves are called before it is held
+    alerts = get_alert_engine(url)
+    collections = get_collection_log(url)
+    thresholds = get_thresholds()
+    with _lock:
+        reader = _readers.get(url)
+    if reader is None:
+        # Opening the store can take a while: only this url waits for it
+        # (callers hold its _url_lock), not every other source
+        reader = TailReader(url, alerts=alerts, thresholds=thresholds, collections=collections)
+        with _lock:
+            reader = _readers.setdefault(url, reader)
+    return reader
+
+
+# --- Background polling ---
+# One thread per source for the whole process: it refreshes the cache on a
+# schedule, so page renders never wait on the network and N open sessions
+# do not mean N downloads.
+POLL_INTERVAL = float(os.environ.get("POLL_INTERVAL", 15))
+
+
+class Poller(threading.Thread):
+    def __init__(self, url, interval):
+        super().__init__(name=f"poller-{_store_name(url)}", daemon=True)
+        self.url = url
+        self.interval = interval
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while True:
+            _refresh(self.url)
+            # A live source: bins go silent with wall time, even when the
+            # whole source stops sending (see heartbeat.py)
+            with _lock:
+                entry = _cache.get(self.url)
+            if entry is not None:
+                entry.heartbeat.advance(pd.Timestamp.now())
+            if self.stop_event.wait(self.interval):
+                break
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def start_poller(url, interval=None):
+    with _lock:
+        poller = _pollers.get(url)
+        if poller is None:
+            poller = Poller(url, POLL_INTERVAL if interval is None else interval)
+            _pollers[url] = poller
+            poller.start()
+        return poller
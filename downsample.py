@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+# --- Chart downsampling ---
+# Charts never need more points than there are pixels, so every series is
+# cut down to at most MAX_POINTS before it is sent to the browser:
+#   time buckets  - average per bucket; bucket width picked from the range
+#                   shown, so all bins share the same time axis
+#   LTTB          - "largest triangle three buckets", keeps the real
+#                   readings that best preserve the shape (peaks, emptying)
+MAX_POINTS = 2000
+
+# Bucket widths to choose from, smallest first
+BUCKETS = ["1min", "5min", "15min", "30min", "1h", "3h", "6h", "12h", "1D", "7D", "30D"]
+
+
+def bucket_for(start, end, max_points=MAX_POINTS):
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    for freq in BUCKETS:
+        if span / pd.Timedelta(freq) < max_points:
+            return freq
+    return BUCKETS[-1]
+
+
+def bucketed_pivot(df, time_col, bin_col, value_col, max_points=MAX_POINTS, start=None, end=None):
+    # Like pivot_table(index=time, columns=bin, aggfunc="mean"), but on
+    # time buckets so there are at most max_points rows. Returns (pivot, bucket)
+    # with bucket None when the raw timestamps already fit.
+    if df.empty:
+        return pd.DataFrame(), None
+    if df[time_col].nunique() <= max_points:
+        freq, times = None, df[time_col]
+    else:
+        start = df[time_col].min() if start is None else start
+        end = df[time_col].max() if end is None else end
+        freq = bucket_for(start, end, max_points)
+        times = df[time_col].dt.floor(freq)
+    pivot = (
+        df.groupby([times, bin_col], observed=True)[value_col]
+        .mean()
+        .unstack(bin_col)
+        .sort_index()
+    )
+    pivot.columns = pivot.columns.astype(str)
+    return pivot, freq
+
+
+def lttb(x, y, n_out):
+    # Indices of the n_out points picked by Largest-Triangle-Three-Buckets
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    every = (n - 2) / (n_out - 2)
+    picked = np.empty(n_out, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        # Average of the next bucket is the third corner of the triangle
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        picked[i + 1] = a
+    return picked
+
+
+def downsample(df, time_col, value_col, max_points=MAX_POINTS, method="lttb"):
+    # One series (already sorted by time) cut to at most max_points rows
+    df = df.dropna(subset=[time_col, value_col])
+    if len(df) <= max_points:
+        return df
+    if method == "lttb":
+        x = df[time_col].to_numpy().astype("datetime64[ns]").view("int64")
+        return df.iloc[lttb(x, df[value_col].to_numpy(), max_points)]
+    freq = bucket_for(df[time_col].min(), df[time_col].max(), max_points)
+    return (
+        df.groupby(df[time_col].dt.floor(freq))[value_col]
+        .mean()
+        .rename_axis(time_col)
+        .reset_index()
+    )
@@ -0,0 +1,91 @@
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# --- Synthetic bin-fleet history ---
+# Writes readings in the same layout as the Google Sheets, one row per bin
+# per reading:
+#   Bin_ID, Timestamp, Fill_Level(%), Battery_Level(%), Lat, Lon, Status
+# Bins fill at their own rate (with bursts), get emptied some time after
+# they pass ~80%, batteries drain and get swapped, and a few ultrasonic
+# spikes are mixed in so the data looks like the real sensors.
+#
+#   python fleet_generator.py --bins 10000 --days 365 --cadence 5 --out fleet.csv
+TIME_FORMAT = "%d/%m/%Y %H:%M:%S"   # same day-first format as the sheets
+CENTER = (3.142844, 101.718299)     # TRX
+
+
+def generate(bins=10, days=7, cadence=5, start=None, seed=0, spike_rate=0.001, chunk_steps=288):
+    # Yields DataFrames of chunk_steps readings per bin, oldest first
+    rng = np.random.default_rng(seed)
+    ids = np.array([f"Bin_{i + 1}" for i in range(bins)], dtype=object)
+    lat = CENTER[0] + rng.normal(0, 0.01, bins)
+    lon = CENTER[1] + rng.normal(0, 0.01, bins)
+
+    rate = rng.uniform(0.05, 0.6, bins) * cadence / 5   # % per reading
+    fill = rng.uniform(0, 60, bins)
+    battery = rng.uniform(50, 100, bins)
+    drain = rng.uniform(0.0005, 0.003, bins) * cadence
+
+    steps = int(days * 24 * 60 // cadence)
+    if start is None:
+        start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+    step = timedelta(minutes=cadence)
+
+    for first in range(0, steps, chunk_steps):
+        n = min(chunk_steps, steps - first)
+        fills = np.empty((n, bins), dtype=np.float32)
+        batteries = np.empty((n, bins), dtype=np.float32)
+
+        for k in range(n):
+            fill += rate * rng.uniform(0.3, 1.7, bins)
+            # Crews empty bins some time after they pass 80%
+            collected = (fill >= 80) & (rng.random(bins) < 0.02 * cadence / 5)
+            fill = np.where(collected, rng.uniform(0, 5, bins), np.minimum(fill, 100))
+            battery = battery - drain
+            battery = np.where(battery < 5, 100, battery)  # battery swapped
+
+            reading = fill + rng.normal(0, 0.5, bins)
+            spikes = rng.random(bins) < spike_rate
+            reading = np.where(spikes, rng.uniform(90, 100, bins), reading)
+            fills[k] = np.clip(reading, 0, 100)
+            batteries[k] = battery
+
+        times = [(start + (first + k) * step).strftime(TIME_FORMAT) for k in range(n)]
+        flat_battery = batteries.ravel().round(1)
+        yield pd.DataFrame({
+            "Bin_ID": np.tile(ids, n),
+            "Timestamp": np.repeat(times, bins),
+            "Fill_Level(%)": fills.ravel().round(1),
+            "Battery_Level(%)": flat_battery,
+            "Lat": np.tile(lat.round(6), n),
+            "Lon": np.tile(lon.round(6), n),
+            "Status": np.where(flat_battery < 10, "Offline", "Online"),
+        })
+
+
+def generate_frame(bins=10, days=7, cadence=5, **kwargs):
+    return pd.concat(generate(bins, days, cadence, **kwargs), ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic smart-bin reading history (CSV)")
+    parser.add_argument("--bins", type=int, default=10)
+    parser.add_argument("--days", type=float, default=7)
+    parser.add_argument("--cadence", type=float, default=5, help="minutes between readings")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--spike-rate", type=float, default=0.001, help="share of readings that are sensor spikes")
+    parser.add_argument("--out", default="fleet_history.csv")
+    args = parser.parse_args()
+
+    rows = 0
+    for i, chunk in enumerate(generate(args.bins, args.days, args.cadence, seed=args.seed, spike_rate=args.spike_rate)):
+        chunk.to_csv(args.out, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+        rows += len(chunk)
+    print(f"Wrote {rows:,} readings for {args.bins:,} bins to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from column_store import FLOAT32_COLUMNS, FLOAT64_COLUMNS, NAT
+
+
+# --- Latest reading per bin, stored compactly ---
+# One slot per bin, held once per process (by the reader / cache) and only
+# read by the pages. Kept up to date as batches arrive, so the current state
+# of the fleet never needs a sort over the whole history: an update only
+# looks at the new batch. Batches must already be normalized
+# (see data_loader.normalize).
+#
+# Columns are plain numpy arrays indexed by bin code:
+#   Bin_ID           -> code (position), dictionary in self.bins
+#   time columns     -> int64 nanoseconds (NaT = int64 min)
+#   Lat / Lon        -> float64
+#   other numbers    -> float32
+#   text (Status...) -> int32 codes into a per-column dictionary (-1 = missing)
+# As in the column store, a column with no values in its first batch is
+# text unless it is a known number column.
+def _kind_of(name, series):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "time"
+    if name in FLOAT64_COLUMNS:
+        return "float64"
+    if name in FLOAT32_COLUMNS or pd.api.types.is_numeric_dtype(series) and series.notna().any():
+        return "float32"
+    return "text"
+
+
+_EMPTY = {"time": NAT, "float64": np.nan, "float32": np.nan, "text": -1}
+_DTYPE = {"time": "int64", "float64": "float64", "float32": "float32", "text": "int32"}
+
+
+class FleetState:
+    def __init__(self):
+        self.bins = []            # code -> Bin_ID
+        self.codes = {}           # Bin_ID -> code
+        self.time = np.empty(0, dtype="int64")
+        self.columns = {}         # name -> (kind, array)
+        self.dictionaries = {}    # text column -> (values, value -> code)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.bins)
+
+    # --- Codes ---
+    def _bin_codes(self, ids):
+        # Codes for an array of Bin_IDs, adding unseen bins
+        unique, inverse = np.unique(ids, return_inverse=True)
+        for bin_id in unique:
+            if bin_id not in self.codes:
+                self.codes[bin_id] = len(self.bins)
+                self.bins.append(bin_id)
+        self._grow(len(self.bins))
+        return np.array([self.codes[b] for b in unique], dtype=np.int64)[inverse]
+
+    def _grow(self, n):
+        have = len(self.time)
+        if n <= have:
+            return
+        size = max(n, 2 * have, 64)
+        self.time = np.concatenate([self.time, np.full(size - have, NAT, dtype="int64")])
+        for name, (kind, arr) in self.columns.items():
+            self.columns[name] = (kind, np.concatenate([arr, np.full(size - have, _EMPTY[kind], dtype=_DTYPE[kind])]))
+
+    def _encode(self, name, kind, values):
+        if kind == "time":
+            return pd.to_datetime(values, errors="coerce").astype("datetime64[ns]").to_numpy().view("int64")
+        if kind != "text":
+            return pd.to_numeric(values, errors="coerce").to_numpy(dtype=_DTYPE[kind], na_value=np.nan)
+        words, codes = self.dictionaries.setdefault(name, ([], {}))
+        present = values.notna().to_numpy()
+        out = np.full(len(values), -1, dtype="int32")
+        keys = values[present].astype(str)
+        for value in keys.unique():
+            if value not in codes:
+                codes[value] = len(words)
+                words.append(value)
+        out[present] = keys.map(codes).to_numpy(dtype="int32")
+        return out
+
+    # --- Updates ---
+    def update(self, batch):
+        if batch.empty:
+            return
+        batch = batch.dropna(subset=["Timestamp", "Bin_ID"])
+        if batch.empty:
+            return
+        ids = batch["Bin_ID"].astype(str).to_numpy()
+        ts = batch["Timestamp"].astype("datetime64[ns]").to_numpy().view("int64")
+
+        with self.lock:
+            codes = self._bin_codes(ids)
+            # Newest row of each bin in the batch (later rows win ties)
+            order = np.lexsort((ts, codes))
+            is_last = np.r_[codes[order][1:] != codes[order][:-1], True]
+            rows = order[is_last]
+            newer = ts[rows] >= self.time[codes[rows]]
+            rows, slots = rows[newer], codes[rows[newer]]
+            if not len(rows):
+                return
+            self.time[slots] = ts[rows]
+
+            picked = batch.iloc[rows]
+            for name in batch.columns:
+                if name in ("Bin_ID", "Timestamp"):
+                    continue
+                if name not in self.columns:
+                    kind = _kind_of(name, batch[name])
+                    self.columns[name] = (kind, np.full(len(self.time), _EMPTY[kind], dtype=_DTYPE[kind]))
+                kind, arr = self.columns[name]
+                arr[slots] = self._encode(name, kind, picked[name])
+
+    # --- Reads ---
+    def snapshot(self):
+        # One row per bin, oldest update first, as a DataFrame for the pages.
+        # Columns keep their compact types: Bin_ID and text columns are
+        # categoricals over the state's own dictionaries (no strings are
+        # copied), levels stay float32.
+        with self.lock:
+            n = len(self.bins)
+            if not n:
+                return pd.DataFrame()
+            order = np.argsort(self.time[:n], kind="stable")
+            data = {
+                "Bin_ID": pd.Categorical.from_codes(order, categories=list(self.bins)),
+                "Timestamp": self.time[:n][order].view("datetime64[ns]"),
+            }
+            for name, (kind, arr) in self.columns.items():
+                values = arr[:n][order]
+                if kind == "time":
+                    data[name] = values.view("datetime64[ns]")
+                elif kind == "text":
+                    data[name] = pd.Categorical.from_codes(values, categories=list(self.dictionaries[name][0]))
+                else:
+                    data[name] = values
+        return pd.DataFrame(data)
@@ -0,0 +1,140 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from column_store import NAT
+
+# --- Fill-rate forecast per bin ---
+# A running fill rate (% per hour) per bin, updated with every new reading:
+# an exponentially weighted average of the slope between consecutive
+# readings, where a reading's weight grows with the time it covers
+# (half-life HALF_LIFE_H hours). A drop of EMPTY_DROP points or more is
+# an emptying: the rate starts over from the next slope. Gaps longer than
+# MAX_GAP_H only move the last reading, they are not trusted as a slope.
+#
+# State is one slot per bin in plain numpy arrays (like FleetState), so a
+# batch with one reading per bin costs a few vectorized operations, and
+# time-to-threshold for the whole fleet is one pass (see predict).
+HALF_LIFE_H = 3.0
+EMPTY_DROP = 20.0
+MAX_GAP_H = 6.0
+MIN_RATE = 0.05          # % per hour; slower bins are reported as not filling
+NS_PER_HOUR = 3_600 * 10**9
+
+
+def reading_steps(codes, ts):
+    # Row indexes grouped into steps: step k holds the k-th reading (in time
+    # order) of every bin, so per-bin recurrences run vectorized across bins.
+    # A live batch with one reading per bin is a single step.
+    order = np.lexsort((ts, codes))
+    sorted_codes = codes[order]
+    starts = np.r_[0, np.flatnonzero(sorted_codes[1:] != sorted_codes[:-1]) + 1]
+    rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+    by_rank = np.argsort(rank, kind="stable")
+    bounds = np.searchsorted(rank[by_rank], np.arange(int(rank.max()) + 2))
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        yield order[by_rank[lo:hi]]
+
+
+class FillForecast:
+    def __init__(self):
+        self.bins = []            # code -> Bin_ID
+        self.codes = {}           # Bin_ID -> code
+        self.last_ts = np.empty(0, dtype="int64")
+        self.last_fill = np.empty(0, dtype="float64")
+        self.rate = np.empty(0, dtype="float64")    # % per hour, NaN = no estimate yet
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.bins)
+
+    def _bin_codes(self, ids):
+        inverse, unique = pd.factorize(ids)   # hashing, not a sort of the strings
+        for bin_id in unique:
+            if bin_id not in self.codes:
+                self.codes[bin_id] = len(self.bins)
+                self.bins.append(bin_id)
+        have, n = len(self.last_ts), len(self.bins)
+        if n > have:
+            size = max(n, 2 * have, 64)
+            self.last_ts = np.concatenate([self.last_ts, np.full(size - have, NAT, dtype="int64")])
+            self.last_fill = np.concatenate([self.last_fill, np.full(size - have, np.nan)])
+            self.rate = np.concatenate([self.rate, np.full(size - have, np.nan)])
+        return np.array([self.codes[b] for b in unique], dtype=np.int64)[inverse]
+
+    # --- Updates ---
+    def update(self, batch):
+        if batch.empty:
+            return
+        ids = batch["Bin_ID"].astype(str).to_numpy()
+        ts = batch["Timestamp"].astype("datetime64[ns]").to_numpy().view("int64")
+        fill = pd.to_numeric(batch["Fill_Level(%)"], errors="coerce").to_numpy(dtype="float64")
+        keep = (ts != NAT) & ~np.isnan(fill)
+        ids, ts, fill = ids[keep], ts[keep], fill[keep]
+        if not len(ids):
+            return
+
+        with self.lock:
+            codes = self._bin_codes(ids)
+            for step in reading_steps(codes, ts):
+                self._step(codes[step], ts[step], fill[step])
+
+    def _step(self, c, t, f):
+        # c: distinct bin codes, one reading each
+        last_t = self.last_ts[c]
+        seen = last_t != NAT
+        newer = ~seen | (t > last_t)
+        c, t, f, last_t, seen = c[newer], t[newer], f[newer], last_t[newer], seen[newer]
+
+        hours = np.where(seen, (t - last_t) / NS_PER_HOUR, np.nan)
+        delta = f - self.last_fill[c]
+        emptied = seen & (delta <= -EMPTY_DROP)
+        valid = seen & ~emptied & (hours > 0) & (hours <= MAX_GAP_H)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = delta / hours
+        alpha = 1 - np.exp(-np.log(2) * np.nan_to_num(hours) / HALF_LIFE_H)
+
+        rate = self.rate[c]
+        blended = np.where(np.isnan(rate), slope, rate + alpha * (slope - rate))
+        rate = np.where(valid, blended, rate)
+        rate[emptied] = np.nan
+        self.rate[c] = rate
+        self.last_ts[c] = t
+        self.last_fill[c] = f
+
+    # --- Reads ---
+    def predict(self, bin_ids, full_at):
+        # Per entry of bin_ids: Fill_Rate (% per hour), Hours_To_Full (from
+        # the bin's last reading; 0 if already at full_at, NaN if it is not
+        # filling or has no estimate) and Full_By (time it reaches full_at)
+        full_at = np.asarray(full_at, dtype="float64")
+        with self.lock:
+            codes = pd.Series(bin_ids).astype(str).map(self.codes)
+            known = codes.notna().to_numpy()
+            idx = codes[known].to_numpy(dtype=np.int64)
+            rate = np.full(len(codes), np.nan)
+            fill = np.full(len(codes), np.nan)
+            last = np.full(len(codes), NAT, dtype="int64")
+            rate[known], fill[known], last[known] = self.rate[idx], self.last_fill[idx], self.last_ts[idx]
+
+        remaining = full_at - fill
+        with np.errstate(divide="ignore", invalid="ignore"):
+            hours = np.where(remaining <= 0, 0.0, np.where(rate >= MIN_RATE, remaining / rate, np.nan))
+        full_by = np.where(np.isnan(hours), NAT, last + np.nan_to_num(hours * NS_PER_HOUR).astype("int64"))
+        return pd.DataFrame({
+            "Fill_Rate": rate.round(2),
+            "Hours_To_Full": hours,
+            "Full_By": full_by.view("datetime64[ns]"),
+        })
+
+
+def eta_text(hours):
+    # "full in ~3h" style labels ("" where there is no forecast)
+    hours = pd.Series(hours, dtype="float64")
+    text = np.select(
+        [hours.isna().to_numpy(), (hours <= 0).to_numpy(), (hours < 1).to_numpy(), (hours < 48).to_numpy()],
+        ["", "full now", "full in <1h", "full in ~" + hours.round().astype("Int64").astype(str) + "h"],
+        "full in ~" + (hours / 24).round().astype("Int64").astype(str) + "d",
+    )
+    return pd.Series(text, index=hours.index)
@@ -1,13 +1,21 @@
 import streamlit as st
 import pandas as pd
 from streamlit_option_menu import option_menu
-import folium 
 from streamlit_folium import st_folium
 import matplotlib.pyplot as plt
 import altair as alt
 import re
 import base64
+import html
 import datetime as dt
+from bin_map import add_routes, base_map, bins_layer
+from cards import CARDS_PER_PAGE, alert_cards, cards_grid, device_cards, status_cards
+from downsample import MAX_POINTS, bucketed_pivot, downsample
+from data_loader import (DUMMY_URL, REALTIME_SOURCE, classified_latest, data_version, get_bin_registry, get_thresholds,
+                         load_readings, snapshot, start_poller)
+from forecast import eta_text
+from rollups import ROLLUP_AFTER, freq_for
+from routing import DEPOT, TRUCK_CAPACITY, plan_routes, route_candidates
 
 # Function to load and encode an image
 def get_base64_image(image_path):
@@ -15,6 +23,63 @@ def get_base64_image(image_path):
         data = f.read()
     return base64.b64encode(data).decode()
 
+# Rerun the whole page, but only when the background poller brought new readings
+@st.fragment(run_every=5)
+def watch_for_new_data(url):
+    key = f"data_version_{url}"
+    version = data_version(url)
+    if st.session_state.get(key) != version:
+        first_check = key not in st.session_state
+        st.session_state[key] = version
+        if not first_check:
+            st.rerun()
+
+# Show one page of cards at a time (page picker only when there is more than one)
+def paginate(df, key, per_page=CARDS_PER_PAGE):
+    pages = max(1, -(-len(df) // per_page))
+    if pages == 1:
+        return df
+    page = st.number_input(f"Page (1–{pages}, {len(df)} bins)", min_value=1, max_value=pages, value=1, key=key)
+    return df.iloc[(page - 1) * per_page : page * per_page]
+
+# Bin map: a fresh map skeleton plus one bins layer, aggregated for the last zoom level.
+# bins: classified latest table (Bin_ID, Lat, Lon, Fill_Level(%), Fill_Rank).
+# Once the map has reported its viewport, only the registry's bins in and
+# around it are drawn; bins without a known position are left off.
+# routes: optional (plan, depot) from routing.plan_routes, drawn on top.
+def show_bin_map(key, bins, routes=None):
+    zoom = st.session_state.get(f"{key}_zoom", 17)
+    center = st.session_state.get(f"{key}_center")
+    bins = bins.dropna(subset=["Lat", "Lon"]) if not bins.empty else bins
+    bounds = st.session_state.get(f"{key}_bounds")
+    if bounds and not bins.empty:
+        south, west = bounds["_southWest"]["lat"], bounds["_southWest"]["lng"]
+        north, east = bounds["_northEast"]["lat"], bounds["_northEast"]["lng"]
+        pad_lat, pad_lon = north - south, east - west   # one screen around, so short pans need no redraw
+        visible = get_bin_registry().in_bounds(south - pad_lat, west - pad_lon, north + pad_lat, east + pad_lon)
+        bins = bins[bins["Bin_ID"].astype(str).isin(visible)]
+    layer = bins_layer(bins.get("Bin_ID", []), bins.get("Lat", []), bins.get("Lon", []),
+                       bins.get("Fill_Level(%)", []), bins.get("Fill_Rank", []), zoom=zoom)
+    if routes is not None:
+        add_routes(layer, *routes)
+    # Only the layer changes between renders: st_folium keeps the browser's
+    # map, moved to where the user left it
+    out = st_folium(base_map(), key=key, feature_group_to_add=layer, zoom=zoom, center=center, width=900, height=400,
+                    returned_objects=["zoom", "center", "bounds"])
+    if out and out.get("zoom"):
+        st.session_state[f"{key}_zoom"] = out["zoom"]
+    if out and out.get("center"):
+        st.session_state[f"{key}_center"] = (out["center"]["lat"], out["center"]["lng"])
+    if out and out.get("bounds") and out["bounds"].get("_southWest"):
+        st.session_state[f"{key}_bounds"] = out["bounds"]
+
+# Open alerts with each bin's current fill level and threshold, built once per data update
+def open_alerts(snap):
+    key = ("open_alerts", get_thresholds().version, get_bin_registry().version)
+    return snap.derive(key, lambda s: s.alerts.open_alerts().merge(
+        classified_latest(s)[["Bin_ID", "Fill_Level(%)", "Full_At"]].rename(columns={"Fill_Level(%)": "Fill"}),
+        on="Bin_ID", how="left"))
+
 # Load your images
 logo_base64 = get_base64_image("assets/logo_v3.png")
 profile_base64 = get_base64_image("assets/profilepic.jpg")
@@ -98,15 +163,15 @@ if selected == "🗑️ Dashboard":
     if subpage == "Dummy Data":
         # KPI SECTION 
         st.markdown("### 📊 KPI Overview")
-        url = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQimwz3tpdodtv2xLKVIx5fVDx1SXaUGzfK6grHmYQSK-ug7Xe0qJsXQct6vyee50l5_AqBxug44E1-/pub?gid=628102932&single=true&output=csv"
-        df = pd.read_csv(url)
-
-        THRESHOLD = 70 
+        snap = snapshot(DUMMY_URL)
+        latest_df = snap.latest
 
-        total_bins = 10
-        exceed_bins = 1
-        resolved_bins = 2  # dummy value
-        offline_bins = 1   # dummy value
+        # Alert and collection counters are kept up to date on ingest
+        alert_kpis = snap.alerts.kpis()
+        total_bins = len(latest_df)
+        exceed_bins = alert_kpis["open"]
+        resolved_bins = snap.collections.kpis()["collected_today"]   # bins emptied today
+        offline_bins = snap.heartbeat.kpis()["offline"]   # silent or battery too low
 
         # Custom CSS for KPI boxes
         st.markdown("""
@@ -183,63 +248,30 @@ if selected == "🗑️ Dashboard":
         with col1:
             st.subheader("📍 Bin Locations & Status")
 
-            # --- Create Map centered at TRX (approx lat/lon) ---
-            trx_lat, trx_lon = 3.142844, 101.718299
-            m = folium.Map(location=[trx_lat, trx_lon], zoom_start=17)
-
             # Caption under the map
             st.caption("Map showing bin locations in the TRX District area.")
 
-            # Load bin data
-            url = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQimwz3tpdodtv2xLKVIx5fVDx1SXaUGzfK6grHmYQSK-ug7Xe0qJsXQct6vyee50l5_AqBxug44E1-/pub?gid=628102932&single=true&output=csv"
+            # Load bin data (shared, cached loader)
             try:
-                df = pd.read_csv(url)
-                df["Timestamp"] = pd.to_datetime(df["Timestamp"])
-
-                # Latest row for each bin
-                latest_df = (
-                    df.sort_values("Timestamp")
-                    .groupby("Bin_ID")
-                    .tail(1)
-                )
+                # Latest row for each bin, with its status from the threshold config
+                latest_df = classified_latest(snapshot(DUMMY_URL))
 
-                # Example: Assume your sheet has 'Lat' and 'Lon' columns
-                for _, row in latest_df.iterrows():
-                    bin_id = row["Bin_ID"]
-                    fill = row["Fill_Level(%)"]
-
-                    # 🚨 Make sure you match your sheet column names here
-                    lat = row["Lat"]
-                    lon = row["Lon"]
-
-                    # Color by fill level
-                    if fill >= 70:
-                        color = "red"
-                    elif fill >= 50:
-                        color = "orange"
-                    else:
-                        color = "green"
-
-                    # Add marker
-                    folium.CircleMarker(
-                        location=[row["Lat"], row["Lon"]],
-                        radius=10,
-                        color=color,
-                        fill=True,
-                        fill_color=color,
-                        popup=f"{row['Bin_ID']} – {fill}% full"
-                    ).add_to(m)
+                # Map centered at TRX; positions come from the bin registry, else the sheet's 'Lat' and 'Lon'
+                show_bin_map("dummy_map", latest_df)
 
             except Exception as e:
                 st.error(f"❌ Failed to load Google Sheet: {e}")
-
-            # Show the map inside Streamlit
-            st_folium(m, width=900, height=400)
+                # Show the empty map inside Streamlit
+                show_bin_map("dummy_map", pd.DataFrame())
 
         with col2:
             st.subheader("🔔 Alerts")
             with st.expander("Today's Alerts", expanded=True):
-                st.write("**Bin 2** – Status: ⚠️ Unresolved – Time: 12:30 PM")
+                current = open_alerts(snap)
+                if current.empty:
+                    st.write("✅ No open alerts.")
+                for bin_id, opened in zip(current["Bin_ID"].head(20), current["Opened"].head(20)):
+                    st.write(f"**{bin_id}** – Status: ⚠️ Unresolved – Since: {opened:%I:%M %p}")
                 # col_alert1, col_alert2 = st.columns(2)
                 # with col_alert1:
                 #     st.button("✅ Resolve", key="resolve_bin2")
@@ -247,8 +279,11 @@ if selected == "🗑️ Dashboard":
                 #     st.button("❌ Remove", key="remove_bin2")
 
             with st.expander("Past Alerts"):
-                st.write("✅ Bin 1 – Resolved at 10:15 AM")
-                st.write("✅ Bin 3 – Resolved at 09:40 AM")
+                past = snap.alerts.history(limit=10)
+                if past.empty:
+                    st.write("No resolved alerts yet.")
+                for bin_id, closed in zip(past["Bin_ID"], past["Closed"]):
+                    st.write(f"✅ {bin_id} – Resolved at {closed:%I:%M %p}")
 
         # Divider
         st.markdown("---")
@@ -256,56 +291,15 @@ if selected == "🗑️ Dashboard":
         # Bin status section
         st.subheader("🗑️ Bin Status Overview")
 
-        url = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQimwz3tpdodtv2xLKVIx5fVDx1SXaUGzfK6grHmYQSK-ug7Xe0qJsXQct6vyee50l5_AqBxug44E1-/pub?gid=628102932&single=true&output=csv"
-
         try:
-            df = pd.read_csv(url)
-
-            # ✅ Ensure timestamp is datetime
-            df["Timestamp"] = pd.to_datetime(df["Timestamp"])
-
-            # ✅ Get only the latest row for each Bin_ID
-            latest_df = (
-                    df.sort_values("Timestamp")
-                        .groupby("Bin_ID")
-                        .tail(1)
-                        .assign(BinNum=lambda x: x["Bin_ID"].str.extract(r"(\d+)").astype(int))  # extract number
-                        .sort_values("BinNum")  # sort numerically
-            )
+            # ✅ Latest row for each Bin_ID, already in bin-number order; the
+            # cards are built once per data update and shared by every session
+            snap = snapshot(DUMMY_URL)
+            cards = snap.derive(("status_cards", get_thresholds().version, get_bin_registry().version),
+                                lambda s: status_cards(classified_latest(s)))
 
-        # ✅ Arrange bins in rows (3 per row)
-            cols = st.columns(3, gap="large")
-
-            for i, (idx, row) in enumerate(latest_df.iterrows()):
-                bin_id = row["Bin_ID"]
-                fill = row["Fill_Level(%)"]
-                last = row["Timestamp"].strftime("%Y-%m-%d %H:%M:%S")
-
-                # Status color
-                if fill >= 80:
-                    status_color = "#ff4d4d"
-                    status_text = "FULL"
-                elif fill >= 50:
-                    status_color = "#ffcc00"
-                    status_text = f"{fill}%"
-                else:
-                    status_color = "#33cc33"
-                    status_text = "EMPTY"
-
-                # Card with margin-bottom for vertical spacing
-                with cols[i % 3]:
-                    st.markdown(
-                        f"""
-                        <div style="background-color:{status_color}; color:white; 
-                                    border-radius:10px; padding:20px; text-align:center;
-                                    margin-bottom:20px;">   <!-- 👈 add vertical gap -->
-                            <h3>{bin_id}</h3>
-                            <h2>{status_text}</h2>
-                            <p>{last}</p>
-                        </div>
-                        """,
-                        unsafe_allow_html=True
-                    )
+            # ✅ Arrange bins in rows (3 per row), rendered as one block
+            st.markdown(cards_grid(paginate(cards, key="dummy_status_page")), unsafe_allow_html=True)
 
         except Exception as e:
             st.error(f"❌ Failed to load Google Sheet: {e}")
@@ -313,33 +307,29 @@ if selected == "🗑️ Dashboard":
     elif subpage == "Real-time Data":
         
         # 🔗 Google Sheet URL for live data
-        url_realtime = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQAiujqFGFtpOsWWhbfZ5mKoY2EpbNTTfjYIDOZaHA8SIGxBecHXmC6FXvQ-swgz3iG9FXNSBdC-WOY/pub?output=csv"
+        url_realtime = REALTIME_SOURCE
 
-        try:
-            df = pd.read_csv(url_realtime)
-            # df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
-            # --- Auto-detect timestamp column ---
-            time_col = next((c for c in df.columns if "time" in c.lower() or "stamp" in c.lower()), None)
-
-            if not time_col:
-                st.error(f"❌ No timestamp-like column found. Detected columns: {df.columns.tolist()}")
-                st.stop()
+        # One background poller per server keeps this sheet fresh for every session
+        start_poller(url_realtime)
+        watch_for_new_data(url_realtime)
 
-            df["Timestamp"] = pd.to_datetime(df[time_col], errors="coerce")
+        try:
+            # Use latest record for each bin (timestamp column auto-detected on ingest)
+            snap = snapshot(url_realtime)
+            latest_df = classified_latest(snap)
 
 
             # --- KPI SECTION ---
             st.markdown("### 📊 Real-time KPI Overview")
 
-            THRESHOLD = 70  # Customize alert threshold
-            total_bins = 2  # Fixed (only two bins are being monitored)
+            # Thresholds per bin come from the threshold config (see thresholds.py)
+            total_bins = len(latest_df)
 
-            # Use latest record for each bin
-            latest_df = df.sort_values("Timestamp").groupby("Bin_ID").tail(1)
-
-            exceed_bins = len(latest_df[latest_df["Fill_Level(%)"] > THRESHOLD])
-            resolved_bins = 0
-            offline_bins = len(latest_df[latest_df["Status"].str.lower() == "offline"]) if "Status" in df.columns else 0
+            # Alert and collection counters are kept up to date on ingest
+            alert_kpis = snap.alerts.kpis()
+            exceed_bins = alert_kpis["open"]
+            resolved_bins = snap.collections.kpis()["collected_today"]   # bins emptied today
+            offline_bins = snap.heartbeat.kpis()["offline"]   # silent or battery too low (heartbeat.py)
 
             # --- Custom KPI Box Styling ---
             st.markdown("""
@@ -413,50 +403,72 @@ if selected == "🗑️ Dashboard":
                 # --- MAP SECTION ---
                 st.markdown("### 🗺️ Bin Location Map")
 
-                # Define coordinates for each bin manually
-                BIN_COORDS = {
-                    "Bin_Selatan Terace": [3.141400, 101.717143],  #TRX Selatan Terace
-                    "Bin_TRX DMO": [3.141428, 101.717250],  
-                    "Bin_A": [3.143907, 101.716167]
-                }
-
-                # Center map at TRX
-                trx_lat, trx_lon = 3.142844, 101.718299
-                m = folium.Map(location=[trx_lat, trx_lon], zoom_start=17)
-
-                # Plot each bin
-                for _, row in latest_df.iterrows():
-                    bin_id = row["Bin_ID"]
-                    fill = row["Fill_Level(%)"]
-
-                    # Pick coordinate based on Bin_ID
-                    coords = BIN_COORDS.get(bin_id, [trx_lat, trx_lon])
-
-                    # Color based on fill %
-                    if fill >= 70:
-                        color = "red"
-                    elif fill >= 50:
-                        color = "orange"
+                # Bin positions come from the bin registry (bins.csv)
+                show_bin_map("realtime_map", latest_df, routes=st.session_state.get("realtime_routes"))
+                unplaced = int(latest_df["Lat"].isna().sum()) if not latest_df.empty else 0
+                st.caption("Map showing each bin’s fixed location from the bin registry."
+                           + (f" {unplaced} bin(s) have no registered location." if unplaced else ""))
+
+                # --- COLLECTION ROUTES: full bins and bins forecast to be full soon ---
+                with st.expander("🚛 Plan collection routes"):
+                    r1, r2, r3, r4 = st.columns(4)
+                    depot_lat = r1.number_input("Depot Lat", value=DEPOT[0], format="%.6f")
+                    depot_lon = r2.number_input("Depot Lon", value=DEPOT[1], format="%.6f")
+                    capacity = r3.number_input("Truck capacity (full bins)", min_value=1.0, value=TRUCK_CAPACITY)
+                    horizon = r4.number_input("Include bins full within (h)", min_value=0, value=3)
+                    c1, c2 = st.columns(2)
+                    if c1.button("Plan routes"):
+                        depot = (depot_lat, depot_lon)
+                        plan, summary = plan_routes(route_candidates(latest_df, horizon), depot, capacity)
+                        st.session_state["realtime_routes"] = (plan, depot)
+                        st.session_state["realtime_route_summary"] = summary
+                        st.rerun()
+                    if c2.button("Clear routes"):
+                        st.session_state.pop("realtime_routes", None)
+                        st.session_state.pop("realtime_route_summary", None)
+                        st.rerun()
+                    summary = st.session_state.get("realtime_route_summary")
+                    if summary is not None:
+                        if summary.empty:
+                            st.info("No bins need collecting right now.")
+                        else:
+                            st.dataframe(summary.round(1), use_container_width=True, hide_index=True)
+
+                # --- FILL THRESHOLDS: saved to the threshold config, current state is reclassified once ---
+                with st.expander("⚙️ Fill thresholds"):
+                    config = get_thresholds()
+                    zones = get_bin_registry().zones()
+                    scope = st.selectbox("Apply to", ["All bins (default)"] + [f"Zone {z}" for z in zones]
+                                         + latest_df["Bin_ID"].astype(str).tolist(), key="threshold_scope")
+                    if scope.startswith("Zone "):
+                        current = config.zones.reindex([scope[len("Zone "):]]).iloc[0].fillna(pd.Series(config.default))
+                    elif scope in latest_df["Bin_ID"].astype(str).tolist():
+                        current = config.resolve([scope]).iloc[0]
                     else:
-                        color = "green"
-
-                    folium.CircleMarker(
-                        location=coords,
-                        radius=10,
-                        color=color,
-                        fill=True,
-                        fill_color=color,
-                        popup=f"{bin_id}: {fill}% full"
-                    ).add_to(m)
-
-                st_folium(m, width=900, height=400)
-                st.caption("Map showing each bin’s fixed location in TRX District.")
+                        current = pd.Series(config.default)
+                    t1, t2, t3 = st.columns(3)
+                    full_at = t1.number_input("FULL at (%)", 0.0, 100.0, float(current["full_at"]))
+                    medium_at = t2.number_input("MEDIUM at (%)", 0.0, 100.0, float(current["medium_at"]))
+                    close_at = t3.number_input("Alert closes below (%)", 0.0, 100.0, float(current["close_at"]))
+                    if st.button("Save thresholds"):
+                        if not medium_at <= close_at <= full_at:
+                            st.error("Thresholds must satisfy MEDIUM ≤ alert close ≤ FULL.")
+                        else:
+                            values = {"full_at": full_at, "medium_at": medium_at, "close_at": close_at}
+                            if scope.startswith("Zone "):
+                                config.set(zone=scope[len("Zone "):], **values)
+                            elif scope in latest_df["Bin_ID"].astype(str).tolist():
+                                config.set(bin_id=scope, **values)
+                            else:
+                                config.set(**values)
+                            st.rerun()
 
             with col2:
                 # --- NOTIFICATION ALERT PANEL ---
                 st.markdown("### 🔔 Real-time Alerts")
 
-                alert_df = latest_df[latest_df["Fill_Level(%)"] >= THRESHOLD]
+                # Open alerts from the alert engine (hysteresis: closes below its lower threshold)
+                alert_df = open_alerts(snap)
 
                 if alert_df.empty:
                     st.info("✅ No alerts at the moment. All bins are under control.")
@@ -482,18 +494,19 @@ if selected == "🗑️ Dashboard":
                         </style>
                     """, unsafe_allow_html=True)
 
-                    for _, row in alert_df.iterrows():
-                        bin_id = row["Bin_ID"]
-                        fill = row["Fill_Level(%)"]
-                        time = row["Timestamp"].strftime("%Y-%m-%d %H:%M:%S")
+                    # Newest alerts first, all boxes of the page in one block
+                    page_df = paginate(alert_df, key="realtime_alert_page", per_page=20)
+                    st.markdown("".join(alert_cards(page_df)), unsafe_allow_html=True)
 
-                        st.markdown(f"""
-                            <div class="alert-box">
-                                <div class="alert-header">⚠️ {bin_id} Alert!</div>
-                                <div>Fill Level: <b>{fill}%</b> (exceeded {THRESHOLD}%)</div>
-                                <div class="alert-time">⏰ {time}</div>
-                            </div>
-                        """, unsafe_allow_html=True)
+                # Early warning: bins the fill-rate forecast expects to be full soon
+                FORECAST_WARN_HOURS = 3
+                soon = latest_df[(latest_df["Fill_Rank"] < 2) & (latest_df["Hours_To_Full"] <= FORECAST_WARN_HOURS)]
+                if not soon.empty:
+                    soon = soon.sort_values("Hours_To_Full")
+                    st.markdown(f"#### ⏳ Full within {FORECAST_WARN_HOURS}h")
+                    st.markdown("<br>".join(soon["Bin_ID"].astype(str).map(html.escape) + " – "
+                                            + eta_text(soon["Hours_To_Full"]).set_axis(soon.index)),
+                                unsafe_allow_html=True)
 
             # --- END OF MAP + ALERT PANEL LAYOUT ---
             # Move Bin Status Overview outside of the columns
@@ -503,68 +516,13 @@ if selected == "🗑️ Dashboard":
             st.subheader("🗑️ Bin Status Overview")
 
             try:
-                            # Reuse same Google Sheet
-                            df = pd.read_csv(url_realtime)
-
-                            # ✅ Ensure timestamp is datetime (supporting day-first format like 18/10/2025)
-                            # df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce", dayfirst=True)
-                            # --- Auto-detect timestamp column ---
-                            time_col = next((c for c in df.columns if "time" in c.lower() or "stamp" in c.lower()), None)
-
-                            if not time_col:
-                                st.error(f"❌ No timestamp-like column found. Detected columns: {df.columns.tolist()}")
-                                st.stop()
-
-                            df["Timestamp"] = pd.to_datetime(df[time_col], errors="coerce", dayfirst=True)
-
-
-                            # ✅ Get only the latest row for each Bin_ID
-                            latest_df = (
-                                df.sort_values("Timestamp")
-                                .groupby("Bin_ID")
-                                .tail(1)
-                                .assign(
-                                    BinNum=lambda x: x["Bin_ID"]
-                                    .str.extract(r"(\d+)")
-                                    .fillna(0)           # Handle missing numbers safely
-                                    .astype(int)
-                                )
-                                .sort_values("BinNum")
-                            )
-
-                            # ✅ Arrange bins in rows (3 per row)
-                            cols = st.columns(3, gap="large")
-
-                            for i, (idx, row) in enumerate(latest_df.iterrows()):
-                                bin_id = row["Bin_ID"]
-                                fill = row["Fill_Level(%)"]
-                                last = row["Timestamp"].strftime("%Y-%m-%d %H:%M:%S")
-
-                                # Status color
-                                if fill >= 70:
-                                    status_color = "#ff4d4d"
-                                    status_text = "FULL"
-                                elif fill >= 40:
-                                    status_color = "#ffcc00"
-                                    status_text = f"{fill}%"
-                                else:
-                                    status_color = "#33cc33"
-                                    status_text = "EMPTY"
-
-                                # Card with margin-bottom for vertical spacing
-                                with cols[i % 3]:
-                                    st.markdown(
-                                        f"""
-                                        <div style="background-color:{status_color}; color:white; 
-                                                    border-radius:10px; padding:20px; text-align:center;
-                                                    margin-bottom:20px;">
-                                            <h3>{bin_id}</h3>
-                                            <h2>{status_text}</h2>
-                                            <p>{last}</p>
-                                        </div>
-                                        """,
-                                        unsafe_allow_html=True
-                                    )
+                            # ✅ Latest row for each Bin_ID (same Google Sheet), cards built once per update
+                            snap = snapshot(url_realtime)
+                            cards = snap.derive(("status_cards", get_thresholds().version, get_bin_registry().version),
+                                                lambda s: status_cards(classified_latest(s)))
+
+                            # ✅ Arrange bins in rows (3 per row), rendered as one block
+                            st.markdown(cards_grid(paginate(cards, key="realtime_status_page")), unsafe_allow_html=True)
 
             except Exception as e:
                 st.error(f"❌ Failed to load Bin Status Overview: {e}")
@@ -589,69 +547,99 @@ elif selected == "📊 Report":
 
     # --- Choose which Google Sheet ---
     if subpage == "Dummy Data":
-        url = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQimwz3tpdodtv2xLKVIx5fVDx1SXaUGzfK6grHmYQSK-ug7Xe0qJsXQct6vyee50l5_AqBxug44E1-/pub?gid=628102932&single=true&output=csv"
+        url = DUMMY_URL
     else:
         # Real-time Data
-        url = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQAiujqFGFtpOsWWhbfZ5mKoY2EpbNTTfjYIDOZaHA8SIGxBecHXmC6FXvQ-swgz3iG9FXNSBdC-WOY/pub?output=csv"
+        url = REALTIME_SOURCE
 
     # --- Common logic for both datasets ---
     try:
-        df = pd.read_csv(url)
-
-        # --- Identify key columns ---
-        time_col = next((c for c in df.columns if "time" in c.lower() or "timestamp" in c.lower()), None)
-        bin_col  = next((c for c in df.columns if "bin" in c.lower()), None)
-        fill_col = next((c for c in df.columns if "fill" in c.lower()), None)
-
-        if not (time_col and bin_col and fill_col):
-            st.error("Sheet missing required columns. Expected columns containing: 'timestamp', 'bin', 'fill'.")
-            st.write("Detected columns:", df.columns.tolist())
-            st.stop()
-
-        # --- Clean and format ---
-        df[time_col] = pd.to_datetime(df[time_col], errors="coerce")
-        df["Fill"] = pd.to_numeric(df[fill_col].astype(str).str.replace("%", ""), errors="coerce")
-
-        # --- Remove completely empty rows ---
-        df = df.dropna(subset=[time_col, bin_col, "Fill"])
-
-        # --- Build sorted bin list ---
-        unique_bins = sorted(df[bin_col].dropna().unique(), key=lambda x: (
-            int(re.search(r"(\d+)", str(x)).group(1)) if re.search(r"(\d+)", str(x)) else float("inf"),
-            str(x)
-        ))
-        options = ["All Bins"] + unique_bins
+        # --- Key columns (resolved once per source by the schema registry) ---
+        time_col = "Timestamp"
+        bin_col  = "Bin_ID"
+        fill_col = "Fill_Level(%)"
+
+        # Hourly/daily aggregates, kept up to date as readings arrive
+        snap = snapshot(url)
+        rollups = snap.rollups
+        first_time, last_time = rollups.time_range()
+
+        # --- Build sorted bin list (one row per bin, no need for the full history) ---
+        unique_bins = snap.latest[bin_col].tolist() if not snap.latest.empty else []
+
+        # --- User select bins and date range (passed down to the data load) ---
+        col_bins, col_dates = st.columns([2, 1])
+        with col_bins:
+            bin_choice = st.multiselect("Choose bins to view (leave empty for All Bins):", unique_bins)
+        with col_dates:
+            if first_time is None:
+                date_range = ()
+            else:
+                first_day, last_day = first_time.date(), last_time.date()
+                date_range = st.date_input(
+                    "Date range:",
+                    value=(max(first_day, last_day - dt.timedelta(days=6)), last_day),
+                    min_value=first_day,
+                    max_value=last_day,
+                )
 
-        # --- User select bin ---
-        bin_choice = st.selectbox("Choose a bin to view (or All Bins):", options)
+        # Only the first date is returned while the second one is being picked
+        if date_range:
+            start = pd.Timestamp(date_range[0])
+            end = pd.Timestamp(date_range[-1]) + pd.Timedelta(days=1)
+        else:
+            start = end = None
+        bins = bin_choice or None
+        long_range = start is not None and end - start > ROLLUP_AFTER
 
         st.markdown("### 📈 Bin Fill Level Over Time")
 
-        # --- Pivot safely using pivot_table (handles duplicates) ---
-        pivot_df = (
-            df.pivot_table(
-                index=time_col, 
-                columns=bin_col, 
-                values="Fill", 
-                aggfunc="mean"   # average duplicates by timestamp
-            ).sort_index()
-        )
-
-        if not pivot_df.empty:
-            pivot_df["Overall Avg"] = pivot_df.mean(axis=1)
-
-        # --- Plot chart ---
-        if bin_choice == "All Bins":
+        # --- Plot chart (at most MAX_POINTS points per series) ---
+        if len(bin_choice) != 1:
+            def build_pivot(snap):
+                if long_range:
+                    # Long range: one row per bin per hour/day from the rollups
+                    bucket = freq_for(start, end, MAX_POINTS)
+                    pivot_df = rollups.pivot(bucket, start, end, bins)
+                else:
+                    # Only the selected days and bins are read from the local store
+                    df = load_readings(url, start=start, end=end, bins=bins)
+                    if df.empty:
+                        return pd.DataFrame(), None
+                    df["Fill"] = df[fill_col]
+                    df = df.dropna(subset=[time_col, bin_col, "Fill"])
+                    # Average per time bucket (handles duplicate timestamps too)
+                    pivot_df, bucket = bucketed_pivot(df, time_col, bin_col, "Fill", MAX_POINTS, start, end)
+                if not pivot_df.empty:
+                    pivot_df["Overall Avg"] = pivot_df.mean(axis=1)
+                return pivot_df, bucket
+
+            # Sessions looking at the same range and bins share one computation per update
+            pivot_df, bucket = snap.derive(("report_pivot", start, end, tuple(bin_choice)), build_pivot)
+
             if pivot_df.empty:
                 st.info("No data available to plot.")
             else:
                 st.line_chart(pivot_df, use_container_width=True)
+                if bucket:
+                    st.caption(f"Averaged per {bucket} bucket ({len(pivot_df)} points per bin).")
         else:
-            bin_data = df[df[bin_col] == bin_choice].sort_values(time_col)
+            bin_choice = bin_choice[0]
+            sampling = st.radio("Downsampling", ["Shape-preserving (LTTB)", "Time buckets"], horizontal=True)
+            bin_data = load_readings(url, start=start, end=end, bins=[bin_choice])
+            if not bin_data.empty:
+                bin_data["Fill"] = bin_data[fill_col]
+                bin_data = bin_data.dropna(subset=[time_col, "Fill"]).sort_values(time_col)
             if bin_data.empty:
                 st.info(f"No data for {bin_choice}.")
             else:
-                THRESHOLD = 70  # threshold level
+                total_points = len(bin_data)
+                bin_data = downsample(bin_data[[time_col, "Fill"]], time_col, "Fill", MAX_POINTS,
+                                      method="lttb" if sampling.startswith("Shape") else "bucket")
+                if len(bin_data) < total_points:
+                    st.caption(f"Showing {len(bin_data):,} of {total_points:,} readings.")
+
+                THRESHOLD = float(get_thresholds().resolve([bin_choice])["full_at"].iloc[0])  # this bin's threshold
                 max_fill = bin_data["Fill"].max(skipna=True)
                 y_max = max(THRESHOLD + 10, max_fill + 5)
 
@@ -681,13 +669,47 @@ elif selected == "📊 Report":
 
                 # --- Label for threshold line ---
                 label = (
-                    alt.Chart(pd.DataFrame({"y": [THRESHOLD], "text": [f"Threshold ({THRESHOLD}%)"]}))
+                    alt.Chart(pd.DataFrame({"y": [THRESHOLD], "text": [f"Threshold ({THRESHOLD:g}%)"]}))
                     .mark_text(align="left", dx=5, dy=-5, color="orange")
                     .encode(y="y:Q", text="text:N")
                 )
 
                 st.altair_chart(chart + threshold_line + label, use_container_width=True)
 
+        # --- Per-bin summary for the chosen range (from the daily rollups) ---
+        st.markdown("### 📋 Summary")
+        summary = rollups.summary(start=start, end=end, bins=bins)
+        if summary.empty:
+            st.info("No data available to summarize.")
+        else:
+            # Collection frequency from the emptying events of the same range
+            collected = snap.collections.stats(start, end, bins)
+            summary = summary.join(collected).fillna({"collections": 0})
+            st.dataframe(
+                summary.round(1).rename(columns={
+                    "readings": "Readings", "min": "Min Fill (%)", "mean": "Avg Fill (%)",
+                    "max": "Max Fill (%)", "hours_above": "Hours ≥ Threshold",
+                    "collections": "Collections", "fill_at_collection": "Avg Fill at Collection (%)",
+                    "hours_between": "Avg Hours Between Collections",
+                }),
+                use_container_width=True,
+            )
+
+        # --- What the ingest quality stage dropped or flagged (see quality.py) ---
+        with st.expander("🧹 Data quality"):
+            counts = snap.quality.stats()
+            st.dataframe(pd.DataFrame({
+                "Readings": ["Received", "Unparseable time / bin", "Duplicate", "Late", "Spike (dropped)",
+                             "Level change (confirmed)", "Missing fill", "Reporting gaps", "Accepted"],
+                "Count": [counts["rows"], counts["unparseable"], counts["duplicates"], counts["late"],
+                          counts["outliers"], counts["level_changes"], counts["missing_fill"], counts["gaps"],
+                          counts["accepted"]],
+            }), use_container_width=True, hide_index=True)
+            gaps = snap.quality.recent_gaps()
+            if not gaps.empty:
+                st.caption("Recent reporting gaps")
+                st.dataframe(gaps, use_container_width=True, hide_index=True)
+
     except Exception as e:
         st.error(f"❌ Failed to load Google Sheet / plot data: {e}")
 
@@ -746,95 +768,49 @@ elif selected == "⚙️ Device":
 
     try:
         # --- Load real-time Google Sheet data ---
-        url_realtime = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQAiujqFGFtpOsWWhbfZ5mKoY2EpbNTTfjYIDOZaHA8SIGxBecHXmC6FXvQ-swgz3iG9FXNSBdC-WOY/pub?output=csv"
-        df = pd.read_csv(url_realtime)
-
-        # --- Data Cleaning & Preparation ---
-        # df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
-        # --- Auto-detect timestamp column ---
-        time_col = next((c for c in df.columns if "time" in c.lower() or "stamp" in c.lower()), None)
-
-        if not time_col:
-            st.error(f"❌ No timestamp-like column found. Detected columns: {df.columns.tolist()}")
-            st.stop()
+        url_realtime = REALTIME_SOURCE
 
-        df["Timestamp"] = pd.to_datetime(df[time_col], errors="coerce")
+        # The background poller also moves device heartbeats on with wall time
+        start_poller(url_realtime)
+        watch_for_new_data(url_realtime)
 
-        df = df.dropna(subset=["Timestamp", "Bin_ID"])  # remove empty rows
+        # Keep latest record for each bin (empty rows are dropped on ingest)
+        snap = snapshot(url_realtime)
 
-        # Keep latest record for each bin
-        latest_df = df.sort_values("Timestamp").groupby("Bin_ID").tail(1)
-
-        # --- Location Mapping (Set manually here) ---
-        location_map = {
-            "Bin_A": "Barat Walk",
-            "Bin_B": "TRX DM",
-        }
+        # --- Device Status from reporting gaps and battery level (heartbeat.py) ---
+        if "Battery_Level(%)" not in snap.latest.columns:
+            st.warning("⚠️ 'Battery_Level(%)' column not found in Google Sheet.")
+            st.stop()
 
-        latest_df["Location"] = latest_df["Bin_ID"].map(location_map).fillna("Unknown Location")
+        # Device table and cards are built once per data update, shared by every
+        # session; locations and zones come from the bin registry
+        registry = get_bin_registry()
+        devices_key = ("devices", get_thresholds().version, registry.version, snap.heartbeat.version)
+
+        def build_devices(s):
+            latest = classified_latest(s)
+            health = s.heartbeat.status(latest["Bin_ID"]).set_index(latest.index)
+            return latest.assign(
+                Location=latest["Location"].fillna("Unknown Location"),
+                Device_Status=health["Device_Status"],
+                Silent_Hours=health["Silent_Hours"],
+            )
 
-        # --- Determine Device Status based on Battery Level ---
-        def get_status(battery):
-            try:
-                battery = float(battery)
-                if battery >= 50:
-                    return "Online"
-                elif 20 <= battery < 50:
-                    return "Maintenance"
-                else:
-                    return "Offline"
-            except:
-                return "Unknown"
+        devices_df = snap.derive(devices_key, build_devices)
+        cards = snap.derive(("device_cards",) + devices_key[1:], lambda s: device_cards(s.derive(devices_key, build_devices)))
 
-        if "Battery_Level(%)" in latest_df.columns:
-            latest_df["Device_Status"] = latest_df["Battery_Level(%)"].apply(get_status)
-        else:
-            st.warning("⚠️ 'Battery_Level(%)' column not found in Google Sheet.")
-            st.stop()
+        # --- Area filter and Search Bar ---
+        area = st.selectbox("📍 Area", ["All areas"] + registry.zones())
+        search_term = st.text_input("🔍 Search by Bin ID, Location or Area", "")
 
-        # --- Search Bar ---
-        search_term = st.text_input("🔍 Search by Bin ID or Location", "").lower()
-
-        filtered_df = latest_df[
-            latest_df["Bin_ID"].str.lower().str.contains(search_term)
-            | latest_df["Location"].str.lower().str.contains(search_term)
-        ]
-
-        # --- Display Device Cards in Grid Layout ---
-        cols = st.columns(3, gap="large")
-
-        for i, (idx, row) in enumerate(filtered_df.iterrows()):
-            bin_id = row["Bin_ID"]
-            battery = row.get("Battery_Level(%)", "N/A")
-            location = row.get("Location", "Unknown Location")
-            status = row.get("Device_Status", "Unknown")
-            last_updated = row["Timestamp"].strftime("%Y-%m-%d %H:%M:%S")
-
-            # Status color class
-            if status == "Online":
-                status_class = "online"
-            elif status == "Maintenance":
-                status_class = "maintenance"
-            else:
-                status_class = "offline"
+        # Prefix / substring / typo-tolerant lookup in the registry's search index
+        hits = registry.search.search(search_term)
+        matches = pd.Series(True, index=devices_df.index) if hits is None else devices_df["Bin_ID"].isin(hits)
+        if area != "All areas":
+            matches &= devices_df["Bin_ID"].isin(registry.in_zone(area))
 
-            # Display card
-            with cols[i % 3]:
-                st.markdown(f"""
-                    <div class="device-card">
-                        <div style="display:flex; justify-content:space-between; align-items:center;">
-                            <div class="device-header">{bin_id}</div>
-                            <span class="status {status_class}">{status}</span>
-                        </div>
-                        <div class="device-sub">📍 {location}</div>
-                        <div style="margin-top:8px; color:black; font-size:18px;">
-                            🔋 Battery: <b>{battery}%</b>
-                        </div>
-                        <div style="margin-top:4px; color:black; font-size:14px;">
-                            🕒 Last Updated: {last_updated}
-                        </div>
-                    </div>
-                """, unsafe_allow_html=True)
+        # --- Display Device Cards in Grid Layout (one block per page) ---
+        st.markdown(cards_grid(paginate(cards[matches.to_numpy()], key="device_page")), unsafe_allow_html=True)
 
     except Exception as e:
         st.error(f"❌ Failed to load Google Sheet: {e}")
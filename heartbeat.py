@@ -0,0 +1,189 @@
+import heapq
+import threading
+
+import numpy as np
+import pandas as pd
+
+from column_store import NAT
+from forecast import reading_steps
+from quality import GAP_FACTOR, INTERVAL_ALPHA
+
+# --- Device heartbeat ---
+# Every reading is a heartbeat. Per bin the tracker keeps when it was last
+# seen, its usual reporting interval (EW average, like the quality filter;
+# reporting gaps are left out so an outage does not stretch it) and its
+# latest battery level. A bin is silent once GAP_FACTOR usual intervals
+# (at least MIN_SILENCE) have passed without a reading.
+#
+# "Now" is the newest reading of the whole fleet, so a bin that stops
+# reporting while the others carry on is flagged, and replayed history or
+# a static sheet gives the same answer as live data. Live sources also
+# move the clock with wall time (advance(), called by the poller), so a
+# source that goes quiet altogether still has its bins flagged. Deadlines
+# sit in a heap: moving the clock forward pops only the bins whose
+# deadline just passed, and the offline count is kept up to date as bins
+# go silent, come back or change battery band, so kpis() is O(1).
+# `version` changes whenever a bin's status may have changed.
+DEFAULT_INTERVAL = pd.Timedelta(minutes=15).value   # ns, until a bin has reported twice
+MIN_SILENCE = pd.Timedelta(minutes=30).value        # ns
+BATTERY_ONLINE = 50       # % and above: Online
+BATTERY_LOW = 20          # % and above: Maintenance, below: Offline
+
+
+def classify_battery(battery):
+    # Online >= 50%, Maintenance 20-50%, Offline < 20%, Unknown if missing
+    battery = np.asarray(pd.to_numeric(battery, errors="coerce"), dtype=float)
+    return np.select(
+        [np.isnan(battery), battery >= BATTERY_ONLINE, battery >= BATTERY_LOW],
+        ["Unknown", "Online", "Maintenance"],
+        "Offline",
+    )
+
+
+class HeartbeatTracker:
+    def __init__(self):
+        self.bins = []            # code -> Bin_ID
+        self.codes = {}           # Bin_ID -> code
+        self.last_seen = np.empty(0, dtype="int64")
+        self.interval = np.empty(0, dtype="float64")   # usual ns between readings, NaN = unknown
+        self.deadline = np.empty(0, dtype="int64")     # silent once the clock passes this
+        self.battery = np.empty(0, dtype="float64")
+        self.silent = np.empty(0, dtype=bool)
+        self.offline = np.empty(0, dtype=bool)         # silent or battery below BATTERY_LOW
+        self.clock = NAT
+        self.heap = []            # (deadline, code); stale entries are skipped when popped
+        self.silent_count = 0
+        self.offline_count = 0
+        self.version = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.bins)
+
+    def _bin_codes(self, ids):
+        inverse, unique = pd.factorize(ids)
+        for bin_id in unique:
+            if bin_id not in self.codes:
+                self.codes[bin_id] = len(self.bins)
+                self.bins.append(bin_id)
+        have, n = len(self.last_seen), len(self.bins)
+        if n > have:
+            extra = max(n, 2 * have, 64) - have
+            self.last_seen = np.r_[self.last_seen, np.full(extra, NAT, dtype="int64")]
+            self.interval = np.r_[self.interval, np.full(extra, np.nan)]
+            self.deadline = np.r_[self.deadline, np.full(extra, NAT, dtype="int64")]
+            self.battery = np.r_[self.battery, np.full(extra, np.nan)]
+            self.silent = np.r_[self.silent, np.zeros(extra, dtype=bool)]
+            self.offline = np.r_[self.offline, np.zeros(extra, dtype=bool)]
+        return np.array([self.codes[b] for b in unique], dtype=np.int64)[inverse]
+
+    # --- Updates ---
+    def update(self, batch):
+        if batch.empty:
+            return
+        ids = batch["Bin_ID"].astype(str).to_numpy()
+        ts = batch["Timestamp"].astype("datetime64[ns]").to_numpy().view("int64")
+        if "Battery_Level(%)" in batch.columns:
+            battery = pd.to_numeric(batch["Battery_Level(%)"], errors="coerce").to_numpy(dtype="float64")
+        else:
+            battery = np.full(len(batch), np.nan)
+        keep = ts != NAT
+        ids, ts, battery = ids[keep], ts[keep], battery[keep]
+        if not len(ids):
+            return
+
+        with self.lock:
+            codes = self._bin_codes(ids)
+            for step in reading_steps(codes, ts):
+                self._step(codes[step], ts[step], battery[step])
+            touched = np.unique(codes)
+            if len(self.heap) > 4 * len(self.bins) + 64:
+                self._rebuild_heap()
+            for deadline, code in zip(self.deadline[touched].tolist(), touched.tolist()):
+                heapq.heappush(self.heap, (deadline, code))
+            self.clock = max(self.clock, int(ts.max()))
+            self._set_silent(touched, self.deadline[touched] <= self.clock)
+            self._advance()
+            self.version += 1
+
+    def advance(self, now):
+        # Moves the clock to now (wall time of a live source, same zone as its
+        # readings' timestamps); never backwards
+        now = pd.Timestamp(now).as_unit("ns").value
+        with self.lock:
+            if now > self.clock:
+                self.clock = now
+                if self._advance():
+                    self.version += 1
+
+    def _step(self, c, t, b):
+        # c: distinct bin codes, one reading each
+        last = self.last_seen[c]
+        seen = last != NAT
+        newer = ~seen | (t > last)
+        c, t, b, last, seen = c[newer], t[newer], b[newer], last[newer], seen[newer]
+
+        dt = (t - last).astype("float64")
+        usual = self.interval[c]
+        regular = seen & (np.isnan(usual) | (dt <= GAP_FACTOR * usual))
+        self.interval[c[regular]] = np.where(np.isnan(usual[regular]), dt[regular],
+                                             usual[regular] + INTERVAL_ALPHA * (dt[regular] - usual[regular]))
+        self.last_seen[c] = t
+        has_battery = ~np.isnan(b)
+        self.battery[c[has_battery]] = b[has_battery]
+        usual = np.nan_to_num(self.interval[c], nan=DEFAULT_INTERVAL)
+        self.deadline[c] = t + np.maximum(GAP_FACTOR * usual, MIN_SILENCE).astype("int64")
+
+    def _rebuild_heap(self):
+        # Drops the entries of deadlines that moved on
+        live = np.flatnonzero(~self.silent[:len(self.bins)])
+        self.heap = list(zip(self.deadline[live].tolist(), live.tolist()))
+        heapq.heapify(self.heap)
+
+    def _advance(self):
+        # Pops the deadlines the clock has passed; O(log n) per bin gone
+        # silent. Returns whether any did.
+        changed = False
+        while self.heap and self.heap[0][0] <= self.clock:
+            deadline, code = heapq.heappop(self.heap)
+            if deadline == self.deadline[code] and not self.silent[code]:
+                self._set_silent(np.array([code]), np.array([True]))
+                changed = True
+        return changed
+
+    def _set_silent(self, codes, silent):
+        self.silent_count += int(silent.sum()) - int(self.silent[codes].sum())
+        self.silent[codes] = silent
+        offline = silent | (self.battery[codes] < BATTERY_LOW)
+        self.offline_count += int(offline.sum()) - int(self.offline[codes].sum())
+        self.offline[codes] = offline
+
+    # --- Reads ---
+    def kpis(self):
+        # O(1): bins offline (silent or battery too low) and bins silent
+        with self.lock:
+            return {"offline": self.offline_count, "silent": self.silent_count}
+
+    def status(self, bin_ids):
+        # Per entry of bin_ids: Device_Status (Offline when silent, else by
+        # battery; a bin that reports without a battery level is Online),
+        # Last_Seen and Silent_Hours (since the last reading, NaN if not silent)
+        with self.lock:
+            codes = pd.Series(bin_ids).astype(str).map(self.codes)
+            known = codes.notna().to_numpy()
+            idx = codes[known].to_numpy(dtype=np.int64)
+            last = np.full(len(codes), NAT, dtype="int64")
+            battery = np.full(len(codes), np.nan)
+            silent = np.zeros(len(codes), dtype=bool)
+            last[known], battery[known], silent[known] = self.last_seen[idx], self.battery[idx], self.silent[idx]
+            clock = self.clock
+
+        by_battery = classify_battery(battery)
+        status = np.where(silent, "Offline",
+                          np.where(known & (by_battery == "Unknown"), "Online", by_battery))
+        hours = np.where(silent, (clock - last) / 3.6e12, np.nan)
+        return pd.DataFrame({
+            "Device_Status": status,
+            "Last_Seen": last.view("datetime64[ns]"),
+            "Silent_Hours": hours,
+        })
@@ -0,0 +1,222 @@
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import random
+import time
+from datetime import datetime
+
+# --- Local sensor ingestion service ---
+# Bins send readings straight to this process instead of a Google Sheet:
+#   HTTP  POST /readings   body = JSON object, JSON list, or CSV with header
+#   UDP   one JSON object or one CSV line (in FIELDS order) per datagram
+# Readings are buffered and written in batches to an append-only CSV log.
+# The dashboard reads that log like any other source (set REALTIME_SOURCE
+# to its path); only the new bytes are read on each poll.
+#
+#   python ingest_server.py                  # HTTP :8765, UDP :8766
+#   python ingest_server.py --simulate 20    # plus a fake fleet of 20 bins
+FIELDS = ["Bin_ID", "Timestamp", "Fill_Level(%)", "Battery_Level(%)", "Lat", "Lon", "Status"]
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Where the log is written; the dashboard imports this too (keep this
+# module free of heavy imports). Lives in the dashboard's STORE_DIR.
+LOCAL_LOG = os.environ.get("LOCAL_LOG", os.path.join(os.environ.get("STORE_DIR", ".swd_store"), "ingest", "readings.csv"))
+
+# Largest request body accepted (bytes); bigger ones get 413 unread
+MAX_BODY = int(os.environ.get("INGEST_MAX_BODY", 1 << 20))
+
+
+class ReadingLog:
+    def __init__(self, path, flush_interval=0.5, max_batch=5000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.pending = []
+        self.written = 0
+        self.rejected = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "w", newline="") as f:
+                csv.writer(f).writerow(FIELDS)
+
+    def add(self, reading):
+        # Returns False for readings we cannot use (no bin id)
+        if not reading.get("Bin_ID"):
+            self.rejected += 1
+            return False
+        if not reading.get("Timestamp"):
+            reading["Timestamp"] = datetime.now().strftime(TIME_FORMAT)
+        self.pending.append([reading.get(f, "") for f in FIELDS])
+        if len(self.pending) >= self.max_batch:
+            self.flush()
+        return True
+
+    def flush(self):
+        if not self.pending:
+            return
+        buf = io.StringIO()
+        csv.writer(buf).writerows(self.pending)
+        # One write per batch keeps every line whole for readers tailing the file
+        with open(self.path, "a", newline="") as f:
+            f.write(buf.getvalue())
+        self.written += len(self.pending)
+        self.pending = []
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.flush()
+
+
+def parse_readings(body, content_type=""):
+    text = body.decode("utf-8-sig").strip()
+    if not text:
+        return []
+    if "json" in content_type or text[0] in "[{":
+        data = json.loads(text)
+        return data if isinstance(data, list) else [data]
+    rows = list(csv.reader(io.StringIO(text)))
+    if rows and rows[0] and rows[0][0] == "Bin_ID":
+        header, rows = rows[0], rows[1:]
+    else:
+        header = FIELDS
+    return [dict(zip(header, row)) for row in rows if row]
+
+
+# --- HTTP endpoint (minimal HTTP/1.1, enough for sensor gateways and curl) ---
+def _content_length(headers):
+    # Declared body size, or None if it is not a non-negative integer
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        return None
+    return length if length >= 0 else None
+
+
+async def handle_http(reader, writer, log, max_body=MAX_BODY):
+    try:
+        request_line = (await reader.readline()).decode("latin-1").split()
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = _content_length(headers)
+        body = b"" if length is None or length > max_body else await reader.readexactly(length)
+
+        if length is None:
+            status, payload = "400 Bad Request", {"error": "bad content-length"}
+        elif length > max_body:
+            status, payload = "413 Payload Too Large", {"error": f"body over {max_body} bytes"}
+        elif len(request_line) < 2:
+            status, payload = "400 Bad Request", {"error": "bad request"}
+        elif request_line[0] == "GET" and request_line[1] == "/health":
+            status, payload = "200 OK", {"written": log.written, "pending": len(log.pending), "rejected": log.rejected}
+        elif request_line[0] == "POST" and request_line[1] == "/readings":
+            try:
+                readings = parse_readings(body, headers.get("content-type", ""))
+                accepted = sum(log.add(r) for r in readings)
+                status, payload = "202 Accepted", {"accepted": accepted, "rejected": len(readings) - accepted}
+            except (ValueError, AttributeError) as e:
+                status, payload = "400 Bad Request", {"error": str(e)}
+        else:
+            status, payload = "404 Not Found", {"error": "use POST /readings or GET /health"}
+
+        data = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data
+        )
+        await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+# --- UDP endpoint (one reading per datagram, fire-and-forget from the bins) ---
+class UDPIngest(asyncio.DatagramProtocol):
+    def __init__(self, log):
+        self.log = log
+
+    def datagram_received(self, data, addr):
+        try:
+            for reading in parse_readings(data):
+                self.log.add(reading)
+        except (ValueError, AttributeError):
+            self.log.rejected += 1
+
+
+# --- Simulated bin fleet (for local testing) ---
+async def simulate_fleet(host, port, bins, interval):
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol, remote_addr=(host, port))
+    fill = {f"Bin_{i + 1}": random.uniform(0, 60) for i in range(bins)}
+    battery = {b: random.uniform(60, 100) for b in fill}
+    coords = {b: (3.1428 + random.uniform(-0.003, 0.003), 101.7183 + random.uniform(-0.003, 0.003)) for b in fill}
+    try:
+        while True:
+            for bin_id in fill:
+                fill[bin_id] = fill[bin_id] + random.uniform(0, 3) if fill[bin_id] < 100 else random.uniform(0, 5)
+                battery[bin_id] = max(0.0, battery[bin_id] - random.uniform(0, 0.05))
+                lat, lon = coords[bin_id]
+                transport.sendto(json.dumps({
+                    "Bin_ID": bin_id,
+                    "Timestamp": datetime.now().strftime(TIME_FORMAT),
+                    "Fill_Level(%)": round(min(fill[bin_id], 100), 1),
+                    "Battery_Level(%)": round(battery[bin_id], 1),
+                    "Lat": round(lat, 6),
+                    "Lon": round(lon, 6),
+                }).encode())
+            await asyncio.sleep(interval)
+    finally:
+        transport.close()
+
+
+async def serve(host, http_port, udp_port, log_path, simulate=0, interval=5.0, max_body=MAX_BODY):
+    log = ReadingLog(log_path)
+    loop = asyncio.get_running_loop()
+    http_server = await asyncio.start_server(lambda r, w: handle_http(r, w, log, max_body), host, http_port)
+    udp_transport, _ = await loop.create_datagram_endpoint(lambda: UDPIngest(log), local_addr=(host, udp_port))
+    print(f"Ingesting on http://{host}:{http_port}/readings and udp://{host}:{udp_port} -> {log_path}")
+
+    tasks = [asyncio.create_task(log.run())]
+    if simulate:
+        tasks.append(asyncio.create_task(simulate_fleet(host, udp_port, simulate, interval)))
+    try:
+        async with http_server:
+            await http_server.serve_forever()
+    finally:
+        for task in tasks:
+            task.cancel()
+        udp_transport.close()
+        log.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local ingestion endpoint for smart bin readings")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--http-port", type=int, default=8765)
+    parser.add_argument("--udp-port", type=int, default=8766)
+    parser.add_argument("--log", default=LOCAL_LOG, help="append-only CSV the dashboard reads")
+    parser.add_argument("--simulate", type=int, default=0, metavar="BINS", help="also run a simulated fleet")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between simulated readings")
+    parser.add_argument("--max-body", type=int, default=MAX_BODY, help="largest HTTP body accepted (bytes)")
+    args = parser.parse_args()
+
+    start = time.time()
+    try:
+        asyncio.run(serve(args.host, args.http_port, args.udp_port, args.log, args.simulate, args.interval,
+                          args.max_body))
+    except KeyboardInterrupt:
+        print(f"Stopped after {time.time() - start:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import json
+import os
+import shutil
+import threading
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from column_store import ColumnStore
+
+# --- Reading history partitioned by day and bin ---
+# Readings are split by calendar day (of Timestamp) and by a hash of Bin_ID
+# into BIN_BUCKETS groups; every partition is its own ColumnStore:
+#   <path>/2024-05-01/b03/...
+# catalog.json lists the partitions with their row count and min/max
+# Timestamp, plus the last day each bin was seen on. Queries only open the
+# partitions whose day and bin bucket can match, the latest-state rebuild
+# only opens each bin's last partition, and retention deletes whole days.
+BIN_BUCKETS = 16
+
+
+def bin_bucket(bin_id, buckets=BIN_BUCKETS):
+    # Stable across runs (unlike hash())
+    return zlib.crc32(str(bin_id).encode()) % buckets
+
+
+def _ns(value):
+    return None if value is None else pd.Timestamp(value).as_unit("ns").value
+
+
+class PartitionedStore:
+    def __init__(self, path, buckets=BIN_BUCKETS):
+        self.path = path
+        self.catalog_path = os.path.join(path, "catalog.json")
+        self.lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+
+        if os.path.exists(self.catalog_path):
+            with open(self.catalog_path) as f:
+                self.catalog = json.load(f)
+        else:
+            # partitions: "day/bNN" -> {"day", "bucket", "rows", "min", "max"}
+            self.catalog = {"buckets": buckets, "partitions": {}, "last_day": {}}
+        self._stores = {}
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def rows(self):
+        return sum(p["rows"] for p in self.catalog["partitions"].values())
+
+    def _save_catalog(self):
+        tmp = self.catalog_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.catalog, f)
+        os.replace(tmp, self.catalog_path)
+
+    def _partition(self, key):
+        store = self._stores.get(key)
+        if store is None:
+            store = self._stores[key] = ColumnStore(os.path.join(self.path, key))
+        return store
+
+    # --- Writing ---
+    def append(self, df):
+        if df.empty:
+            return
+        with self.lock:
+            buckets = self.catalog["buckets"]
+            ids = df["Bin_ID"].astype(str)
+            bucket = ids.map({b: bin_bucket(b, buckets) for b in ids.unique()})
+            day = df["Timestamp"].dt.strftime("%Y-%m-%d")
+
+            partitions = self.catalog["partitions"]
+            for (d, b), part in df.groupby([day, bucket], sort=False):
+                key = f"{d}/b{b:02d}"
+                self._partition(key).append(part)
+                times = part["Timestamp"].astype("datetime64[ns]").to_numpy().view("int64")
+                entry = partitions.setdefault(key, {"day": d, "bucket": int(b), "rows": 0,
+                                                    "min": int(times.min()), "max": int(times.max())})
+                entry["rows"] += len(part)
+                entry["closed"] = False
+                entry["min"] = min(entry["min"], int(times.min()))
+                entry["max"] = max(entry["max"], int(times.max()))
+
+            last_day = self.catalog["last_day"]
+            newest = day.groupby(ids, sort=False).max()
+            for bin_id, d in newest.items():
+                if d > last_day.get(bin_id, ""):
+                    last_day[bin_id] = d
+            self._save_catalog()
+
+    # --- Reading ---
+    def partitions(self, start=None, end=None, bins=None):
+        # Catalog keys of the partitions that can hold matching rows
+        start, end = _ns(start), _ns(end)
+        wanted = None if bins is None else {bin_bucket(b, self.catalog["buckets"]) for b in bins}
+        return sorted(
+            key for key, p in self.catalog["partitions"].items()
+            if (start is None or p["max"] >= start)
+            and (end is None or p["min"] < end)
+            and (wanted is None or p["bucket"] in wanted)
+        )
+
+    def query(self, start=None, end=None, bins=None, columns=None):
+        # Rows with start <= Timestamp < end for the given bins (None = no limit)
+        with self.lock:
+            frames = [self._partition(key).query(start, end, bins, columns)
+                      for key in self.partitions(start, end, bins)]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def iter_days(self):
+        # Whole history one day at a time, oldest first (bounded memory)
+        with self.lock:
+            days = sorted({p["day"] for p in self.catalog["partitions"].values()})
+        for day in days:
+            start = pd.Timestamp(day)
+            yield self.query(start, start + pd.Timedelta(days=1))
+
+    def latest_rows(self):
+        # Rows of each bin's last day only: enough to rebuild the latest state
+        with self.lock:
+            by_partition = {}
+            for bin_id, day in self.catalog["last_day"].items():
+                key = f"{day}/b{bin_bucket(bin_id, self.catalog['buckets']):02d}"
+                by_partition.setdefault(key, []).append(bin_id)
+            frames = [self._partition(key).query(bins=bins)
+                      for key, bins in by_partition.items() if key in self.catalog["partitions"]]
+        frames = [f for f in frames if not f.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    # --- Retention and compaction (whole partitions only) ---
+    def drop_before(self, day):
+        # Deletes every partition of days before `day`; returns the rows dropped
+        day = pd.Timestamp(day).strftime("%Y-%m-%d")
+        with self.lock:
+            partitions = self.catalog["partitions"]
+            old = [key for key, p in partitions.items() if p["day"] < day]
+            dropped = 0
+            for key in old:
+                dropped += partitions.pop(key)["rows"]
+                self._stores.pop(key, None)
+                shutil.rmtree(os.path.join(self.path, key), ignore_errors=True)
+            for d in {key.split("/")[0] for key in old}:
+                shutil.rmtree(os.path.join(self.path, d), ignore_errors=True)
+            last_day = self.catalog["last_day"]
+            for bin_id in [b for b, d in last_day.items() if d < day]:
+                del last_day[bin_id]
+            if old:
+                self._save_catalog()
+            return dropped
+
+    def compact(self, before):
+        # Rewrites partitions of days before `before` whose rows arrived out of
+        # order, sorted by time, so range reads on them use binary search again.
+        # Each closed partition is checked once (until a late reading reopens it).
+        before = pd.Timestamp(before).strftime("%Y-%m-%d")
+        with self.lock:
+            for key, p in self.catalog["partitions"].items():
+                if p["day"] >= before or p.get("closed"):
+                    continue
+                p["closed"] = True
+                store = self._partition(key)
+                if store.meta.get("sorted", True):
+                    continue
+                df = store.to_frame()
+                df = df.iloc[np.argsort(df["Timestamp"].to_numpy(), kind="stable")]
+                tmp = os.path.join(self.path, key + ".tmp")
+                shutil.rmtree(tmp, ignore_errors=True)
+                ColumnStore(tmp).append(df)
+                path = os.path.join(self.path, key)
+                shutil.rmtree(path)
+                os.replace(tmp, path)
+                self._stores.pop(key, None)
+            self._save_catalog()
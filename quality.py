@@ -0,0 +1,220 @@
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from column_store import NAT
+from forecast import reading_steps
+
+# --- Ingest quality stage ---
+# Runs on every normalized batch before anything is stored or evaluated:
+#   duplicates  a reading at the same time as the bin's last one is dropped;
+#               older (late) readings are dropped too
+#   outliers    a fill more than max(MAD_K scaled MADs, MIN_JUMP points) away
+#               from the median of the bin's last WINDOW accepted fills is
+#               held back as suspect; the next reading confirms it (a real
+#               level change: the suspect is passed on with its own time,
+#               together with the confirming reading) or it is dropped as a
+#               spike. A drop to NEAR_EMPTY or below is an emptying and is
+#               accepted at once.
+#   gaps        a reading more than GAP_FACTOR times the bin's usual
+#               interval after the previous one is flagged (kept)
+# Per-bin state is fixed size (last time, usual interval, WINDOW fills and
+# one suspect reading), so each reading costs O(1). Counters say what was
+# dropped and why; see stats(). A suspect still waiting for its next
+# reading is in none of them yet. held_rows() / hold() carry the waiting
+# suspects over a restart (the tail reader keeps them with its state).
+WINDOW = 9
+MIN_WINDOW = 3            # fewer accepted fills than this: no outlier check yet
+MAD_K = 5.0
+MIN_JUMP = 15.0           # fill points; below this nothing is an outlier
+NEAR_EMPTY = 10.0         # fill %; a drop to this level is an emptying, never a spike
+GAP_FACTOR = 3.0
+INTERVAL_ALPHA = 0.1      # weight of the newest interval in the usual interval
+RECENT_GAPS = 200
+MAD_SCALE = 1.4826        # MAD -> standard deviation for normal noise
+
+COUNTERS = ("rows", "unparseable", "duplicates", "late", "outliers", "level_changes", "missing_fill", "gaps",
+            "accepted")
+
+
+class QualityFilter:
+    def __init__(self):
+        self.bins = []            # code -> Bin_ID
+        self.codes = {}           # Bin_ID -> code
+        self.last_ts = np.empty(0, dtype="int64")
+        self.interval = np.empty(0, dtype="float64")   # usual ns between readings, NaN = unknown
+        self.window = np.empty((0, WINDOW), dtype="float64")
+        self.filled = np.empty(0, dtype="int64")       # fills written to the window so far
+        self.suspect = np.empty(0, dtype="float64")   # fill held back, NaN = none
+        self.held = {}            # code -> the suspect's row (one-row DataFrame)
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self.gaps = deque(maxlen=RECENT_GAPS)           # (Bin_ID, from, to)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.bins)
+
+    def _bin_codes(self, ids):
+        inverse, unique = pd.factorize(ids)
+        for bin_id in unique:
+            if bin_id not in self.codes:
+                self.codes[bin_id] = len(self.bins)
+                self.bins.append(bin_id)
+        have, n = len(self.last_ts), len(self.bins)
+        if n > have:
+            extra = max(n, 2 * have, 64) - have
+            self.last_ts = np.r_[self.last_ts, np.full(extra, NAT, dtype="int64")]
+            self.interval = np.r_[self.interval, np.full(extra, np.nan)]
+            self.window = np.vstack([self.window, np.full((extra, WINDOW), np.nan)])
+            self.filled = np.r_[self.filled, np.zeros(extra, dtype="int64")]
+            self.suspect = np.r_[self.suspect, np.full(extra, np.nan)]
+        return np.array([self.codes[b] for b in unique], dtype=np.int64)[inverse]
+
+    # --- Filtering ---
+    def filter(self, df, raw_rows=None, count=True):
+        # Returns the rows of df that pass, plus suspects held back from
+        # earlier batches that this one confirmed. raw_rows: rows in the
+        # source before normalize() dropped the unparseable ones (for the
+        # counters). count=False only warms up the state (e.g. from stored
+        # history): nothing it holds back is passed on later.
+        if raw_rows is not None and count:
+            self.counts["rows"] += raw_rows
+            self.counts["unparseable"] += raw_rows - len(df)
+        if df.empty:
+            return df
+        ids = df["Bin_ID"].astype(str).to_numpy()
+        ts = df["Timestamp"].astype("datetime64[ns]").to_numpy().view("int64")
+        fill = pd.to_numeric(df["Fill_Level(%)"], errors="coerce").to_numpy(dtype="float64")
+        keep = np.zeros(len(df), dtype=bool)
+        flags = {"duplicates": 0, "late": 0, "outliers": 0, "level_changes": 0, "missing_fill": 0, "gaps": 0}
+        held_here = {}            # code -> position in df of a suspect from this batch
+        released = []             # confirmed suspects from earlier batches
+
+        with self.lock:
+            codes = self._bin_codes(ids)
+            for step in reading_steps(codes, ts):
+                c = codes[step]
+                passed, held, settled, confirmed = self._step(c, ts[step], fill[step], flags)
+                keep[step] = passed
+                # The previous suspect of these bins is confirmed or dropped
+                for code, ok in zip(c[settled].tolist(), confirmed[settled].tolist()):
+                    pos = held_here.pop(code, None)
+                    row = self.held.pop(code, None)
+                    if ok and pos is not None:
+                        keep[pos] = True
+                    elif ok and row is not None:
+                        released.append(row)
+                held_here.update(zip(c[held].tolist(), step[held].tolist()))
+            if count:
+                for code, pos in held_here.items():
+                    self.held[code] = df.iloc[[pos]]
+                for name, n in flags.items():
+                    self.counts[name] += n
+                self.counts["accepted"] += int(keep.sum()) + len(released)
+        if released:
+            return pd.concat(released + [df[keep]], ignore_index=True)
+        return df[keep]
+
+    def _step(self, c, t, f, flags):
+        # c: distinct bin codes, one reading each. Returns which readings
+        # pass, which are held back as suspects, which bins had their
+        # previous suspect settled and, of those, which were confirmed.
+        last = self.last_ts[c]
+        seen = last != NAT
+        dup = seen & (t == last)
+        late = seen & (t < last)
+        ok = ~dup & ~late
+        flags["duplicates"] += int(dup.sum())
+        flags["late"] += int(late.sum())
+
+        # Reporting gaps, then the usual interval (EW average)
+        dt = (t - last).astype("float64")
+        usual = self.interval[c]
+        gap = ok & seen & (dt > GAP_FACTOR * usual)
+        for i in np.flatnonzero(gap):
+            self.gaps.append((self.bins[c[i]], pd.Timestamp(last[i]), pd.Timestamp(t[i])))
+        flags["gaps"] += int(gap.sum())
+        step = ok & seen
+        self.interval[c[step]] = np.where(np.isnan(usual[step]), dt[step],
+                                          usual[step] + INTERVAL_ALPHA * (dt[step] - usual[step]))
+        self.last_ts[c[ok]] = t[ok]
+
+        # Spikes against the rolling median / MAD of accepted fills
+        missing = ok & np.isnan(f)
+        flags["missing_fill"] += int(missing.sum())
+        check = ok & ~missing & (np.minimum(self.filled[c], WINDOW) >= MIN_WINDOW)
+        far = np.zeros(len(c), dtype=bool)
+        emptied = np.zeros(len(c), dtype=bool)
+        confirmed = np.zeros(len(c), dtype=bool)
+        if check.any():
+            rows = self.window[c[check]]
+            median = np.nanmedian(rows, axis=1)
+            mad = np.nanmedian(np.abs(rows - median[:, None]), axis=1)
+            limit = np.maximum(MAD_K * MAD_SCALE * mad, MIN_JUMP)
+            far[check] = np.abs(f[check] - median) > limit
+            emptied[check] = far[check] & (f[check] <= NEAR_EMPTY) & (f[check] < median)
+            pending = self.suspect[c[check]]
+            confirmed[check] = far[check] & ~emptied[check] & (np.abs(f[check] - pending) <= limit)
+
+        # A pending suspect is settled by the bin's next fill: confirmed when
+        # it agrees with it, dropped as a spike otherwise
+        settled = ok & ~missing & ~np.isnan(self.suspect[c])
+        flags["outliers"] += int((settled & ~confirmed).sum())
+        flags["level_changes"] += int(confirmed.sum() + emptied.sum())
+        held = far & ~emptied & ~confirmed
+
+        # Level change: the window starts over from the new level
+        if confirmed.any():
+            cc = c[confirmed]
+            self.window[cc] = np.nan
+            self.window[cc, 0] = self.suspect[cc]
+            self.window[cc, 1] = f[confirmed]
+            self.filled[cc] = 2
+        if emptied.any():
+            ce = c[emptied]
+            self.window[ce] = np.nan
+            self.window[ce, 0] = f[emptied]
+            self.filled[ce] = 1
+        plain = ok & ~missing & ~far
+        if plain.any():
+            cp = c[plain]
+            self.window[cp, self.filled[cp] % WINDOW] = f[plain]
+            self.filled[cp] += 1
+        self.suspect[c[settled]] = np.nan
+        self.suspect[c[held]] = f[held]
+        return ok & ~held, held, settled, confirmed
+
+    # --- Held suspects ---
+    def held_rows(self):
+        # The suspects still waiting for their bin's next reading
+        with self.lock:
+            rows = list(self.held.values())
+        return pd.concat(rows, ignore_index=True) if rows else pd.DataFrame()
+
+    def hold(self, rows):
+        # Holds rows (held_rows() of an earlier run) back as suspects again,
+        # after the state was warmed up from stored history
+        if rows.empty:
+            return
+        ids = rows["Bin_ID"].astype(str).to_numpy()
+        ts = rows["Timestamp"].astype("datetime64[ns]").to_numpy().view("int64")
+        fill = pd.to_numeric(rows["Fill_Level(%)"], errors="coerce").to_numpy(dtype="float64")
+        with self.lock:
+            codes = self._bin_codes(ids)
+            self.suspect[codes] = fill
+            self.last_ts[codes] = np.maximum(self.last_ts[codes], ts)
+            for i, code in enumerate(codes.tolist()):
+                self.held[code] = rows.iloc[[i]].reset_index(drop=True)
+
+    # --- Reads ---
+    def stats(self):
+        with self.lock:
+            return dict(self.counts)
+
+    def recent_gaps(self):
+        # Latest reporting gaps, newest first
+        with self.lock:
+            rows = list(self.gaps)[::-1]
+        return pd.DataFrame(rows, columns=["Bin_ID", "From", "To"])
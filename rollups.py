@@ -0,0 +1,250 @@
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from thresholds import DEFAULTS
+
+# --- Hourly / daily rollups per bin ---
+# Updated from each ingest batch, so reports over long ranges read one row
+# per bin per hour/day instead of every raw reading. Each row holds:
+#   count, sum, min, max  of Fill_Level(%)   (mean = sum / count)
+#   above_s               seconds spent at or above the bin's full_at threshold
+# Time above threshold is the gap between a reading and the next one of the
+# same bin (capped at MAX_GAP, so an offline sensor does not count for days),
+# credited to the earlier reading's bucket.
+#
+# Batches are appended as small partial tables. Once they add up to more
+# than COMPACT_RATIO of the main table they are merged into it, so each
+# reading is merged a bounded number of times.
+#
+# With a path, every batch's partial tables are also added to a local
+# SQLite file (one table per frequency, plus each bin's newest reading),
+# which is loaded on start. Rollups therefore outlive the raw readings
+# that retention drops, and a restart does not rescan history. Rows at or
+# before a bin's newest reading already seen are skipped, so replaying a
+# source is safe.
+FREQS = {"hourly": "1h", "daily": "1D"}
+MAX_GAP = pd.Timedelta("1h")
+COMPACT_RATIO = 0.1
+COMPACT_MIN_ROWS = 10_000
+
+# Report ranges longer than this are drawn from rollups instead of raw rows
+ROLLUP_AFTER = pd.Timedelta(days=2)
+
+KEY = ["bucket", "Bin_ID"]
+AGG = {"count": "sum", "sum": "sum", "min": "min", "max": "max", "above_s": "sum"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup_{name} (
+    bucket  INTEGER NOT NULL,   -- ns since epoch
+    bin_id  TEXT NOT NULL,
+    count   INTEGER NOT NULL,
+    sum     REAL NOT NULL,
+    min     REAL,
+    max     REAL,
+    above_s REAL NOT NULL,
+    PRIMARY KEY (bucket, bin_id)
+);
+"""
+STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bin_state (
+    bin_id    TEXT PRIMARY KEY,
+    last_ts   INTEGER NOT NULL,
+    last_fill REAL
+);
+"""
+# Adds a partial row to the stored one (min()/max() of SQLite are NULL if
+# either side is, hence the COALESCE)
+UPSERT = """
+INSERT INTO rollup_{name} (bucket, bin_id, count, sum, min, max, above_s) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (bucket, bin_id) DO UPDATE SET
+    count = count + excluded.count,
+    sum = sum + excluded.sum,
+    min = COALESCE(MIN(min, excluded.min), min, excluded.min),
+    max = COALESCE(MAX(max, excluded.max), max, excluded.max),
+    above_s = above_s + excluded.above_s
+"""
+
+
+def freq_for(start, end, max_points):
+    # Finest rollup that still fits max_points buckets
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    return FREQS["hourly"] if span / pd.Timedelta(FREQS["hourly"]) < max_points else FREQS["daily"]
+
+
+def _merge(frames):
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return _empty()
+    merged = pd.concat(frames, ignore_index=True).groupby(KEY, sort=False).agg(AGG).reset_index()
+    return merged.sort_values("bucket", kind="stable").reset_index(drop=True)
+
+
+def _empty():
+    return pd.DataFrame({
+        "bucket": pd.Series(dtype="datetime64[ns]"), "Bin_ID": pd.Series(dtype=object),
+        "count": pd.Series(dtype="int64"), "sum": pd.Series(dtype="float64"),
+        "min": pd.Series(dtype="float64"), "max": pd.Series(dtype="float64"),
+        "above_s": pd.Series(dtype="float64"),
+    })
+
+
+class Rollups:
+    def __init__(self, thresholds=None, path=None):
+        self.thresholds = thresholds   # ThresholdConfig; None = thresholds.DEFAULTS
+        self.tables = {freq: _empty() for freq in FREQS.values()}
+        self.parts = {freq: [] for freq in FREQS.values()}
+        self.last = {}   # Bin_ID -> (Timestamp, fill) of the newest reading seen
+        self.lock = threading.Lock()
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.executescript("".join(SCHEMA.format(name=name) for name in FREQS) + STATE_SCHEMA)
+            self._load()
+
+    def _load(self):
+        for name, freq in FREQS.items():
+            table = pd.DataFrame(
+                self.db.execute(f"SELECT bucket, bin_id, count, sum, min, max, above_s FROM rollup_{name} "
+                                "ORDER BY bucket").fetchall(),
+                columns=["bucket", "Bin_ID", "count", "sum", "min", "max", "above_s"])
+            if not table.empty:
+                self.tables[freq] = table.astype(_empty().dtypes.to_dict()).assign(
+                    bucket=pd.to_datetime(table["bucket"].astype("int64"), unit="ns"))
+        for bin_id, ts, fill in self.db.execute("SELECT bin_id, last_ts, last_fill FROM bin_state"):
+            self.last[bin_id] = (pd.Timestamp(ts, unit="ns"), fill)
+
+    def _save(self, stats, newest):
+        # stats: freq -> partial table of this batch
+        with self.db:
+            for name, freq in FREQS.items():
+                part = _merge([stats[freq]])
+                self.db.executemany(UPSERT.format(name=name), zip(
+                    part["bucket"].astype("datetime64[ns]").to_numpy().view("int64").tolist(),
+                    part["Bin_ID"].tolist(), part["count"].astype("int64").tolist(), part["sum"].tolist(),
+                    part["min"].astype(object).where(part["min"].notna(), None).tolist(),
+                    part["max"].astype(object).where(part["max"].notna(), None).tolist(),
+                    part["above_s"].tolist()))
+            self.db.executemany(
+                "INSERT INTO bin_state (bin_id, last_ts, last_fill) VALUES (?, ?, ?) "
+                "ON CONFLICT(bin_id) DO UPDATE SET last_ts = excluded.last_ts, last_fill = excluded.last_fill",
+                [(bin_id, self.last[bin_id][0].value, self.last[bin_id][1]) for bin_id in newest])
+
+    # --- Ingest ---
+    def update(self, batch):
+        if batch.empty:
+            return
+        b = batch[["Bin_ID", "Timestamp", "Fill_Level(%)"]].dropna()
+        b = b.assign(
+            Bin_ID=b["Bin_ID"].astype(str),
+            Timestamp=b["Timestamp"].astype("datetime64[ns]"),
+            fill=b["Fill_Level(%)"].astype("float64"),
+        ).sort_values(["Bin_ID", "Timestamp"], kind="stable")
+        if b.empty:
+            return
+
+        with self.lock:
+            if self.last:
+                seen = b["Bin_ID"].map(pd.Series({bin_id: ts for bin_id, (ts, _) in self.last.items()}))
+                b = b[seen.isna() | (b["Timestamp"] > seen)]
+                if b.empty:
+                    return
+            # Previous reading of every row: inside the batch, or the last one kept per bin
+            grouped = b.groupby("Bin_ID", sort=False)
+            prev_ts = grouped["Timestamp"].shift()
+            prev_fill = grouped["fill"].shift()
+            first = prev_ts.isna()
+            if self.last:
+                carried = b.loc[first, "Bin_ID"].map(self.last)
+                has_prev = carried.notna()
+                idx = carried[has_prev].index
+                prev_ts.loc[idx] = pd.to_datetime([p[0] for p in carried[has_prev]])
+                prev_fill.loc[idx] = [p[1] for p in carried[has_prev]]
+
+            gap = (b["Timestamp"] - prev_ts).clip(upper=MAX_GAP).dt.total_seconds()
+            if self.thresholds is None:
+                full_at = DEFAULTS["full_at"]
+            else:
+                full_at = self.thresholds.resolve(b["Bin_ID"])["full_at"].to_numpy()
+            above = np.where(prev_fill >= full_at, gap.fillna(0), 0.0)
+            credit = pd.DataFrame({"Bin_ID": b["Bin_ID"], "prev_ts": prev_ts, "above_s": above})
+            credit = credit[credit["above_s"] > 0]
+
+            batch_stats = {}
+            for freq in FREQS.values():
+                stats = (
+                    b.groupby([b["Timestamp"].dt.floor(freq).rename("bucket"), "Bin_ID"], sort=False)["fill"]
+                    .agg(["count", "sum", "min", "max"])
+                    .reset_index()
+                    .assign(above_s=0.0)
+                )
+                if not credit.empty:
+                    extra = (
+                        credit.groupby([credit["prev_ts"].dt.floor(freq).rename("bucket"), "Bin_ID"], sort=False)["above_s"]
+                        .sum()
+                        .reset_index()
+                        .assign(count=0, sum=0.0, min=np.nan, max=np.nan)
+                    )
+                    stats = pd.concat([stats, extra], ignore_index=True)
+                self.parts[freq].append(stats)
+                batch_stats[freq] = stats
+                self._maybe_compact(freq)
+
+            newest = b.groupby("Bin_ID", sort=False).tail(1)
+            for bin_id, ts, fill in zip(newest["Bin_ID"], newest["Timestamp"], newest["fill"]):
+                if bin_id not in self.last or ts >= self.last[bin_id][0]:
+                    self.last[bin_id] = (ts, fill)
+            if self.db is not None:
+                self._save(batch_stats, newest["Bin_ID"].tolist())
+
+    def _maybe_compact(self, freq, force=False):
+        pending = sum(len(p) for p in self.parts[freq])
+        if pending and (force or pending > max(COMPACT_MIN_ROWS, COMPACT_RATIO * len(self.tables[freq]))):
+            self.tables[freq] = _merge([self.tables[freq]] + self.parts[freq])
+            self.parts[freq] = []
+
+    # --- Queries ---
+    def query(self, freq, start=None, end=None, bins=None):
+        # One row per (bucket, Bin_ID) for buckets overlapping [start, end), with a mean column
+        with self.lock:
+            table = self.tables[freq]
+            buckets = table["bucket"].to_numpy()
+            lo = 0 if start is None else np.searchsorted(buckets, np.datetime64(pd.Timestamp(start).floor(freq), "ns"))
+            hi = len(table) if end is None else np.searchsorted(buckets, np.datetime64(pd.Timestamp(end), "ns"))
+            frames = [table.iloc[lo:hi]]
+            for part in self.parts[freq]:
+                mask = np.ones(len(part), dtype=bool)
+                if start is not None:
+                    mask &= (part["bucket"] >= pd.Timestamp(start).floor(freq)).to_numpy()
+                if end is not None:
+                    mask &= (part["bucket"] < pd.Timestamp(end)).to_numpy()
+                frames.append(part[mask])
+
+        result = _merge(frames) if len(frames) > 1 else frames[0].copy()
+        if bins is not None:
+            result = result[result["Bin_ID"].isin([str(b) for b in bins])]
+        return result.assign(mean=result["sum"] / result["count"].where(result["count"] > 0))
+
+    def pivot(self, freq, start=None, end=None, bins=None, stat="mean"):
+        # bucket x Bin_ID table of one statistic, ready for st.line_chart
+        rows = self.query(freq, start, end, bins)
+        return rows.pivot(index="bucket", columns="Bin_ID", values=stat).sort_index()
+
+    def summary(self, freq="1D", start=None, end=None, bins=None):
+        # One row per bin over the whole range
+        rows = self.query(freq, start, end, bins)
+        out = rows.groupby("Bin_ID").agg(readings=("count", "sum"), total=("sum", "sum"),
+                                         min=("min", "min"), max=("max", "max"), above_s=("above_s", "sum"))
+        out["mean"] = out["total"] / out["readings"].where(out["readings"] > 0)
+        out["hours_above"] = out["above_s"] / 3600
+        return out[["readings", "min", "mean", "max", "hours_above"]]
+
+    def time_range(self):
+        with self.lock:
+            if not self.last:
+                return None, None
+            first = [t["bucket"].iloc[0] for t in self.tables.values() if not t.empty]
+            first += [p["bucket"].min() for parts in self.parts.values() for p in parts if not p.empty]
+            return min(first), max(ts for ts, _ in self.last.values())
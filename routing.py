@@ -0,0 +1,114 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from bin_map import TRX_CENTER
+
+# --- Collection route planning ---
+# Picks the bins that are FULL or forecast to be full within a horizon and
+# splits them into truck routes that start and end at the depot:
+#   1. one distance matrix (haversine, km) for depot + stops, built with numpy
+#   2. nearest neighbour: each truck takes the closest stop that still fits
+#      its capacity, and returns to the depot when none does
+#   3. 2-opt on every route: reverse the segment that shortens it most,
+#      until no reversal helps (or TIME_LIMIT runs out)
+# Loads are in bins' worth of waste (a 100% full bin = 1.0), so a truck's
+# capacity is how many full bins it can take.
+DEPOT = TRX_CENTER
+TRUCK_CAPACITY = 40.0
+TIME_LIMIT = 0.8          # seconds for the whole plan
+EARTH_KM = 6371.0
+
+
+def distance_matrix(lat, lon):
+    lat, lon = np.radians(np.asarray(lat, dtype=float)), np.radians(np.asarray(lon, dtype=float))
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def route_candidates(classified, within_hours=3):
+    # Bins with a position that are FULL, or forecast to be within the horizon
+    soon = classified["Fill_Rank"] == 2
+    if "Hours_To_Full" in classified.columns:
+        soon |= classified["Hours_To_Full"] <= within_hours
+    return classified[soon & classified["Lat"].notna() & classified["Lon"].notna()]
+
+
+def _nearest_neighbour(dist, load, capacity):
+    # dist: (n + 1) x (n + 1) with the depot at 0; returns lists of stop indexes (1..n)
+    n = len(load)
+    left = np.ones(n + 1, dtype=bool)
+    left[0] = False
+    routes = []
+    while left.any():
+        route, at, used = [], 0, 0.0
+        while True:
+            fits = left & (used + np.r_[0.0, load] <= capacity)
+            if not fits.any():
+                break
+            nxt = int(np.argmin(np.where(fits, dist[at], np.inf)))
+            route.append(nxt)
+            used += load[nxt - 1]
+            left[nxt] = False
+            at = nxt
+        if not route:
+            # A stop larger than a whole truck still gets its own trip
+            nxt = int(np.flatnonzero(left)[0])
+            route, left[nxt] = [nxt], False
+        routes.append(route)
+    return routes
+
+
+def _two_opt(route, dist, deadline):
+    # route: stop indexes; the depot (0) closes both ends
+    path = np.array([0] + route + [0])
+    n = len(path)
+    if n < 5:
+        return route
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(1, n - 2):
+            # Reversing path[i:j+1] swaps edges (i-1, i), (j, j+1) for (i-1, j), (i, j+1)
+            j = np.arange(i + 1, n - 1)
+            a, b = path[i - 1], path[i]
+            gain = dist[a, b] + dist[path[j], path[j + 1]] - dist[a, path[j]] - dist[b, path[j + 1]]
+            best = int(np.argmax(gain))
+            if gain[best] > 1e-9:
+                k = j[best]
+                path[i:k + 1] = path[i:k + 1][::-1]
+                improved = True
+    return path[1:-1].tolist()
+
+
+def plan_routes(stops, depot=DEPOT, capacity=TRUCK_CAPACITY):
+    # stops: Bin_ID, Lat, Lon, Fill_Level(%). Returns one row per stop in
+    # driving order (Route, Stop, Bin_ID, Lat, Lon, Load, Km from the previous
+    # stop) and one row per route (Route, Stops, Load, Km incl. the way back).
+    deadline = time.perf_counter() + TIME_LIMIT
+    columns = ["Route", "Stop", "Bin_ID", "Lat", "Lon", "Load", "Km"]
+    if stops.empty:
+        return pd.DataFrame(columns=columns), pd.DataFrame(columns=["Route", "Stops", "Load", "Km"])
+
+    lat = np.r_[depot[0], stops["Lat"].to_numpy(dtype=float)]
+    lon = np.r_[depot[1], stops["Lon"].to_numpy(dtype=float)]
+    load = np.clip(stops["Fill_Level(%)"].to_numpy(dtype=float) / 100, 0, None)
+    load = np.nan_to_num(load, nan=1.0)
+    dist = distance_matrix(lat, lon)
+
+    routes = [_two_opt(r, dist, deadline) for r in _nearest_neighbour(dist, load, capacity)]
+
+    rows, totals = [], []
+    ids = stops["Bin_ID"].astype(str).to_numpy()
+    for number, route in enumerate(routes, 1):
+        path = [0] + route + [0]
+        legs = dist[path[:-1], path[1:]]
+        for stop, (idx, km) in enumerate(zip(route, legs), 1):
+            rows.append((number, stop, ids[idx - 1], lat[idx], lon[idx], load[idx - 1], km))
+        totals.append((number, len(route), load[np.array(route) - 1].sum(), legs.sum()))
+    plan = pd.DataFrame(rows, columns=columns)
+    summary = pd.DataFrame(totals, columns=["Route", "Stops", "Load", "Km"])
+    return plan, summary
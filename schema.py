@@ -0,0 +1,197 @@
+import json
+import logging
+import os
+import threading
+
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+# --- Per-source schema registry ---
+# Which column is the timestamp / bin / fill / battery, and the exact
+# datetime format, are worked out once per source and saved. Later loads
+# parse with that explicit format instead of letting pandas guess per row.
+# A source can change its format (a new logger firmware, an edited sheet):
+# when more than REDETECT_SHARE of a batch's newest timestamps no longer
+# parse, the format is detected again. Single rows that still fail are
+# parsed by letting pandas infer their format, and rows left without a
+# timestamp or bin are dropped and logged.
+CANONICAL = {
+    "time": "Timestamp",
+    "bin": "Bin_ID",
+    "fill": "Fill_Level(%)",
+    "battery": "Battery_Level(%)",
+}
+
+# Tried in order: day-first comes before month-first, like the sheets we use
+DATETIME_FORMATS = [
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%dT%H:%M:%S",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y %H:%M",
+    "%d/%m/%Y",
+    "%Y-%m-%d",
+]
+
+SAMPLE_SIZE = 500
+REDETECT_SHARE = 0.1
+
+
+def _find_column(columns, preferred, keys):
+    if preferred in columns:
+        return preferred
+    return next((c for c in columns if any(k in c.lower() for k in keys)), None)
+
+
+def _text(values):
+    text = values.dropna().astype(str).str.strip()
+    return text[text != ""]
+
+
+def _parse(values, fmt):
+    return pd.to_datetime(values, errors="coerce", format="ISO8601" if fmt is None else fmt)
+
+
+def _detect_format(values):
+    sample = _text(values).head(SAMPLE_SIZE)
+    if sample.empty:
+        return None
+    for fmt in DATETIME_FORMATS:
+        if _parse(sample, fmt).notna().all():
+            return fmt
+    return None
+
+
+def _best_format(sample):
+    # The format that parses most of sample, with its share of failures
+    fails = {fmt: float(_parse(sample, fmt).isna().mean()) for fmt in DATETIME_FORMATS}
+    fmt = min(fails, key=fails.get)
+    return fmt, fails[fmt]
+
+
+def _parse_any(values):
+    # Each value in the first of DATETIME_FORMATS / ISO 8601 that reads it,
+    # then whatever pandas infers for the rest
+    text = values.astype(str).str.strip()
+    times = _parse(text, None)
+    for fmt in DATETIME_FORMATS:
+        left = times.isna()
+        if not left.any():
+            break
+        times[left] = _parse(text[left], fmt)
+    left = times.isna()
+    if left.any():
+        times[left] = pd.to_datetime(text[left], errors="coerce", format="mixed")
+    return times
+
+
+def detect(df):
+    # Returns {"time": col, "bin": col, "fill": col, "battery": col or None,
+    #          "time_format": strptime format or None for ISO 8601}
+    columns = list(df.columns)
+    schema = {
+        "time": _find_column(columns, "Timestamp", ("timestamp", "time", "stamp")),
+        "bin": _find_column(columns, "Bin_ID", ("bin",)),
+        "fill": _find_column(columns, "Fill_Level(%)", ("fill",)),
+        "battery": _find_column(columns, "Battery_Level(%)", ("battery",)),
+    }
+    missing = [key for key in ("time", "bin", "fill") if schema[key] is None]
+    if missing:
+        raise ValueError(f"Sheet missing required columns ({', '.join(missing)}). Detected columns: {columns}")
+
+    times = df[schema["time"]]
+    if pd.api.types.is_datetime64_any_dtype(times):
+        schema["time_format"] = None
+    else:
+        schema["time_format"] = _detect_format(times)
+        if schema["time_format"] is None and times.notna().any():
+            raise ValueError(f"Unrecognised datetime format in '{schema['time']}', e.g. {times.dropna().iloc[0]!r}")
+    return schema
+
+
+def _to_number(values):
+    # "85%" -> 85.0
+    if not pd.api.types.is_numeric_dtype(values):
+        values = values.astype(str).str.replace("%", "", regex=False)
+    return pd.to_numeric(values, errors="coerce")
+
+
+def apply(schema, df):
+    # Rename to the canonical columns and convert with the stored format
+    missing = [schema[k] for k in ("time", "bin", "fill") if schema[k] not in df.columns]
+    if missing:
+        raise ValueError(f"Columns {missing} disappeared from the source. Detected columns: {df.columns.tolist()}")
+
+    rename = {schema[k]: CANONICAL[k] for k in CANONICAL if schema.get(k) in df.columns}
+    df = df.rename(columns=rename)
+
+    raw = df["Timestamp"]
+    if pd.api.types.is_datetime64_any_dtype(raw):
+        times = raw
+    else:
+        times = _parse(raw, schema["time_format"])
+        failed = times.isna() & raw.notna() & (raw.astype(str).str.strip() != "")
+        if failed.any():
+            times[failed] = _parse_any(raw[failed])
+    df["Timestamp"] = times
+    df["Bin_ID"] = df["Bin_ID"].where(df["Bin_ID"].isna(), df["Bin_ID"].astype(str))
+    for col in ("Fill_Level(%)", "Battery_Level(%)"):
+        if col in df.columns:
+            df[col] = _to_number(df[col]).astype("float32")
+    out = df.dropna(subset=["Timestamp", "Bin_ID"]).reset_index(drop=True)
+    if len(out) < len(df):
+        log.warning("Dropped %d of %d rows without a readable timestamp or bin", len(df) - len(out), len(df))
+    return out
+
+
+class SchemaRegistry:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.schemas = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.schemas = json.load(f)
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.schemas, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def resolve(self, source, df):
+        # Stored schema if it still fits the data, otherwise detect and store
+        with self.lock:
+            schema = self.schemas.get(source)
+            if schema is None or any(schema[k] not in df.columns for k in ("time", "bin", "fill")):
+                schema = detect(df)
+            elif not pd.api.types.is_datetime64_any_dtype(df[schema["time"]]):
+                schema = self._check_format(source, schema, df[schema["time"]])
+            if schema is not self.schemas.get(source):
+                self.schemas[source] = schema
+                self._save()
+            return schema
+
+    def _check_format(self, source, schema, times):
+        # schema with a new time_format if the stored one misses more than
+        # REDETECT_SHARE of the newest timestamps and another reads more
+        sample = _text(times).tail(SAMPLE_SIZE)
+        if sample.empty:
+            return schema
+        fails = float(_parse(sample, schema["time_format"]).isna().mean())
+        if fails <= REDETECT_SHARE:
+            return schema
+        fmt, new_fails = _best_format(sample)
+        if new_fails >= fails:
+            return schema
+        log.warning("Timestamp format of %s changed from %s to %s", source, schema["time_format"], fmt)
+        return dict(schema, time_format=fmt)
+
+    def forget(self, source):
+        with self.lock:
+            if self.schemas.pop(source, None) is not None:
+                self._save()
@@ -0,0 +1,205 @@
+import bisect
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# --- Device search index ---
+# Bins are found by Bin_ID, location name and zone without scanning every
+# row. A Bin_ID is only ever matched as a whole: the query (lowercased) is
+# looked up as an ID, then as a part of IDs (shortlisted by trigram, then
+# checked as a substring; a prefix for queries under GRAM characters). IDs
+# share their words ("bin", "b"), so they are never split into pieces.
+# When no ID matches, the query's words are matched against the location
+# and zone: each field is lowercased and split into words; the words and
+# the whole field value are the index tokens:
+#   ids     lowercased Bin_ID -> Bin_ID, plus a sorted list and trigrams
+#   tokens  token -> set of Bin_IDs, plus a sorted token list for prefixes
+#   grams   trigram -> set of tokens, to find substrings and near misses
+# A word matches a bin when one of its tokens starts with the word (short
+# words) or contains it (3+ characters). All words must match. When
+# nothing matches either way, IDs and tokens within FUZZY_DISTANCE edits
+# of the query / its words are used instead.
+# Only the bins that changed are re-indexed (see update).
+FIELDS = ("Bin_ID", "Location", "Zone")
+TEXT_FIELDS = FIELDS[1:]
+GRAM = 3
+FUZZY_DISTANCE = 1        # edits allowed for terms up to 6 characters
+FUZZY_DISTANCE_LONG = 2   # ... and for longer ones
+RESULT_CACHE_SIZE = 64
+
+_split = re.compile(r"[^0-9a-z]+")
+
+
+def _tokens(values):
+    out = set()
+    for value in values:
+        if value is None or value != value:   # None / NaN
+            continue
+        value = str(value).lower().strip()
+        if value:
+            out.add(value)
+            out.update(w for w in _split.split(value) if w)
+    return out
+
+
+def _grams(token):
+    return {token[i:i + GRAM] for i in range(len(token) - GRAM + 1)}
+
+
+def _distance(a, b, limit):
+    # Levenshtein distance, giving up (limit + 1) once it must exceed limit
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+class SearchIndex:
+    def __init__(self):
+        self.docs = {}        # Bin_ID -> its tokens
+        self.ids = {}         # lowercased Bin_ID -> Bin_ID
+        self.sorted_ids = []  # lowercased Bin_IDs, sorted (prefix search)
+        self.id_grams = {}    # trigram -> set of lowercased Bin_IDs
+        self.tokens = {}      # token -> set of Bin_IDs
+        self.sorted = []      # every token, sorted (prefix search)
+        self.grams = {}       # trigram -> set of tokens
+        self.lock = threading.Lock()
+        self._results = OrderedDict()   # query -> matching Bin_IDs
+
+    def __len__(self):
+        return len(self.docs)
+
+    # --- Building ---
+    def _add_token(self, token, bin_id):
+        docs = self.tokens.get(token)
+        if docs is None:
+            docs = self.tokens[token] = set()
+            bisect.insort(self.sorted, token)
+            for gram in _grams(token):
+                self.grams.setdefault(gram, set()).add(token)
+        docs.add(bin_id)
+
+    def _remove_token(self, token, bin_id):
+        docs = self.tokens[token]
+        docs.discard(bin_id)
+        if docs:
+            return
+        del self.tokens[token]
+        del self.sorted[bisect.bisect_left(self.sorted, token)]
+        for gram in _grams(token):
+            self.grams[gram].discard(token)
+            if not self.grams[gram]:
+                del self.grams[gram]
+
+    def _add_id(self, bin_id):
+        key = bin_id.lower()
+        if key in self.ids:
+            return
+        self.ids[key] = bin_id
+        bisect.insort(self.sorted_ids, key)
+        for gram in _grams(key):
+            self.id_grams.setdefault(gram, set()).add(key)
+
+    def update(self, rows):
+        # rows: DataFrame with Bin_ID and any of FIELDS; re-indexes those bins only
+        fields = [f for f in FIELDS if f in rows.columns]
+        with self.lock:
+            for values in zip(*(rows[f].to_numpy(dtype=object) for f in fields)):
+                bin_id = str(values[0])
+                self._add_id(bin_id)
+                new = _tokens(values[1:])
+                old = self.docs.get(bin_id, set())
+                for token in old - new:
+                    self._remove_token(token, bin_id)
+                for token in new - old:
+                    self._add_token(token, bin_id)
+                self.docs[bin_id] = new
+            self._results.clear()
+
+    # --- Searching ---
+    def _prefixed(self, term, keys=None):
+        keys = self.sorted if keys is None else keys
+        start = bisect.bisect_left(keys, term)
+        end = bisect.bisect_left(keys, term + "\uffff")
+        return keys[start:end]
+
+    def _containing(self, term, grams=None):
+        grams = self.grams if grams is None else grams
+        candidates = None
+        for gram in _grams(term):
+            keys = grams.get(gram, set())
+            candidates = keys if candidates is None else candidates & keys
+            if not candidates:
+                return []
+        return [k for k in candidates if term in k]
+
+    def _near(self, term, grams=None, keys=None):
+        grams = self.grams if grams is None else grams
+        limit = FUZZY_DISTANCE if len(term) <= 6 else FUZZY_DISTANCE_LONG
+        candidates = set()
+        for gram in _grams(term):
+            candidates |= grams.get(gram, set())
+        if len(term) < GRAM:
+            candidates = self._prefixed(term[:1], keys)
+        return [k for k in candidates if _distance(term, k, limit) <= limit]
+
+    def _match_ids(self, query, fuzzy):
+        # IDs equal to query, else containing it (starting with it when short),
+        # else (fuzzy) near it
+        if query in self.ids:
+            keys = [query]
+        elif len(query) < GRAM:
+            keys = self._prefixed(query, self.sorted_ids)
+        else:
+            keys = self._containing(query, self.id_grams)
+        if not keys and fuzzy:
+            keys = self._near(query, self.id_grams, self.sorted_ids)
+        return {self.ids[k] for k in keys}
+
+    def _match_term(self, term, fuzzy):
+        tokens = self._prefixed(term) if len(term) < GRAM else self._containing(term)
+        if not tokens and fuzzy:
+            tokens = self._near(term)
+        docs = set()
+        for token in tokens:
+            docs |= self.tokens[token]
+        return docs
+
+    def _match_text(self, terms, fuzzy):
+        docs = None
+        for term in terms:
+            found = self._match_term(term, fuzzy)
+            docs = found if docs is None else docs & found
+            if not docs:
+                break
+        return docs or set()
+
+    def search(self, query, fuzzy=True):
+        # Bin_IDs matching query (None = empty query, no filter)
+        query = str(query).lower().strip()
+        terms = [t for t in _split.split(query) if t]
+        if not terms:
+            return None
+        key = (query, fuzzy)
+        with self.lock:
+            hits = self._results.get(key)
+            if hits is not None:
+                self._results.move_to_end(key)
+                return hits
+            docs = self._match_ids(query, False) or self._match_text(terms, False)
+            if not docs and fuzzy:
+                docs = self._match_ids(query, True) | self._match_text(terms, True)
+            hits = np.array(sorted(docs), dtype=object)
+            self._results[key] = hits
+            if len(self._results) > RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+            return hits
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from alerts import AlertEngine
+from thresholds import ThresholdConfig
+
+
+def _readings(fills, bin_id="Bin_1", start="2024-05-01 08:00"):
+    return pd.DataFrame({
+        "Bin_ID": bin_id,
+        "Timestamp": pd.Timestamp(start) + pd.to_timedelta(np.arange(len(fills)) * 15, "min"),
+        "Fill_Level(%)": np.array(fills, dtype="float32"),
+    })
+
+
+def test_alert_opens_at_full_and_closes_below_close_at(tmp_path):
+    alerts = AlertEngine(str(tmp_path / "alerts.sqlite"))   # full_at 70, close_at 60
+    alerts.evaluate(_readings([50, 72, 65, 71, 64, 58]))
+    history = alerts.history()
+    assert len(history) == 1   # 65 and 64 sit in the band: still the one alert
+    assert history.loc[0, "Open_Fill"] == 72
+    assert history.loc[0, "Close_Fill"] == 58
+    assert alerts.kpis() == {"open": 0, "opened_today": 1, "resolved_today": 1}
+
+
+def test_streamed_batches_match_one_batch(tmp_path):
+    fills = [50, 72, 65, 58, 75, 80]
+    whole = AlertEngine(str(tmp_path / "a.sqlite"))
+    whole.evaluate(_readings(fills))
+    streamed = AlertEngine(str(tmp_path / "b.sqlite"))
+    df = _readings(fills)
+    for i in range(len(df)):
+        streamed.evaluate(df.iloc[[i]])
+    assert whole.kpis() == streamed.kpis() == {"open": 1, "opened_today": 2, "resolved_today": 1}
+    pd.testing.assert_frame_equal(whole.open_alerts(), streamed.open_alerts())
+
+
+def test_replayed_rows_are_skipped_and_state_survives_a_restart(tmp_path):
+    path = str(tmp_path / "alerts.sqlite")
+    df = _readings([50, 75])
+    AlertEngine(path).evaluate(df)
+    again = AlertEngine(path)
+    again.evaluate(df)   # replay: nothing new
+    assert again.kpis()["open"] == 1
+    assert len(again.db.execute("SELECT * FROM alerts").fetchall()) == 1
+    again.evaluate(_readings([40], start="2024-05-01 09:00"))
+    assert again.kpis()["open"] == 0
+
+
+def test_collection_resolves_the_open_alert(tmp_path):
+    alerts = AlertEngine(str(tmp_path / "alerts.sqlite"))
+    alerts.evaluate(_readings([80]))
+    alerts.resolve(pd.DataFrame({"Bin_ID": ["Bin_1"], "Collected": [pd.Timestamp("2024-05-01 08:30")],
+                                 "Fill_After": [62.0]}))   # emptied, but still above close_at
+    assert alerts.kpis()["open"] == 0
+    assert alerts.history().loc[0, "Close_Fill"] == 62
+
+
+def test_per_bin_thresholds(tmp_path):
+    config = ThresholdConfig(None)
+    config.set(bin_id="Bin_2", full_at=90, close_at=80)
+    alerts = AlertEngine(str(tmp_path / "alerts.sqlite"), config)
+    alerts.evaluate(pd.concat([_readings([75], "Bin_1"), _readings([75], "Bin_2")]))
+    assert alerts.open_alerts()["Bin_ID"].tolist() == ["Bin_1"]
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from collection_events import CollectionLog
+
+
+def _readings(fills, bin_id="Bin_1", start="2024-05-01 08:00", every=60):
+    return pd.DataFrame({
+        "Bin_ID": bin_id,
+        "Timestamp": pd.Timestamp(start) + pd.to_timedelta(np.arange(len(fills)) * every, "min"),
+        "Fill_Level(%)": np.array(fills, dtype="float32"),
+    })
+
+
+def test_a_large_drop_is_a_collection(tmp_path):
+    log = CollectionLog(str(tmp_path / "c.sqlite"))
+    events = log.detect(_readings([60, 85, 90, 5, 10, 15]))   # 85 -> 90 -> 5: one emptying
+    assert events["Fill_Before"].tolist() == [90]
+    assert events["Fill_After"].tolist() == [5]
+    assert events["Collected"].tolist() == [pd.Timestamp("2024-05-01 11:00")]
+    assert log.kpis()["collected_today"] == 1
+
+
+def test_small_drops_are_not_collections(tmp_path):
+    log = CollectionLog(str(tmp_path / "c.sqlite"))
+    assert log.detect(_readings([60, 50, 45, 40])).empty
+
+
+def test_drop_across_batches_and_a_restart(tmp_path):
+    path = str(tmp_path / "c.sqlite")
+    df = _readings([80, 90, 10])
+    CollectionLog(path).detect(df.iloc[:2])
+    again = CollectionLog(path)   # previous reading comes from bin_state
+    assert again.detect(df.iloc[2:])["Fill_Before"].tolist() == [90]
+    assert again.detect(df).empty   # replayed rows are skipped
+    assert again.kpis()["collected_today"] == 1
+
+
+def test_stats_per_bin(tmp_path):
+    log = CollectionLog(str(tmp_path / "c.sqlite"))
+    log.detect(pd.concat([_readings([90, 5, 95, 8, 90, 2]), _readings([70, 60], "Bin_2")]))
+    stats = log.stats()
+    assert stats.index.tolist() == ["Bin_1"]
+    assert stats.loc["Bin_1", "collections"] == 3
+    assert stats.loc["Bin_1", "hours_between"] == 2
+    assert log.stats(start="2024-05-01 10:00", bins=["Bin_1"]).loc["Bin_1", "collections"] == 2
@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from column_store import ColumnStore
+
+
+def _batch(start, n, **extra):
+    df = pd.DataFrame({
+        "Timestamp": pd.date_range(start, periods=n, freq="h"),
+        "Bin_ID": [f"Bin_{i % 3}" for i in range(n)],
+        "Fill_Level(%)": np.arange(n, dtype=float),
+    })
+    return df.assign(**extra)
+
+
+def test_reopen_reads_what_was_appended(tmp_path):
+    store = ColumnStore(str(tmp_path))
+    store.append(_batch("2024-05-01", 10))
+    store.append(_batch("2024-05-02", 5))
+
+    again = ColumnStore(str(tmp_path))
+    df = again.to_frame()
+    assert again.rows == 15
+    assert df["Fill_Level(%)"].dtype == np.float32
+    assert isinstance(df["Bin_ID"].dtype, pd.CategoricalDtype)
+    assert list(df["Fill_Level(%)"][10:]) == [0, 1, 2, 3, 4]
+
+
+def test_open_cuts_bytes_past_the_saved_rows(tmp_path):
+    store = ColumnStore(str(tmp_path))
+    store.append(_batch("2024-05-01", 4))
+    # A crash after a column file was appended but before meta.json was saved
+    fname = store.meta["columns"][2][3]
+    with open(os.path.join(str(tmp_path), fname), "ab") as f:
+        np.full(3, 99, dtype="float32").tofile(f)
+
+    again = ColumnStore(str(tmp_path))
+    again.append(_batch("2024-05-02", 2))
+    assert list(again.to_frame()["Fill_Level(%)"]) == [0, 1, 2, 3, 0, 1]
+
+
+def test_column_added_in_a_later_batch_is_backfilled(tmp_path):
+    store = ColumnStore(str(tmp_path))
+    store.append(_batch("2024-05-01", 3))
+    store.append(_batch("2024-05-02", 2, Status=["ok", "full"], **{"Battery_Level(%)": [80.0, 70.0]}))
+    store.append(_batch("2024-05-03", 1))
+
+    df = ColumnStore(str(tmp_path)).to_frame()
+    assert len(df) == 6
+    assert df["Status"].isna().tolist() == [True, True, True, False, False, True]
+    assert list(df["Status"][3:5]) == ["ok", "full"]
+    assert df["Battery_Level(%)"].isna().sum() == 4
+
+
+def test_all_nan_first_batch_stays_text(tmp_path):
+    store = ColumnStore(str(tmp_path))
+    store.append(_batch("2024-05-01", 2, Status=np.nan))
+    store.append(_batch("2024-05-02", 1, Status="full"))
+    assert list(store.to_frame()["Status"].astype(object).fillna("-")) == ["-", "-", "full"]
+
+
+def test_query_by_time_and_bins(tmp_path):
+    store = ColumnStore(str(tmp_path))
+    store.append(_batch("2024-05-01", 24))
+    df = store.query("2024-05-01 06:00", "2024-05-01 12:00", bins=["Bin_0"])
+    assert list(df["Timestamp"].dt.hour) == [6, 9]
+    assert set(df["Bin_ID"]) == {"Bin_0"}
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from downsample import bucket_for, bucketed_pivot, downsample, lttb
+
+
+def _series(n, start="2024-05-01"):
+    return pd.DataFrame({
+        "Timestamp": pd.date_range(start, periods=n, freq="1min"),
+        "Fill": np.sin(np.linspace(0, 20, n)) * 40 + 50,
+    })
+
+
+def test_lttb_keeps_ends_and_peaks():
+    y = np.zeros(1000)
+    y[437], y[811] = 100.0, -100.0
+    picked = lttb(np.arange(1000), y, 50)
+    assert len(picked) == 50
+    assert picked[0] == 0 and picked[-1] == 999
+    assert (np.diff(picked) > 0).all()
+    assert {437, 811} <= set(picked.tolist())
+
+
+def test_lttb_returns_everything_when_it_fits():
+    assert lttb(np.arange(10), np.arange(10), 10).tolist() == list(range(10))
+    assert lttb(np.arange(10), np.arange(10), 2).tolist() == list(range(10))
+
+
+def test_downsample_picks_real_readings():
+    df = _series(5000)
+    out = downsample(df, "Timestamp", "Fill", max_points=300)
+    assert len(out) == 300
+    pd.testing.assert_frame_equal(out, df.loc[out.index])
+
+
+def test_bucket_downsample_averages_per_bucket():
+    out = downsample(_series(5000), "Timestamp", "Fill", max_points=300, method="bucket")
+    assert len(out) <= 300
+    assert (out["Timestamp"].diff().dropna() == pd.Timedelta("30min")).all()
+
+
+def test_short_series_and_missing_values_pass_through():
+    df = _series(10)
+    df.loc[3, "Fill"] = np.nan
+    assert downsample(df, "Timestamp", "Fill", max_points=300).index.tolist() == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+
+
+def test_bucket_for_picks_the_smallest_width_that_fits():
+    assert bucket_for("2024-05-01", "2024-05-02", max_points=2000) == "1min"
+    assert bucket_for("2024-05-01", "2024-05-31", max_points=2000) == "30min"
+    assert bucket_for("2000-01-01", "2024-01-01", max_points=10) == "30D"
+
+
+def test_bucketed_pivot_shares_one_time_axis():
+    df = pd.concat([_series(3000).assign(Bin_ID="Bin_1"), _series(3000).assign(Bin_ID="Bin_2")])
+    pivot, freq = bucketed_pivot(df, "Timestamp", "Bin_ID", "Fill", max_points=500)
+    assert freq == "15min"
+    assert list(pivot.columns) == ["Bin_1", "Bin_2"]
+    assert len(pivot) <= 500
+    pd.testing.assert_series_equal(pivot["Bin_1"], pivot["Bin_2"], check_names=False)
+
+    pivot, freq = bucketed_pivot(df, "Timestamp", "Bin_ID", "Fill", max_points=5000)
+    assert freq is None and len(pivot) == 3000
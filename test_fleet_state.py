@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from fleet_state import FleetState
+
+
+def _batch(ids, hours, fill, **extra):
+    return pd.DataFrame({
+        "Bin_ID": ids,
+        "Timestamp": pd.Timestamp("2024-05-01") + pd.to_timedelta(hours, unit="h"),
+        "Fill_Level(%)": np.array(fill, dtype="float32"),
+        **extra,
+    })
+
+
+def test_keeps_the_newest_reading_per_bin():
+    state = FleetState()
+    state.update(_batch(["Bin_1", "Bin_2", "Bin_1"], [1, 2, 3], [10, 20, 30]))
+    state.update(_batch(["Bin_1", "Bin_2"], [2, 4], [99, 40]))   # Bin_1's is older
+    df = state.snapshot().set_index("Bin_ID")
+    assert df.loc["Bin_1", "Fill_Level(%)"] == 30
+    assert df.loc["Bin_2", "Fill_Level(%)"] == 40
+
+
+def test_snapshot_keeps_compact_types():
+    state = FleetState()
+    state.update(_batch(["Bin_1", "Bin_2"], [1, 2], [53.4, 7], Status=["ok", None]))
+    df = state.snapshot()
+    assert isinstance(df["Bin_ID"].dtype, pd.CategoricalDtype)
+    assert isinstance(df["Status"].dtype, pd.CategoricalDtype)
+    assert df["Fill_Level(%)"].dtype == np.float32
+    assert df["Status"].isna().tolist() == [False, True]
+
+
+def test_all_nan_first_column_stays_text():
+    state = FleetState()
+    state.update(_batch(["Bin_1"], [1], [10], Status=[np.nan]))
+    state.update(_batch(["Bin_1"], [2], [10], Status=["full"]))
+    assert state.snapshot()["Status"].tolist() == ["full"]
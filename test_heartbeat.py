@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from heartbeat import HeartbeatTracker, classify_battery
+
+
+def _readings(bin_id, minutes, battery=80.0, start="2024-05-01 08:00"):
+    return pd.DataFrame({
+        "Bin_ID": bin_id,
+        "Timestamp": pd.Timestamp(start) + pd.to_timedelta(minutes, "min"),
+        "Battery_Level(%)": battery,
+    })
+
+
+def test_bin_goes_silent_after_missing_its_usual_interval():
+    tracker = HeartbeatTracker()
+    tracker.update(pd.concat([_readings("Bin_1", np.arange(0, 120, 15)), _readings("Bin_2", np.arange(0, 120, 15))]))
+    assert tracker.kpis() == {"offline": 0, "silent": 0}
+
+    # Bin_2 carries on for 2 hours; Bin_1's deadline (3 x 15 min after 01:45) passes
+    tracker.update(_readings("Bin_2", np.arange(120, 240, 15)))
+    status = tracker.status(["Bin_1", "Bin_2", "Bin_9"])
+    assert status["Device_Status"].tolist() == ["Offline", "Online", "Unknown"]
+    assert status["Silent_Hours"].iloc[0] == 2.0
+    assert tracker.kpis() == {"offline": 1, "silent": 1}
+
+
+def test_a_new_reading_brings_a_bin_back():
+    tracker = HeartbeatTracker()
+    tracker.update(_readings("Bin_1", np.arange(0, 60, 15)))
+    tracker.advance(pd.Timestamp("2024-05-01 12:00"))
+    assert tracker.kpis()["silent"] == 1
+    tracker.update(_readings("Bin_1", [245]))
+    assert tracker.kpis()["silent"] == 0
+    assert tracker.status(["Bin_1"])["Device_Status"].tolist() == ["Online"]
+
+
+def test_wall_clock_flags_a_source_that_went_quiet():
+    tracker = HeartbeatTracker()
+    tracker.update(_readings("Bin_1", np.arange(0, 60, 15)))
+    version = tracker.version
+    tracker.advance(pd.Timestamp("2024-05-01 08:50"))   # not past MIN_SILENCE yet
+    assert tracker.kpis()["silent"] == 0 and tracker.version == version
+    tracker.advance(pd.Timestamp("2024-05-01 09:30"))
+    assert tracker.kpis()["silent"] == 1 and tracker.version > version
+    tracker.advance(pd.Timestamp("2024-05-01 09:00"))   # never backwards
+    assert tracker.kpis()["silent"] == 1
+
+
+def test_low_battery_counts_as_offline():
+    tracker = HeartbeatTracker()
+    tracker.update(pd.concat([_readings("Bin_1", [0], 10.0), _readings("Bin_2", [0], 35.0)]))
+    assert tracker.status(["Bin_1", "Bin_2"])["Device_Status"].tolist() == ["Offline", "Maintenance"]
+    assert tracker.kpis() == {"offline": 1, "silent": 0}
+
+
+def test_classify_battery():
+    assert list(classify_battery([80, 30, 5, np.nan])) == ["Online", "Maintenance", "Offline", "Unknown"]
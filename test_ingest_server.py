@@ -0,0 +1,53 @@
+import asyncio
+import csv
+import json
+import subprocess
+import sys
+
+from ingest_server import ReadingLog, handle_http
+
+
+def _post(log, body, headers, max_body=1024):
+    async def run():
+        server = await asyncio.start_server(lambda r, w: handle_http(r, w, log, max_body), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            head = "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+            writer.write(f"POST /readings HTTP/1.1\r\n{head}\r\n".encode() + body)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+        status = response.split(b"\r\n", 1)[0].decode()
+        return status.split(" ", 1)[1], json.loads(response.split(b"\r\n\r\n", 1)[1])
+    return asyncio.run(run())
+
+
+def test_readings_are_accepted_and_logged(tmp_path):
+    log = ReadingLog(str(tmp_path / "readings.csv"))
+    body = json.dumps([{"Bin_ID": "Bin_1", "Fill_Level(%)": 40}, {"Fill_Level(%)": 10}]).encode()
+    status, payload = _post(log, body, {"Content-Type": "application/json", "Content-Length": len(body)})
+    assert status == "202 Accepted"
+    assert payload == {"accepted": 1, "rejected": 1}
+    log.flush()
+    with open(tmp_path / "readings.csv") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["Bin_ID"] for r in rows] == ["Bin_1"]
+
+
+def test_bad_content_length_is_400(tmp_path):
+    log = ReadingLog(str(tmp_path / "readings.csv"))
+    assert _post(log, b"", {"Content-Length": "abc"})[0] == "400 Bad Request"
+    assert _post(log, b"", {"Content-Length": "-5"})[0] == "400 Bad Request"
+
+
+def test_body_over_the_limit_is_413(tmp_path):
+    log = ReadingLog(str(tmp_path / "readings.csv"))
+    status, _ = _post(log, b"", {"Content-Length": 10 ** 9}, max_body=1024)
+    assert status == "413 Payload Too Large"
+    assert log.pending == []
+
+
+def test_server_does_not_import_the_dashboard():
+    code = "import sys, ingest_server; sys.exit('data_loader' in sys.modules or 'streamlit' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code]).returncode == 0
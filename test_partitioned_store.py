@@ -0,0 +1,74 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from partitioned_store import PartitionedStore, bin_bucket
+
+
+def _readings(start, hours, bins=("Bin_1", "Bin_2", "Bin_3")):
+    times = pd.date_range(start, periods=hours, freq="h")
+    return pd.DataFrame({
+        "Timestamp": np.repeat(times, len(bins)),
+        "Bin_ID": list(bins) * hours,
+        "Fill_Level(%)": np.arange(hours * len(bins), dtype=float),
+    })
+
+
+def test_rows_are_split_by_day_and_bin_bucket(tmp_path):
+    store = PartitionedStore(str(tmp_path), buckets=4)
+    store.append(_readings("2024-05-01 20:00", 8))   # crosses midnight
+    days = {key.split("/")[0] for key in store.catalog["partitions"]}
+    assert days == {"2024-05-01", "2024-05-02"}
+    assert len(store) == 24
+    key = f"2024-05-02/b{bin_bucket('Bin_1', 4):02d}"
+    assert os.path.isdir(os.path.join(str(tmp_path), key))
+
+
+def test_reopened_store_answers_the_same_queries(tmp_path):
+    store = PartitionedStore(str(tmp_path))
+    store.append(_readings("2024-05-01", 48))
+    again = PartitionedStore(str(tmp_path))
+    df = again.query("2024-05-02 06:00", "2024-05-02 09:00", bins=["Bin_2"])
+    assert len(df) == 3
+    assert set(df["Bin_ID"]) == {"Bin_2"}
+    assert len(again) == 144
+
+
+def test_query_only_opens_matching_partitions(tmp_path):
+    store = PartitionedStore(str(tmp_path), buckets=4)
+    store.append(_readings("2024-05-01", 72))
+    keys = store.partitions("2024-05-02", "2024-05-03", bins=["Bin_1"])
+    assert keys == [f"2024-05-02/b{bin_bucket('Bin_1', 4):02d}"]
+
+
+def test_latest_rows_reads_each_bins_last_day(tmp_path):
+    store = PartitionedStore(str(tmp_path))
+    store.append(_readings("2024-05-01", 30))
+    store.append(_readings("2024-05-03", 2, bins=("Bin_1",)))
+    rows = store.latest_rows()
+    last = rows.groupby("Bin_ID", observed=True)["Timestamp"].max()
+    assert last["Bin_1"] == pd.Timestamp("2024-05-03 01:00")
+    assert last["Bin_2"] == pd.Timestamp("2024-05-02 05:00")
+    assert rows["Timestamp"].min() >= pd.Timestamp("2024-05-02")
+
+
+def test_drop_before_deletes_whole_days(tmp_path):
+    store = PartitionedStore(str(tmp_path))
+    store.append(_readings("2024-05-01", 72))
+    assert store.drop_before("2024-05-03") == 144
+    assert not os.path.exists(os.path.join(str(tmp_path), "2024-05-01"))
+    assert store.query()["Timestamp"].min() == pd.Timestamp("2024-05-03")
+
+
+def test_compact_sorts_late_readings(tmp_path):
+    store = PartitionedStore(str(tmp_path), buckets=1)
+    df = _readings("2024-05-01", 10, bins=("Bin_1",))
+    store.append(df.iloc[5:])
+    store.append(df.iloc[:5])   # late arrivals
+    key = "2024-05-01/b00"
+    assert not store._partition(key).meta["sorted"]
+    store.compact("2024-05-02")
+    again = PartitionedStore(str(tmp_path), buckets=1)
+    assert again._partition(key).meta["sorted"]
+    assert again.query()["Timestamp"].is_monotonic_increasing
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from quality import QualityFilter
+
+
+def _readings(fills, bin_id="Bin_1", start="2024-05-01", every=15):
+    return pd.DataFrame({
+        "Bin_ID": bin_id,
+        "Timestamp": pd.Timestamp(start) + pd.to_timedelta(np.arange(len(fills)) * every, "min"),
+        "Fill_Level(%)": np.array(fills, dtype="float32"),
+    })
+
+
+def _stream(quality, df):
+    # One reading per batch, as a live source delivers them
+    out = [quality.filter(df.iloc[[i]]) for i in range(len(df))]
+    return pd.concat(out, ignore_index=True)
+
+
+def test_duplicates_and_late_readings_are_dropped():
+    quality = QualityFilter()
+    df = _readings([10, 11, 12])
+    quality.filter(df)
+    again = quality.filter(pd.concat([df.iloc[[2]], df.iloc[[0]]], ignore_index=True))
+    assert again.empty
+    assert quality.stats()["duplicates"] == 1
+    assert quality.stats()["late"] == 1
+
+
+def test_spike_is_dropped_once_the_next_reading_disagrees():
+    fills = [50, 51, 52, 53, 95, 54, 55]
+    for run in (lambda q, df: q.filter(df), _stream):
+        quality = QualityFilter()
+        out = run(quality, _readings(fills))
+        assert 95 not in out["Fill_Level(%)"].tolist()
+        assert len(out) == 6
+        assert quality.stats()["outliers"] == 1
+
+
+def test_level_change_is_passed_on_when_confirmed():
+    fills = [30, 30, 30, 30, 70, 71, 72]
+    for run in (lambda q, df: q.filter(df), _stream):
+        quality = QualityFilter()
+        out = run(quality, _readings(fills))
+        assert out["Fill_Level(%)"].tolist() == fills
+        assert out["Timestamp"].is_monotonic_increasing
+        assert quality.stats()["level_changes"] == 1
+
+
+def test_emptying_is_accepted_at_once():
+    quality = QualityFilter()
+    out = _stream(quality, _readings([85, 86, 87, 88, 5]))
+    assert out["Fill_Level(%)"].tolist()[-1] == 5
+
+
+def test_reporting_gaps_are_flagged_and_kept():
+    quality = QualityFilter()
+    df = _readings([10, 11, 12, 13])
+    df.loc[3, "Timestamp"] += pd.Timedelta(hours=3)
+    assert len(quality.filter(df)) == 4
+    gaps = quality.recent_gaps()
+    assert gaps["Bin_ID"].tolist() == ["Bin_1"]
+    assert quality.stats()["gaps"] == 1
+
+
+def test_held_suspect_survives_a_restart():
+    df = _readings([30, 30, 30, 30, 70, 71])
+    first = QualityFilter()
+    first.filter(df.iloc[:5])
+    held = first.held_rows()
+    assert held["Fill_Level(%)"].tolist() == [70]
+
+    again = QualityFilter()
+    again.filter(df.iloc[:4], count=False)   # warmed up from the stored (accepted) rows
+    again.hold(held)
+    assert again.filter(df.iloc[4:5]).empty   # re-read suspect: a duplicate
+    out = again.filter(df.iloc[5:])
+    assert out["Fill_Level(%)"].tolist() == [70, 71]
@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+
+from rollups import Rollups
+
+
+def _readings(bin_id, times, fills):
+    return pd.DataFrame({
+        "Bin_ID": bin_id,
+        "Timestamp": pd.to_datetime(times),
+        "Fill_Level(%)": fills,
+    })
+
+
+BATCH = pd.concat([
+    _readings("Bin_1", ["2024-05-01 08:00", "2024-05-01 08:30", "2024-05-01 09:00", "2024-05-01 09:30"],
+              [40.0, 75.0, 80.0, 20.0]),
+    _readings("Bin_2", ["2024-05-01 08:15", "2024-05-02 08:15"], [10.0, 30.0]),
+], ignore_index=True)
+
+
+def test_hourly_and_daily_aggregates():
+    rollups = Rollups()
+    rollups.update(BATCH)
+
+    hourly = rollups.query("1h", bins=["Bin_1"]).set_index("bucket")
+    assert hourly["count"].tolist() == [2, 2]
+    assert hourly["min"].tolist() == [40.0, 20.0]
+    assert hourly["max"].tolist() == [75.0, 80.0]
+    assert hourly["mean"].tolist() == [57.5, 50.0]
+
+    daily = rollups.summary("1D")
+    assert daily.loc["Bin_1", "readings"] == 4
+    assert daily.loc["Bin_1", "mean"] == pytest.approx(53.75)
+    assert daily.loc["Bin_2", "readings"] == 2
+    assert rollups.time_range() == (pd.Timestamp("2024-05-01"), pd.Timestamp("2024-05-02 08:15"))
+
+
+def test_time_above_threshold_is_credited_to_the_earlier_bucket():
+    rollups = Rollups()
+    rollups.update(BATCH)
+    # Bin_1 is full (>= 70) from 08:30 to 09:30: 30 min in each hour
+    hourly = rollups.query("1h", bins=["Bin_1"]).set_index("bucket")["above_s"]
+    assert hourly.tolist() == [1800.0, 1800.0]
+    assert rollups.summary("1D").loc["Bin_1", "hours_above"] == 1.0
+
+
+def test_a_long_silence_counts_for_at_most_max_gap():
+    rollups = Rollups()
+    rollups.update(_readings("Bin_1", ["2024-05-01 08:00", "2024-05-01 20:00"], [90.0, 90.0]))
+    assert rollups.summary("1D").loc["Bin_1", "hours_above"] == 1.0
+
+
+def test_streamed_batches_match_one_batch():
+    whole, streamed = Rollups(), Rollups()
+    whole.update(BATCH)
+    for _, row in BATCH.sort_values("Timestamp").iterrows():
+        streamed.update(row.to_frame().T.astype(BATCH.dtypes.to_dict()))
+    pd.testing.assert_frame_equal(streamed.summary("1h"), whole.summary("1h"))
+    pd.testing.assert_frame_equal(streamed.pivot("1h"), whole.pivot("1h"))
+
+
+def test_reopen_keeps_rollups_and_skips_replayed_rows(tmp_path):
+    path = str(tmp_path / "rollups.db")
+    first = Rollups(path=path)
+    first.update(BATCH.iloc[:3])
+
+    reopened = Rollups(path=path)
+    reopened.update(BATCH)   # the source is read again from the start
+    expected = Rollups()
+    expected.update(BATCH)
+    pd.testing.assert_frame_equal(reopened.summary("1h"), expected.summary("1h"))
+    pd.testing.assert_frame_equal(Rollups(path=path).summary("1D"), expected.summary("1D"))
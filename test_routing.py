@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from routing import _nearest_neighbour, _two_opt, distance_matrix, plan_routes, route_candidates
+
+DEPOT = (0.0, 0.0)
+
+
+def _stops(points, fill=100.0):
+    return pd.DataFrame({
+        "Bin_ID": [f"Bin_{i}" for i in range(len(points))],
+        "Lat": [p[0] for p in points],
+        "Lon": [p[1] for p in points],
+        "Fill_Level(%)": fill,
+    })
+
+
+def test_distance_matrix_is_haversine_km():
+    dist = distance_matrix([0.0, 1.0, 0.0], [0.0, 0.0, 1.0])
+    assert dist[0, 1] == pytest.approx(111.19, abs=0.01)
+    assert dist[0, 2] == pytest.approx(111.19, abs=0.01)
+    np.testing.assert_allclose(dist, dist.T)
+    assert (np.diag(dist) == 0).all()
+
+
+def test_candidates_are_full_or_soon_full_bins_with_a_position():
+    classified = pd.DataFrame({
+        "Bin_ID": ["Bin_1", "Bin_2", "Bin_3", "Bin_4", "Bin_5"],
+        "Fill_Rank": [2, 1, 1, 0, 2],
+        "Hours_To_Full": [0.0, 2.0, 5.0, np.nan, 0.0],
+        "Lat": [1.0, 1.0, 1.0, 1.0, np.nan],
+        "Lon": [1.0, 1.0, 1.0, 1.0, 1.0],
+    })
+    assert route_candidates(classified)["Bin_ID"].tolist() == ["Bin_1", "Bin_2"]
+    assert route_candidates(classified, within_hours=6)["Bin_ID"].tolist() == ["Bin_1", "Bin_2", "Bin_3"]
+
+
+def test_two_opt_removes_a_detour():
+    x = np.arange(5.0)
+    dist = np.abs(x[:, None] - x[None, :])
+    assert _two_opt([2, 1, 3, 4], dist, float("inf")) == [1, 2, 3, 4]
+
+
+def test_trucks_are_filled_up_to_capacity():
+    x = np.arange(6.0)
+    dist = np.abs(x[:, None] - x[None, :])
+    routes = _nearest_neighbour(dist, np.full(5, 0.8), capacity=2.0)
+    assert routes == [[1, 2], [3, 4], [5]]
+    # A stop larger than a truck still gets its own trip
+    assert _nearest_neighbour(dist[:3, :3], np.array([3.0, 0.5]), capacity=2.0) == [[2], [1]]
+
+
+def test_plan_visits_every_stop_once():
+    rng = np.random.default_rng(0)
+    stops = _stops(rng.uniform(-0.05, 0.05, size=(60, 2)), fill=rng.uniform(50, 100, 60))
+    plan, summary = plan_routes(stops, depot=DEPOT, capacity=10.0)
+
+    assert sorted(plan["Bin_ID"]) == sorted(stops["Bin_ID"])
+    assert (summary["Load"] <= 10.0 + 1e-9).all()
+    assert summary["Stops"].sum() == 60
+    assert summary["Load"].sum() == pytest.approx(stops["Fill_Level(%)"].sum() / 100)
+    # Route totals include the way back to the depot
+    back = plan.groupby("Route").tail(1)
+    home = distance_matrix(np.r_[back["Lat"], DEPOT[0]], np.r_[back["Lon"], DEPOT[1]])[:-1, -1]
+    np.testing.assert_allclose(summary["Km"], plan.groupby("Route")["Km"].sum().to_numpy() + home)
+
+
+def test_no_stops_no_routes():
+    plan, summary = plan_routes(_stops([]), depot=DEPOT)
+    assert plan.empty and summary.empty
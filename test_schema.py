@@ -0,0 +1,29 @@
+import pandas as pd
+
+import schema
+
+
+def _frame(times):
+    return pd.DataFrame({"Timestamp": times, "Bin_ID": ["Bin_1"] * len(times), "Fill_Level(%)": ["50%"] * len(times)})
+
+
+def test_format_is_detected_and_stored(tmp_path):
+    registry = schema.SchemaRegistry(str(tmp_path / "schemas.json"))
+    found = registry.resolve("sheet", _frame(["13/05/2024 10:00"]))
+    assert found["time_format"] == "%d/%m/%Y %H:%M"
+    assert schema.SchemaRegistry(str(tmp_path / "schemas.json")).schemas["sheet"] == found
+
+
+def test_changed_format_is_detected_again(tmp_path):
+    registry = schema.SchemaRegistry(str(tmp_path / "schemas.json"))
+    registry.resolve("sheet", _frame(["13/05/2024 10:00"]))
+    found = registry.resolve("sheet", _frame(["13/05/2024 10:00"] + ["2024-05-14 10:00:00"] * 3))
+    assert found["time_format"] == "%Y-%m-%d %H:%M:%S"
+
+
+def test_rows_the_format_misses_are_still_parsed(caplog):
+    stored = schema.detect(_frame(["13/05/2024 10:00"]))
+    df = schema.apply(stored, _frame(["13/05/2024 10:00", "2024-05-14T09:30:00", "not a time"]))
+    assert df["Timestamp"].tolist() == [pd.Timestamp("2024-05-13 10:00"), pd.Timestamp("2024-05-14 09:30")]
+    assert df["Fill_Level(%)"].tolist() == [50, 50]
+    assert "Dropped 1 of 3 rows" in caplog.text
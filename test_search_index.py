@@ -0,0 +1,50 @@
+import pandas as pd
+
+from search_index import SearchIndex
+
+
+def _index():
+    index = SearchIndex()
+    index.update(pd.DataFrame({
+        "Bin_ID": ["Bin_A01", "Bin_A02", "Bin_B01", "Bin_B02", "Bin_C10"],
+        "Location": ["Central Market", "Bus Station", "Mall Road", "Central Park", "Harbour"],
+        "Zone": ["North", "North", "South", "South", "East"],
+    }))
+    return index
+
+
+def test_id_prefix_matches_only_those_ids():
+    # "bin" is in every ID: its pieces must not make "Bin_B" match them all
+    assert list(_index().search("Bin_B")) == ["Bin_B01", "Bin_B02"]
+
+
+def test_whole_id_and_id_substring():
+    index = _index()
+    assert list(index.search("bin_b01")) == ["Bin_B01"]
+    assert list(index.search("b01")) == ["Bin_B01"]
+    assert list(index.search("Bin_Z")) == []
+
+
+def test_location_and_zone_words_must_all_match():
+    index = _index()
+    assert list(index.search("central")) == ["Bin_A01", "Bin_B02"]
+    assert list(index.search("central park")) == ["Bin_B02"]
+    assert list(index.search("south")) == ["Bin_B01", "Bin_B02"]
+
+
+def test_typos_fall_back_to_near_matches():
+    index = _index()
+    assert list(index.search("harbor")) == ["Bin_C10"]
+    assert "Bin_B01" in index.search("Bin_B0l")
+    assert list(index.search("harbor", fuzzy=False)) == []
+
+
+def test_update_reindexes_changed_bins():
+    index = _index()
+    index.update(pd.DataFrame({"Bin_ID": ["Bin_C10"], "Location": ["Ferry Pier"], "Zone": ["East"]}))
+    assert list(index.search("harbour", fuzzy=False)) == []
+    assert list(index.search("pier")) == ["Bin_C10"]
+
+
+def test_empty_query_is_no_filter():
+    assert _index().search("  ") is None
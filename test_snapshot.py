@@ -0,0 +1,69 @@
+import threading
+import time
+
+from data_loader import DERIVED_CACHE_SIZE, Snapshot
+
+
+def _snapshot():
+    return Snapshot(1, None, None, None, None, None, None, None, None)
+
+
+def _run(fn, timeout=5):
+    # Runs fn in a thread; fails instead of hanging if it deadlocks
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault("value", fn()), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "derive deadlocked"
+    return result["value"]
+
+
+def test_nested_derive_does_not_deadlock():
+    # Real-time status cards: derive(status_cards) -> classified_latest -> derive(classified)
+    snap = _snapshot()
+    value = _run(lambda: snap.derive("cards", lambda s: s.derive("classified", lambda s: 41) + 1))
+    assert value == 42
+    assert snap.derive("classified", lambda s: 0) == 41
+
+
+def test_slow_key_does_not_block_others():
+    snap = _snapshot()
+    started = threading.Event()
+
+    def slow(s):
+        started.set()
+        time.sleep(1)
+        return "pivot"
+
+    thread = threading.Thread(target=lambda: snap.derive("report_pivot", slow), daemon=True)
+    thread.start()
+    started.wait()
+    t0 = time.perf_counter()
+    assert _run(lambda: snap.derive("cards", lambda s: "cards")) == "cards"
+    assert time.perf_counter() - t0 < 0.5
+    thread.join()
+
+
+def test_derive_computes_once_per_key():
+    snap = _snapshot()
+    calls = []
+
+    def build(s):
+        calls.append(1)
+        time.sleep(0.1)
+        return len(calls)
+
+    threads = [threading.Thread(target=lambda: snap.derive("cards", build)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert calls == [1]
+
+
+def test_derived_values_are_bounded():
+    snap = _snapshot()
+    for i in range(DERIVED_CACHE_SIZE * 3):
+        snap.derive(("report_pivot", i), lambda s, i=i: i)
+    assert len(snap._derived) == DERIVED_CACHE_SIZE
+    assert snap.derive(("report_pivot", 0), lambda s: "again") == "again"
@@ -0,0 +1,99 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+# --- Fill thresholds per bin / zone ---
+# One config file, loaded once per process and indexed by Bin_ID:
+#   {"default": {"full_at": 70, "medium_at": 50, "close_at": 60},
+#    "zones":   {"TRX": {"full_at": 75}},
+#    "bins":    {"Bin_A": {"zone": "TRX", "full_at": 80}}}
+# A bin's value comes from its own entry, then its zone, then the default.
+# A bin's zone is the one given to resolve(), else its registry entry
+# (bin_registry.py), else the "zone" of its entry here.
+#   full_at   - FULL status (red) and alert opens
+#   medium_at - MEDIUM status (orange)
+#   close_at  - an open alert closes below this (hysteresis)
+# Every change bumps `version`, so anything classified with the old values
+# is recomputed once (see classify) instead of reloading the data.
+FIELDS = ("full_at", "medium_at", "close_at")
+DEFAULTS = {"full_at": 70.0, "medium_at": 50.0, "close_at": 60.0}
+
+LEVELS = np.array(["EMPTY", "MEDIUM", "FULL"], dtype=object)
+
+
+class ThresholdConfig:
+    def __init__(self, path, registry=None):
+        self.path = path
+        self.registry = registry   # BinRegistry the zones come from; None = config file only
+        self.lock = threading.Lock()
+        self.version = 0
+        config = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                config = json.load(f)
+        self.default = {**DEFAULTS, **config.get("default", {})}
+        self.zones = pd.DataFrame.from_dict(config.get("zones", {}), orient="index", dtype=float).reindex(columns=list(FIELDS))
+        bins = pd.DataFrame.from_dict(config.get("bins", {}), orient="index")
+        self.bins = bins.reindex(columns=list(FIELDS) + ["zone"])
+        self.bins[list(FIELDS)] = self.bins[list(FIELDS)].astype(float)
+
+    def resolve(self, bin_ids, zones=None):
+        # One row per entry of bin_ids with full_at / medium_at / close_at
+        bin_ids = pd.Index(pd.Series(bin_ids).astype(str))
+        if zones is None and self.registry is not None:
+            zones = self.registry.lookup(bin_ids)["Zone"]
+        with self.lock:
+            per_bin = self.bins.reindex(bin_ids)
+            if zones is None:
+                zones = per_bin["zone"]
+            zones = pd.Series(np.asarray(zones, dtype=object), index=bin_ids).where(lambda z: z.notna(), per_bin["zone"])
+            per_zone = self.zones.reindex(zones.to_numpy())
+            per_zone.index = bin_ids
+            out = per_bin[list(FIELDS)].fillna(per_zone).fillna(self.default)
+        return out.reset_index(drop=True)
+
+    def set(self, bin_id=None, zone=None, **values):
+        # Change thresholds of one bin, one zone, or the default; saved to disk
+        unknown = set(values) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown threshold(s): {', '.join(sorted(unknown))}")
+        with self.lock:
+            if bin_id is not None:
+                for field, value in values.items():
+                    self.bins.loc[str(bin_id), field] = float(value)
+            elif zone is not None:
+                for field, value in values.items():
+                    self.zones.loc[zone, field] = float(value)
+            else:
+                self.default.update({k: float(v) for k, v in values.items()})
+            self.version += 1
+            self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        def entries(df):
+            return {key: {k: v for k, v in row.items() if pd.notna(v)} for key, row in df.to_dict("index").items()}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"default": self.default, "zones": entries(self.zones), "bins": entries(self.bins)}, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+def classify(latest, config, zones=None):
+    # Latest table plus its thresholds and Fill_Status (FULL / MEDIUM / EMPTY),
+    # in one vectorized pass. Fill_Rank is 2 / 1 / 0 for the same statuses.
+    if latest.empty:
+        return latest.assign(Fill_Status=pd.Series(dtype=object), Fill_Rank=pd.Series(dtype="int8"))
+    t = config.resolve(latest["Bin_ID"], zones)
+    fill = latest["Fill_Level(%)"].to_numpy(dtype=float)
+    full_at, medium_at = t["full_at"].to_numpy(), t["medium_at"].to_numpy()
+    rank = np.select([fill >= full_at, fill >= medium_at], [2, 1], 0).astype("int8")
+    return latest.assign(
+        Full_At=full_at, Medium_At=medium_at, Close_At=t["close_at"].to_numpy(),
+        Fill_Status=LEVELS[rank], Fill_Rank=rank,
+    )